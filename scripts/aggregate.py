@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+AGGREGATE — Vectorized group-by statistics over columnar case arrays
+================================================================================
+
+The analysis scripts grouped cases with dict-of-lists loops keyed on raw
+floats (so k_azi 0.8 and 0.8000001 were different groups) and called
+compute_statistics once per group. Here grouping and reduction are array
+operations over the columns of analyze_raw_data.load_case_columns or the
+case store:
+
+1. Float keys are binned to a tolerance (round(v / tol)), categorical and
+   integer keys are factorized with np.unique; the per-key codes are
+   combined into one group index with np.unique(axis=0).
+2. Values are sorted once by (group, value). Every group is then a
+   contiguous segment, and n, mean, std (ddof=1), CV, min, max, range,
+   median and quartiles of all groups come from segment reductions
+   (np.add.reduceat) and indexed reads of the sorted array. Quantiles use
+   linear interpolation, as np.percentile does.
+
+The statistics have the same names and definitions as
+analyze_raw_data.compute_statistics.
+
+Usage:
+    python3 scripts/aggregate.py --by material load            # Corpus W_pv by material × load
+    python3 scripts/aggregate.py --by k_azi --tol 0.01 --all   # Every stored case, k_azi binned to 0.01
+    python3 scripts/aggregate.py --by n_harmonic --value solver_time_s
+
+    from aggregate import group_stats
+    rows = group_stats(columns, by=("k_azi", "material"), tol={"k_azi": 1e-6})
+
+================================================================================
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+# Default bin width of float keys
+DEFAULT_TOL = 1e-6
+
+# Code of NaN float keys (sorts first)
+NAN_CODE = np.iinfo(np.int64).min
+
+
+def bin_floats(values: np.ndarray, tol: float = DEFAULT_TOL) -> np.ndarray:
+    """Integer bin of every value (values within ~tol share a bin); NaN -> NAN_CODE."""
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.full(values.shape, NAN_CODE, dtype=np.int64)
+    finite = np.isfinite(values)
+    codes[finite] = np.round(values[finite] / tol).astype(np.int64)
+    return codes
+
+
+class Groups:
+    """Group index of every row plus the key values of every group, in sorted key order."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], by: Sequence[str], tol: Optional[Dict[str, float]] = None):
+        tol = tol or {}
+        self.by = list(by)
+        n = len(next(iter(columns.values()))) if columns else 0
+        if not self.by:
+            self.inverse = np.zeros(n, dtype=np.int64)
+            self.keys: Dict[str, np.ndarray] = {}
+            self.n_groups = 1 if n else 0
+            return
+        codes, tables = [], {}
+        for key in self.by:
+            col = np.asarray(columns[key])
+            if col.dtype.kind == "f":
+                step = tol.get(key, DEFAULT_TOL)
+                c = bin_floats(col, step)
+                codes.append(c)
+                tables[key] = ("float", step)
+            else:
+                table, c = np.unique(col, return_inverse=True)
+                codes.append(c.reshape(-1).astype(np.int64))
+                tables[key] = ("table", table)
+        unique, inverse = np.unique(np.column_stack(codes), axis=0, return_inverse=True)
+        self.inverse = inverse.reshape(-1)
+        self.n_groups = len(unique)
+        self.keys = {}
+        for j, key in enumerate(self.by):
+            kind, info = tables[key]
+            if kind == "float":
+                # Bin centre, rounded to the bin width's decimals
+                decimals = max(0, int(-np.floor(np.log10(info))))
+                self.keys[key] = np.where(unique[:, j] == NAN_CODE, np.nan,
+                                          np.round(unique[:, j] * info, decimals))
+            else:
+                self.keys[key] = info[unique[:, j]]
+
+
+def aggregate(values: np.ndarray, groups: Groups, quantiles: Sequence[float] = (0.25, 0.5, 0.75)) -> Dict[str, np.ndarray]:
+    """n, mean, std, cv_percent, min, max, range and quantiles of values for every group."""
+    values = np.asarray(values, dtype=np.float64)
+    order = np.lexsort((values, groups.inverse))
+    sv, sg = values[order], groups.inverse[order]
+    counts = np.bincount(sg, minlength=groups.n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    nonempty = counts > 0
+    safe_starts = np.where(nonempty, starts, 0)
+
+    sums = np.zeros(groups.n_groups)
+    if len(sv):
+        sums[nonempty] = np.add.reduceat(sv, starts[nonempty])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(nonempty, sums / counts, np.nan)
+        sq = np.zeros(groups.n_groups)
+        if len(sv):
+            sq[nonempty] = np.add.reduceat((sv - mean[sg]) ** 2, starts[nonempty])
+        std = np.where(counts > 1, np.sqrt(sq / np.maximum(counts - 1, 1)), 0.0)
+        cv = np.where(mean != 0, std / mean * 100, 0.0)
+
+    def quantile(q: float) -> np.ndarray:
+        pos = q * np.maximum(counts - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, np.maximum(counts - 1, 0))
+        if not len(sv):
+            return np.full(groups.n_groups, np.nan)
+        a, b = sv[safe_starts + lo], sv[safe_starts + hi]
+        return np.where(nonempty, a + (pos - lo) * (b - a), np.nan)
+
+    out = {"n": counts, "mean": mean, "std": std, "cv_percent": cv}
+    if len(sv):
+        out["min"] = np.where(nonempty, sv[safe_starts], np.nan)
+        out["max"] = np.where(nonempty, sv[safe_starts + np.maximum(counts - 1, 0)], np.nan)
+    else:
+        out["min"] = out["max"] = np.full(groups.n_groups, np.nan)
+    out["range"] = out["max"] - out["min"]
+    for q in quantiles:
+        name = {0.25: "q1", 0.5: "median", 0.75: "q3"}.get(q, f"p{q * 100:g}")
+        out[name] = quantile(q)
+    return out
+
+
+def group_stats(columns: Dict[str, np.ndarray], by: Sequence[str], value: str = "W_pv_nm",
+                tol: Optional[Dict[str, float]] = None, where: Optional[np.ndarray] = None) -> List[Dict]:
+    """
+    One compute_statistics-style dict per group (key values included), in
+    sorted key order. Rows outside `where` or with a non-finite value are
+    left out.
+    """
+    keep = np.isfinite(np.asarray(columns[value], dtype=np.float64))
+    if where is not None:
+        keep &= np.asarray(where, dtype=bool)
+    selected = {k: np.asarray(columns[k])[keep] for k in set(by) | {value}}
+    if not keep.any():
+        return []
+    groups = Groups(selected, by, tol)
+    stats = aggregate(selected[value], groups)
+    rows = []
+    for g in range(groups.n_groups):
+        row = {k: groups.keys[k][g].item() for k in groups.by}
+        row.update({name: (int(v[g]) if name == "n" else float(v[g])) for name, v in stats.items()})
+        rows.append(row)
+    return rows
+
+
+def main():
+    import argparse
+    from case_store import load_store
+    parser = argparse.ArgumentParser(description="Group-by statistics over the case store")
+    parser.add_argument("--by", nargs="*", default=["material"], help="Key columns")
+    parser.add_argument("--value", default="W_pv_nm", help="Value column")
+    parser.add_argument("--tol", type=float, default=DEFAULT_TOL, help="Bin width of float keys")
+    parser.add_argument("--all", action="store_true", help="Every stored case, not only the corpus")
+    args = parser.parse_args()
+
+    store = load_store()
+    columns = {}
+    for k in set(args.by) | {args.value}:
+        columns[k] = store.decode(k) if k in store.categories else np.asarray(store[k])
+    columns = {k: v.astype(str) if v.dtype == object else v for k, v in columns.items()}
+    where = None if args.all else np.asarray(store["in_corpus"])
+    rows = group_stats(columns, args.by, args.value, {k: args.tol for k in args.by}, where)
+
+    header = " ".join(f"{k:>14}" for k in args.by)
+    print(f"\n{header} {'N':>6} {'Mean':>14} {'Std':>14} {'CV (%)':>9} {'Median':>14}")
+    print("-" * (len(header) + 62))
+    for r in rows:
+        keys = " ".join(f"{r[k]:>14.6g}" if isinstance(r[k], float) else f"{r[k]!s:>14}" for k in args.by)
+        print(f"{keys} {r['n']:>6} {r['mean']:>14.2f} {r['std']:>14.2f} {r['cv_percent']:>9.2f} "
+              f"{r['median']:>14.2f}")
+    print(f"\n{len(rows)} groups, {sum(r['n'] for r in rows)} cases ({args.value})")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ Usage:
     python3 scripts/analyze_raw_data.py --stable     # Stable zone only
     python3 scripts/analyze_raw_data.py --chaos      # Chaos zone only
     python3 scripts/analyze_raw_data.py --materials  # Material comparison
+    python3 scripts/analyze_raw_data.py --corpus     # Corpus groups, updated incrementally
 
 Output:
     Prints statistics and optionally exports to CSV/JSON.
@@ -21,15 +22,48 @@ Output:
 """
 
 import json
+import os
 import numpy as np
 from pathlib import Path
 import argparse
 from typing import Dict, List, Tuple
 import sys
 
+from aggregate import group_stats
+from bootstrap import DEFAULT_RESAMPLES, bootstrap_ci, format_ci, ratio_ci
+from job_control import LOST, classify_status
+from manifest import verify_file
+
 # Path to raw data directory
 DATA_DIR = Path(__file__).parent.parent / "04_DATA" / "raw"
 
+# Parsed, normalized columns of each data file, keyed by the file's SHA-256
+PARSE_CACHE_DIR = Path(__file__).parent.parent / "04_DATA" / ".parse_cache"
+PARSE_CACHE_VERSION = 2
+
+# k_azi values closer than this are one sweep point
+K_AZI_TOL = 1e-6
+
+# Bootstrap resamples behind every confidence interval (0 disables them)
+BOOTSTRAP_RESAMPLES = DEFAULT_RESAMPLES
+
+# Abort instead of warning when a file does not match DATA_MANIFEST.md
+STRICT_MANIFEST = False
+
+_manifest_warned = set()
+
+
+def check_manifest(filepath: Path) -> str:
+    """Verify a data file against DATA_MANIFEST.md; returns its SHA-256."""
+    status, digest = verify_file(filepath)
+    if status == "mismatch":
+        if STRICT_MANIFEST:
+            raise ValueError(f"{filepath.name} does not match its DATA_MANIFEST.md hash ({digest})")
+        if filepath not in _manifest_warned:
+            _manifest_warned.add(filepath)
+            print(f"⚠️  {filepath.name}: SHA-256 does not match DATA_MANIFEST.md")
+    return digest
+
 
 def load_json(filename: str) -> List[Dict]:
     """Load a JSON file from the raw data directory."""
@@ -37,6 +71,7 @@ def load_json(filename: str) -> List[Dict]:
     if not filepath.exists():
         print(f"❌ File not found: {filepath}")
         return []
+    check_manifest(filepath)
     
     with open(filepath, 'r') as f:
         data = json.load(f)
@@ -49,6 +84,216 @@ def load_json(filename: str) -> List[Dict]:
     return data
 
 
+# Local runner output, merged with the raw corpus by iter_corpus_cases
+LOCAL_DATA_DIR = Path(__file__).parent.parent / "04_DATA" / "local_verified"
+
+# Case keys that change the physics beyond the normalized inputs below
+# (coatings, stacks, transient pulses, wafer size, asymmetric patterns)
+CORPUS_EXCLUDE_KEYS = ("coating", "stack", "pulse_type", "radius", "frequencies_hz")
+
+
+def _case_records(obj):
+    """Yield every dict (at any depth) that carries a W_pv result."""
+    if isinstance(obj, dict):
+        if "W_pv_nm" in obj or "W_pv_nm" in obj.get("metrics", {}):
+            yield obj
+            return
+        for v in obj.values():
+            yield from _case_records(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _case_records(v)
+
+
+def _float(value, default=np.nan) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def case_fields(case: Dict, stiffness_ref: float = None) -> Dict:
+    """
+    Every common field of a case record from any campaign format.
+
+    Lenient counterpart of normalize_case: failed, excluded and incomplete
+    records are mapped too, with NaN for missing numbers, and `exclusion`
+    names the reason the record is not a corpus case ("" if it is one).
+    `status` is canonical (success, failed or pending, from the recorded
+    status and whether a W_pv result is present); the recorded string is
+    kept as `status_raw`.
+    """
+    inputs = {**case, **case.get("inputs", {})}
+    metrics = case.get("metrics", {})
+    case_id = str(case.get("case_id", ""))
+    status = str(case.get("status", "")).lower()
+    wpv = _float(metrics.get("W_pv_nm", case.get("W_pv_nm")))
+    k_azi = inputs.get("k_azi_perturbed", inputs.get("k_azi"))
+
+    has_result = bool(np.isfinite(wpv) and wpv > 0)
+    failure = classify_status(status)
+    if failure is None:
+        canonical_status = "success" if has_result else "failed"
+    elif failure == LOST:
+        # "submitted" whose metrics came back is a success with a stale status
+        canonical_status = "success" if has_result else "pending"
+    else:
+        canonical_status = "failed"
+
+    if not has_result:
+        exclusion = "no_result"
+    elif status in ("failed", "error", "fail"):
+        exclusion = "failed"
+    elif any(k in inputs for k in CORPUS_EXCLUDE_KEYS):
+        exclusion = "physics"
+    elif inputs.get("thermal_bc", "adiabatic") != "adiabatic":
+        exclusion = "thermal_bc"
+    elif inputs.get("pattern", "parametric") != "parametric" or case_id.startswith("asym_"):
+        exclusion = "pattern"
+    elif k_azi is None:
+        exclusion = "no_k_azi"
+    else:
+        exclusion = ""
+
+    scale = inputs.get("stiffness_scale", inputs.get("_sensitivity_params", {}).get("stiffness_scale"))
+    if scale is None and inputs.get("stiffness") and stiffness_ref:
+        scale = inputs["stiffness"] / stiffness_ref
+    
+    if "bow_um" in inputs:
+        bow_um = float(inputs["bow_um"])
+    elif "bow" in inputs:
+        bow = float(inputs["bow"])
+        # Generator decks store bow in metres; some cloud configs store µm
+        bow_um = bow * 1e6 if abs(bow) < 1e-3 else bow
+    else:
+        bow_um = 0.0
+    
+    material = inputs.get("material", "silicon")
+    if "material" not in inputs and case_id.startswith("glass_"):
+        # glass_substrates only encodes the substrate in the case id
+        material = case_id[len("glass_"):].rsplit("_k", 1)[0]
+    
+    return {
+        "case_id": case.get("case_id"),
+        "k_azi": _float(k_azi),
+        "k_azi_base": _float(inputs.get("k_azi_base", inputs.get("k_azi"))),
+        "k_edge": _float(inputs.get("k_edge", 2.0)),
+        "n_harmonic": int(inputs.get("n_harmonic", 2)),
+        "n_radial": int(inputs.get("n_radial", -1)),
+        "load": str(inputs.get("load", inputs.get("load_mode", "scan"))),
+        "material": str(material),
+        "pattern": str(inputs.get("pattern", "parametric")),
+        "element_type": str(inputs.get("element_type", "")),
+        "thermal_bc": str(inputs.get("thermal_bc", "adiabatic")),
+        "status": canonical_status,
+        "status_raw": status,
+        "stiffness_scale": _float(scale) if scale is not None else 1.0,
+        "bow_um": bow_um,
+        "seed": int(inputs.get("seed", -1)) if isinstance(inputs.get("seed", -1), (int, float)) else -1,
+        "node_count": int(_float(case.get("node_count", metrics.get("node_count", -1)), -1)),
+        "solver_time_s": _float(case.get("solver_time_s", metrics.get("solver_time_s"))),
+        "W_pv_nm": wpv,
+        "W_exposure_max_nm": _float(metrics.get("W_exposure_max_nm", case.get("W_exposure_max_nm"))),
+        "exclusion": exclusion,
+    }
+
+
+def normalize_case(case: Dict, stiffness_ref: float = None) -> Dict:
+    """
+    Map a case record from any campaign format onto common inputs.
+    
+    Returns k_azi, k_edge, n_harmonic, load, material, stiffness_scale,
+    bow_um and W_pv_nm, or None for failed cases and cases whose physics the
+    inputs do not describe. stiffness_ref is the nominal stiffness of the
+    record's file, used when only an absolute stiffness is stored.
+    """
+    fields = case_fields(case, stiffness_ref)
+    if fields["exclusion"]:
+        return None
+    return {k: fields[k] for k in ("case_id", "k_azi", "k_edge", "n_harmonic", "load", "material",
+                                   "stiffness_scale", "bow_um", "W_pv_nm")}
+
+
+# Column layout of the parse cache (and of the case store)
+CASE_FLOAT_FIELDS = ("k_azi", "k_azi_base", "k_edge", "stiffness_scale", "bow_um", "W_pv_nm",
+                     "W_exposure_max_nm", "solver_time_s")
+CASE_INT_FIELDS = ("n_harmonic", "n_radial", "node_count", "seed")
+CASE_TEXT_FIELDS = ("case_id", "load", "material", "pattern", "element_type", "thermal_bc", "status",
+                    "status_raw", "exclusion")
+
+
+def _parse_columns(path: Path) -> Dict[str, np.ndarray]:
+    with open(path) as f:
+        records = list(_case_records(json.load(f)))
+    stiffness = [r.get("inputs", r).get("stiffness") for r in records]
+    stiffness = [s for s in stiffness if isinstance(s, (int, float)) and s > 0]
+    ref = float(np.median(stiffness)) if stiffness else None
+    rows = [case_fields(r, stiffness_ref=ref) for r in records]
+    columns = {k: np.array([r[k] for r in rows], dtype=np.float64) for k in CASE_FLOAT_FIELDS}
+    columns.update({k: np.array([r[k] for r in rows], dtype=np.int32) for k in CASE_INT_FIELDS})
+    columns.update({k: np.array([str(r[k] or "") for r in rows], dtype=str) for k in CASE_TEXT_FIELDS})
+    return columns
+
+
+def load_case_columns(path: Path) -> Dict[str, np.ndarray]:
+    """
+    case_fields of every record of a data file as columns.
+
+    The file is verified against DATA_MANIFEST.md and its columns are cached
+    in PARSE_CACHE_DIR under its SHA-256, so it is only parsed again when
+    its content changes.
+    """
+    path = Path(path)
+    digest = check_manifest(path)
+    cached = PARSE_CACHE_DIR / f"{digest}.v{PARSE_CACHE_VERSION}.npz"
+    if cached.exists():
+        try:
+            with np.load(cached, allow_pickle=False) as npz:
+                return {k: npz[k] for k in npz.files}
+        except (OSError, ValueError):
+            pass
+    columns = _parse_columns(path)
+    PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        np.savez(f, **columns)
+    os.replace(tmp, cached)
+    return columns
+
+
+def iter_corpus_cases(dirs=(DATA_DIR, LOCAL_DATA_DIR)):
+    """
+    Yield normalized cases (plus their source file) from every corpus JSON file.
+
+    A case_id is yielded once: a case-plan case solved for several campaigns
+    is repeated in each campaign's output file.
+    """
+    seen = set()
+    for d in dirs:
+        for path in sorted(Path(d).glob("*.json")):
+            check_manifest(path)
+            try:
+                cols = load_case_columns(path)
+            except (OSError, ValueError):
+                continue
+            for i in np.flatnonzero(cols["exclusion"] == ""):
+                if cols["case_id"][i] in seen:
+                    continue
+                seen.add(cols["case_id"][i])
+                yield {
+                    "case_id": str(cols["case_id"][i]),
+                    "k_azi": float(cols["k_azi"][i]),
+                    "k_edge": float(cols["k_edge"][i]),
+                    "n_harmonic": int(cols["n_harmonic"][i]),
+                    "load": str(cols["load"][i]),
+                    "material": str(cols["material"][i]),
+                    "stiffness_scale": float(cols["stiffness_scale"][i]),
+                    "bow_um": float(cols["bow_um"][i]),
+                    "W_pv_nm": float(cols["W_pv_nm"][i]),
+                    "source": path.name,
+                }
+
+
 def compute_statistics(values: List[float], label: str = "") -> Dict:
     """Compute comprehensive statistics for a list of values."""
     if not values:
@@ -73,6 +318,16 @@ def compute_statistics(values: List[float], label: str = "") -> Dict:
     return stats
 
 
+def print_intervals(stats: Dict):
+    """95% BCa bootstrap intervals of mean and CV under a zone's statistics table."""
+    if not BOOTSTRAP_RESAMPLES or stats["n"] < 3:
+        return
+    for stat, label, units in (("mean", "Mean W_pv 95% CI", "nm"), ("cv", "CV 95% CI", "%")):
+        ci = bootstrap_ci(stats["values"], stat, BOOTSTRAP_RESAMPLES)
+        stats[f"{stat}_ci"] = ci["bca"]
+        print(f"{label:<25} {format_ci(ci):>20} {units:>10}")
+
+
 def analyze_stable_zone():
     """Analyze the stable zone (k_azi = 0.5) Monte Carlo results."""
     print("\n" + "="*80)
@@ -93,6 +348,7 @@ def analyze_stable_zone():
         return None
     
     stats = compute_statistics(wpv_values, "Stable Zone (k_azi=0.5)")
+    stats["values"] = wpv_values
     
     print(f"\n{'Statistic':<25} {'Value':>20} {'Units':>10}")
     print("-"*55)
@@ -103,6 +359,7 @@ def analyze_stable_zone():
     print(f"{'Min W_pv':<25} {stats['min']:>20.2f} {'nm':>10}")
     print(f"{'Max W_pv':<25} {stats['max']:>20.2f} {'nm':>10}")
     print(f"{'Range':<25} {stats['range']:>20.2f} {'nm':>10}")
+    print_intervals(stats)
     print("-"*55)
     print(f"\n✅ INTERPRETATION: CV = {stats['cv_percent']:.2f}% indicates STABLE, predictable response.")
     print(f"   Manufacturing tolerances produce only ±{stats['std']:.1f} nm variation.")
@@ -130,6 +387,7 @@ def analyze_chaos_zone():
         return None
     
     stats = compute_statistics(wpv_values, "Chaos Zone (k_azi=0.8)")
+    stats["values"] = wpv_values
     
     print(f"\n{'Statistic':<25} {'Value':>20} {'Units':>10}")
     print("-"*55)
@@ -140,6 +398,7 @@ def analyze_chaos_zone():
     print(f"{'Min W_pv':<25} {stats['min']:>20.2f} {'nm':>10}")
     print(f"{'Max W_pv':<25} {stats['max']:>20.2f} {'nm':>10}")
     print(f"{'Range':<25} {stats['range']:>20.2f} {'nm':>10}")
+    print_intervals(stats)
     print("-"*55)
     print(f"\n❌ INTERPRETATION: CV = {stats['cv_percent']:.2f}% indicates CHAOTIC, unpredictable response.")
     print(f"   Manufacturing tolerances produce ±{stats['std']/1e6:.1f} mm variation (CATASTROPHIC).")
@@ -165,6 +424,10 @@ def compute_variance_ratio(stable_stats: Dict, chaos_stats: Dict):
     print(f"{'Chaos (k=0.8)':<20} {chaos_stats['cv_percent']:>15.2f} {chaos_stats['mean']:>20.2f}")
     print("-"*55)
     print(f"\n{'VARIANCE RATIO:':<20} {ratio:>15.1f}×")
+    if BOOTSTRAP_RESAMPLES and "values" in stable_stats and "values" in chaos_stats:
+        ci = ratio_ci(stable_stats["values"], chaos_stats["values"], "cv", BOOTSTRAP_RESAMPLES)
+        print(f"{'95% CI (BCa):':<20} {format_ci(ci, '.1f'):>15}  "
+              f"({BOOTSTRAP_RESAMPLES:,} resamples; n={stable_stats['n']} stable, n={chaos_stats['n']} chaos)")
     print(f"\n🎯 THE PHYSICS CLIFF: {ratio:.0f}× variance explosion at k_azi > 0.81")
     print(f"   This matches the theoretical prediction of 122×")
     
@@ -179,12 +442,11 @@ def analyze_material_sensitivity():
     print(f"Data Source: {DATA_DIR / 'material_sweep_FINAL.json'}")
     print("-"*80)
     
-    data = load_json("material_sweep_FINAL.json")
-    if not data:
-        # Try alternate structure
-        data = load_json("glass_substrates_FINAL.json")
+    source = next((f for f in ("material_sweep_FINAL.json", "glass_substrates_FINAL.json")
+                   if (DATA_DIR / f).exists()), None)
+    cols = load_case_columns(DATA_DIR / source) if source else None
     
-    if not data:
+    if cols is None or not len(cols["material"]):
         print("⚠️  Material data not available in expected format")
         print("    Theoretical cliff thresholds:")
         print("\n    | Material | Cliff Threshold | Notes |")
@@ -197,18 +459,13 @@ def analyze_material_sensitivity():
         return
     
     # Group by material
-    materials = {}
-    for case in data:
-        mat = case.get('material', 'unknown')
-        if mat not in materials:
-            materials[mat] = []
-        materials[mat].append(case.get('W_pv_nm', 0))
+    rows = group_stats({"material": cols["material"], "W_pv_nm": np.nan_to_num(cols["W_pv_nm"])},
+                       by=("material",))
     
     print(f"\n{'Material':<15} {'N':>5} {'Mean W_pv (nm)':>18} {'CV (%)':>10}")
     print("-"*50)
-    for mat, values in materials.items():
-        stats = compute_statistics(values)
-        print(f"{mat:<15} {stats['n']:>5} {stats['mean']:>18.2f} {stats['cv_percent']:>10.2f}")
+    for stats in rows:
+        print(f"{stats['material']:<15} {stats['n']:>5} {stats['mean']:>18.2f} {stats['cv_percent']:>10.2f}")
 
 
 def analyze_parameter_sweep():
@@ -219,38 +476,55 @@ def analyze_parameter_sweep():
     print(f"Data Source: {DATA_DIR / 'kazi_sweep_FINAL.json'}")
     print("-"*80)
     
-    data = load_json("kazi_sweep_FINAL.json")
-    if not data:
+    path = DATA_DIR / "kazi_sweep_FINAL.json"
+    if not path.exists():
+        print(f"❌ File not found: {path}")
         return
+    cols = load_case_columns(path)
     
-    # Group by k_azi value
-    by_kazi = {}
-    for case in data:
-        k = case.get('inputs', {}).get('k_azi', case.get('k_azi', 0))
-        if k not in by_kazi:
-            by_kazi[k] = []
-        wpv = case.get('metrics', {}).get('W_pv_nm', case.get('W_pv_nm', 0))
-        by_kazi[k].append(wpv)
+    # Group by k_azi (binned to K_AZI_TOL); cases without k_azi are reported at 0
+    rows = group_stats({"k_azi": np.nan_to_num(cols["k_azi"]), "W_pv_nm": np.nan_to_num(cols["W_pv_nm"])},
+                       by=("k_azi",), tol={"k_azi": K_AZI_TOL})
     
     print(f"\n{'k_azi':>8} {'N':>5} {'Mean W_pv (nm)':>18} {'CV (%)':>10} {'Status':>12}")
     print("-"*60)
     
-    for k in sorted(by_kazi.keys()):
-        values = by_kazi[k]
-        stats = compute_statistics(values)
+    for stats in rows:
+        k = stats["k_azi"]
         status = "STABLE" if k < 0.75 else ("WARNING" if k < 0.81 else "CLIFF!")
         print(f"{k:>8.2f} {stats['n']:>5} {stats['mean']:>18.2f} {stats['cv_percent']:>10.2f} {status:>12}")
 
 
+def analyze_corpus():
+    """Group statistics of the whole corpus, updated from the cases added since the last run."""
+    from incremental import STATE_FILE, corpus_report
+    print("\n" + "="*80)
+    print("🗂️  CORPUS GROUP STATISTICS (incremental)")
+    print("="*80)
+    print(f"Data Sources: {DATA_DIR}, {LOCAL_DATA_DIR}")
+    print(f"State: {STATE_FILE}")
+    print("-"*80)
+    return corpus_report()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Analyze raw FEA simulation data")
     parser.add_argument('--stable', action='store_true', help='Analyze stable zone only')
     parser.add_argument('--chaos', action='store_true', help='Analyze chaos zone only')
     parser.add_argument('--materials', action='store_true', help='Material sensitivity analysis')
     parser.add_argument('--sweep', action='store_true', help='Full parameter sweep analysis')
+    parser.add_argument('--corpus', action='store_true',
+                        help='Corpus group statistics, updated incrementally from new cases')
     parser.add_argument('--all', action='store_true', default=True, help='Run all analyses')
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help='Bootstrap resamples for confidence intervals (0 to skip)')
+    parser.add_argument('--strict-manifest', action='store_true',
+                        help='Abort when a data file does not match DATA_MANIFEST.md')
     
     args = parser.parse_args()
+    global STRICT_MANIFEST, BOOTSTRAP_RESAMPLES
+    STRICT_MANIFEST = args.strict_manifest
+    BOOTSTRAP_RESAMPLES = args.resamples
     
     print("\n" + "="*80)
     print("🔬 LITHOGRAPHY PHYSICS CLIFF - RAW DATA ANALYSIS")
@@ -283,6 +557,9 @@ def main():
     if args.sweep:
         analyze_parameter_sweep()
     
+    if args.corpus:
+        analyze_corpus()
+    
     print("\n" + "="*80)
     print("✅ ANALYSIS COMPLETE")
     print("="*80)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+SOLVER AUTOTUNER — Concurrent jobs × threads per job for this machine
+================================================================================
+
+Is one ccx with 32 threads faster than eight ccx with 4 threads each? For
+35k–50k node decks the sparse solver scales poorly past a few threads, but
+concurrent jobs compete for memory bandwidth, so the answer is machine
+specific. This benchmark measures it:
+
+1. A representative deck (the campaign base case, N=50 C3D8, ~50k nodes) is
+   rendered once, or an existing case directory is used.
+2. For every (jobs, threads) on the grid (powers of two, jobs × threads ≤
+   cores), a fresh process solves `rounds × jobs` copies of the deck on a
+   SolverPool with `jobs` slots and every ccx pinned to `threads` threads.
+3. Each trial reports cases/hour, CPU utilization (child CPU time over
+   wall time × cores) and the peak RSS of its largest ccx process.
+4. The configuration with the most cases/hour is written to
+   local_runs/solver_profile.json, which run_killshot_campaign.py uses for
+   --workers/--threads when they are not given.
+
+Usage:
+    python3 scripts/autotune.py
+    python3 scripts/autotune.py --jobs 1 2 4 8 --threads 1 2 4 --rounds 3
+    python3 scripts/autotune.py --case-dir local_runs/cliff_mapping/cliff_k0p6_seed0
+    python3 scripts/autotune.py --show
+
+================================================================================
+"""
+
+import json
+import os
+import resource
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from job_control import SolveJob, SolverPool, thread_env
+from runtime_model import RuntimeModel, count_deck_nodes
+
+PROFILE_FILE = Path(__file__).parent.parent / "local_runs" / "solver_profile.json"
+BENCH_DIR = Path(__file__).parent.parent / "local_runs" / "_autotune"
+
+# Representative case: the campaign base at the cliff
+REFERENCE_PARAMS = dict(pattern="parametric", load="scan", n_radial=50, element_type="C3D8",
+                        n_layers=3, k_edge=2.0, pitch=0.005, rho_0=1.0, r_trans=0.13,
+                        support_profile="density_scaled", k_azi=0.8)
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_grid(cores: int) -> List[tuple]:
+    """(jobs, threads) pairs in powers of two with jobs × threads ≤ cores."""
+    powers = [2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores]
+    return [(j, t) for j in powers for t in powers if j * t <= cores]
+
+
+def render_reference(work_dir: Path) -> Path:
+    """Render the reference deck through the campaign runner (needs the generator)."""
+    import run_killshot_campaign as K
+    prepared = K.prepare_case("autotune_ref", work_dir, **REFERENCE_PARAMS)
+    if prepared is None:
+        raise RuntimeError("could not render the reference case")
+    return prepared["case_dir"]
+
+
+def _clone_deck(src: Path, dst: Path):
+    shutil.rmtree(dst, ignore_errors=True)
+    dst.mkdir(parents=True)
+    for f in src.iterdir():
+        if f.is_file() and f.suffix == ".inp":
+            try:
+                os.link(f, dst / f.name)
+            except OSError:
+                shutil.copyfile(f, dst / f.name)
+
+
+def _trial(ccx: str, case_dir: str, inp_stem: str, jobs: int, threads: int, n_cases: int,
+           trial_dir: str) -> Dict:
+    """One grid point, run in a fresh process so its rusage covers only this trial's ccx runs."""
+    src, root = Path(case_dir), Path(trial_dir)
+    node_count = count_deck_nodes(src)
+    solve_jobs = []
+    for i in range(n_cases):
+        d = root / f"case{i}"
+        _clone_deck(src, d)
+        solve_jobs.append(SolveJob(f"case{i}", d, inp_stem, node_count))
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.monotonic()
+    pool = SolverPool(ccx, workers=jobs, model=RuntimeModel.from_history(), speculate=False,
+                      env=thread_env(threads))
+    outcomes = pool.run(solve_jobs)
+    wall = time.monotonic() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    shutil.rmtree(root, ignore_errors=True)
+
+    n_ok = sum(1 for o in outcomes.values() if o["ok"])
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {"jobs": jobs, "threads": threads, "n_cases": n_cases, "n_ok": n_ok,
+            "wall_s": round(wall, 2), "cases_per_hour": round(n_ok / wall * 3600, 1) if wall > 0 else 0.0,
+            "cpu_s": round(cpu, 2),
+            # Largest single ccx process of the trial (per-process accounting of the pool)
+            "peak_rss_mb": max((o["resources"].get("peak_rss_mb", 0) for o in outcomes.values()), default=0.0)}
+
+
+def benchmark(ccx: str, case_dir: Path, grid: List[tuple], rounds: int = 2,
+              bench_dir: Path = BENCH_DIR, cores: Optional[int] = None) -> List[Dict]:
+    """Run every grid point; returns the trial records in grid order."""
+    cores = cores or available_cores()
+    inp_stem = next(f.stem for f in Path(case_dir).glob("*.inp")
+                    if f.name not in ("nodes.inp", "elements.inp", "materials.inp", "supports.inp", "loads.inp"))
+    trials = []
+    ctx = get_context("spawn")
+    for jobs, threads in grid:
+        n_cases = jobs * rounds
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            rec = ex.submit(_trial, ccx, str(case_dir), inp_stem, jobs, threads, n_cases,
+                            str(Path(bench_dir) / f"j{jobs}_t{threads}")).result()
+        rec["cpu_utilization"] = round(rec["cpu_s"] / (rec["wall_s"] * cores), 3) if rec["wall_s"] else 0.0
+        trials.append(rec)
+        print(f"  jobs={jobs:<3} threads={threads:<3} {rec['cases_per_hour']:>8.1f} cases/h  "
+              f"CPU {rec['cpu_utilization']*100:>5.1f}%  peak RSS {rec['peak_rss_mb']:>8.1f} MB  "
+              f"({rec['n_ok']}/{n_cases} ok, {rec['wall_s']:.1f}s)")
+    return trials
+
+
+def best_config(trials: List[Dict]) -> Optional[Dict]:
+    """Highest-throughput trial in which every case solved."""
+    complete = [t for t in trials if t["n_ok"] == t["n_cases"] and t["n_cases"] > 0]
+    return max(complete, key=lambda t: t["cases_per_hour"]) if complete else None
+
+
+def save_profile(best: Dict, trials: List[Dict], node_count: int, cores: int, path: Path = PROFILE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profile = {"workers": best["jobs"], "threads": best["threads"], "cases_per_hour": best["cases_per_hour"],
+               "peak_rss_mb": best["peak_rss_mb"], "node_count": node_count, "cores": cores,
+               "timestamp": datetime.now().isoformat(), "trials": trials}
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+
+def load_profile(path: Path = PROFILE_FILE) -> Optional[Dict]:
+    """Benchmarked {workers, threads} for this machine, or None if not tuned yet."""
+    if not Path(path).exists():
+        return None
+    with open(path) as f:
+        profile = json.load(f)
+    return {"workers": profile["workers"], "threads": profile["threads"]}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark concurrent ccx jobs × threads per job")
+    parser.add_argument("--jobs", type=int, nargs="+", default=None, help="Concurrent job counts to try")
+    parser.add_argument("--threads", type=int, nargs="+", default=None, help="Threads per job to try")
+    parser.add_argument("--cores", type=int, default=None, help="Core budget (default: usable cores)")
+    parser.add_argument("--rounds", type=int, default=2, help="Cases per slot in each trial")
+    parser.add_argument("--case-dir", type=Path, default=None,
+                        help="Existing rendered case to benchmark (default: render the reference case)")
+    parser.add_argument("--profile", type=Path, default=PROFILE_FILE, help="Profile file to write")
+    parser.add_argument("--show", action="store_true", help="Print the current profile")
+    args = parser.parse_args()
+
+    if args.show:
+        if not args.profile.exists():
+            print(f"No profile at {args.profile}")
+            return
+        with open(args.profile) as f:
+            profile = json.load(f)
+        print(f"{profile['workers']} worker(s) × {profile['threads']} thread(s): "
+              f"{profile['cases_per_hour']:.1f} cases/h ({profile['node_count']} nodes, {profile['cores']} cores, "
+              f"{profile['timestamp']})")
+        return
+
+    cores = args.cores or available_cores()
+    grid = default_grid(cores)
+    if args.jobs or args.threads:
+        jobs = args.jobs or sorted({j for j, _ in grid})
+        threads = args.threads or sorted({t for _, t in grid})
+        grid = [(j, t) for j in jobs for t in threads if j * t <= cores]
+
+    from run_killshot_campaign import find_ccx
+    ccx = find_ccx()
+    case_dir = args.case_dir or render_reference(BENCH_DIR)
+    node_count = count_deck_nodes(case_dir)
+    print(f"Autotune: {ccx}, {node_count} nodes, {cores} cores, {len(grid)} configurations × "
+          f"{args.rounds} round(s)")
+    trials = benchmark(ccx, case_dir, grid, rounds=args.rounds, cores=cores)
+
+    best = best_config(trials)
+    if best is None:
+        print("\n❌ No configuration solved every case; profile not written")
+        return
+    save_profile(best, trials, node_count, cores, args.profile)
+    print(f"\n✅ Best: {best['jobs']} worker(s) × {best['threads']} thread(s) = "
+          f"{best['cases_per_hour']:.1f} cases/h -> {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+BOOTSTRAP — Confidence intervals for mean, CV and the variance-ratio headline
+================================================================================
+
+compute_variance_ratio divided two point-estimate CVs and printed "122×"
+without uncertainty, although the chaos zone has only 21 cases. This module
+puts intervals on those numbers:
+
+    mean, std, cv        one sample (percentile and BCa intervals)
+    ratio                stat(chaos) / stat(stable), two independent samples
+
+Resampling is vectorized. B resamples are drawn as (chunk × n) index
+matrices, with the chunk sized so that one matrix holds at most
+MAX_CHUNK_ELEMENTS entries, so memory stays bounded for any B (10^6
+resamples of a 100-case zone take a few seconds). Each replicate only needs
+the resample's sum and sum of squares, computed on values centred at the
+sample mean to avoid cancellation for low-CV zones.
+
+BCa (bias-corrected and accelerated, Efron 1987) adjusts the percentile
+interval by the bias z0 = Φ⁻¹(share of replicates below the estimate) and
+the acceleration a from the jackknife. The leave-one-out sums are closed
+form, so the jackknife is O(n). For the two-sample ratio, the jackknife
+runs over both samples.
+
+Usage:
+    python3 scripts/bootstrap.py                      # Stable/chaos CV and ratio CIs
+    python3 scripts/bootstrap.py --resamples 1000000  # 10^6 resamples
+    python3 scripts/analyze_raw_data.py --resamples 100000
+
+================================================================================
+"""
+
+import time
+import numpy as np
+from scipy.stats import norm
+from typing import Dict, Optional, Sequence
+
+DEFAULT_RESAMPLES = 100_000
+
+# Largest (chunk × n) resample matrix drawn at once (~32 MB of indices)
+MAX_CHUNK_ELEMENTS = 1 << 22
+
+DEFAULT_ALPHA = 0.05
+
+
+def _from_moments(stat: str, s: np.ndarray, q: np.ndarray, n, center: float) -> np.ndarray:
+    """Statistic from sums s and sums of squares q of centred values (n per sample)."""
+    mean = s / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.maximum(q - n * mean ** 2, 0.0) / (n - 1)
+        if stat == "mean":
+            return mean + center
+        if stat == "std":
+            return np.sqrt(var)
+        if stat == "cv":
+            return np.sqrt(var) / (mean + center) * 100
+    raise ValueError(f"Unknown statistic {stat!r} (mean, std, cv)")
+
+
+def statistic(x: Sequence[float], stat: str = "cv") -> float:
+    """Point estimate with the same definitions as compute_statistics (ddof=1, CV in %)."""
+    x = np.asarray(x, dtype=np.float64)
+    c = x.mean()
+    y = x - c
+    return float(_from_moments(stat, y.sum(), y @ y, len(x), c))
+
+
+def replicates(x: Sequence[float], stat: str = "cv", resamples: int = DEFAULT_RESAMPLES,
+               rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Bootstrap replicates of stat, drawn in chunks of at most MAX_CHUNK_ELEMENTS indices."""
+    x = np.asarray(x, dtype=np.float64)
+    rng = rng or np.random.default_rng(0)
+    n = len(x)
+    c = x.mean()
+    y = x - c
+    out = np.empty(resamples)
+    chunk = max(1, MAX_CHUNK_ELEMENTS // max(n, 1))
+    for start in range(0, resamples, chunk):
+        m = min(chunk, resamples - start)
+        ys = y[rng.integers(0, n, size=(m, n))]
+        out[start:start + m] = _from_moments(stat, ys.sum(axis=1), np.einsum("ij,ij->i", ys, ys), n, c)
+    return out
+
+
+def _jackknife(x: np.ndarray, stat: str) -> np.ndarray:
+    """Leave-one-out values of stat, from closed-form leave-one-out sums."""
+    n = len(x)
+    c = x.mean()
+    y = x - c
+    s, q = y.sum() - y, (y @ y) - y ** 2
+    return _from_moments(stat, s, q, n - 1, c)
+
+
+def _acceleration(jack: np.ndarray) -> float:
+    d = jack.mean() - jack
+    denom = 6.0 * np.sum(d ** 2) ** 1.5
+    return float(np.sum(d ** 3) / denom) if denom > 0 else 0.0
+
+
+def _intervals(estimate: float, reps: np.ndarray, accel: float, alpha: float) -> Dict:
+    reps = reps[np.isfinite(reps)]
+    lo_q, hi_q = alpha / 2, 1 - alpha / 2
+    percentile = np.quantile(reps, [lo_q, hi_q])
+    # Share of replicates below the estimate (ties count half)
+    below = (np.sum(reps < estimate) + 0.5 * np.sum(reps == estimate)) / len(reps)
+    z0 = norm.ppf(np.clip(below, 1 / len(reps), 1 - 1 / len(reps)))
+    z = norm.ppf([lo_q, hi_q])
+    adjusted = norm.cdf(z0 + (z0 + z) / (1 - accel * (z0 + z)))
+    bca = np.quantile(reps, adjusted)
+    return {"estimate": estimate, "alpha": alpha, "resamples": len(reps),
+            "percentile": (float(percentile[0]), float(percentile[1])),
+            "bca": (float(bca[0]), float(bca[1])),
+            "z0": float(z0), "acceleration": accel, "se": float(np.std(reps, ddof=1))}
+
+
+def bootstrap_ci(x: Sequence[float], stat: str = "cv", resamples: int = DEFAULT_RESAMPLES,
+                 alpha: float = DEFAULT_ALPHA, seed: int = 0) -> Dict:
+    """Percentile and BCa intervals of stat for one sample."""
+    x = np.asarray(x, dtype=np.float64)
+    reps = replicates(x, stat, resamples, np.random.default_rng(seed))
+    return _intervals(statistic(x, stat), reps, _acceleration(_jackknife(x, stat)), alpha)
+
+
+def ratio_ci(denominator: Sequence[float], numerator: Sequence[float], stat: str = "cv",
+             resamples: int = DEFAULT_RESAMPLES, alpha: float = DEFAULT_ALPHA, seed: int = 0) -> Dict:
+    """Percentile and BCa intervals of stat(numerator) / stat(denominator), resampling each independently."""
+    x = np.asarray(denominator, dtype=np.float64)
+    y = np.asarray(numerator, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        reps = replicates(y, stat, resamples, rng) / replicates(x, stat, resamples, rng)
+        sx, sy = statistic(x, stat), statistic(y, stat)
+        jack = np.concatenate([sy / _jackknife(x, stat), _jackknife(y, stat) / sx])
+    return _intervals(sy / sx, reps, _acceleration(jack[np.isfinite(jack)]), alpha)
+
+
+def format_ci(ci: Dict, fmt: str = ".2f", method: str = "bca") -> str:
+    lo, hi = ci[method]
+    return f"[{lo:{fmt}}, {hi:{fmt}}]"
+
+
+def main():
+    import argparse
+    from analyze_raw_data import load_json
+    parser = argparse.ArgumentParser(description="Bootstrap CIs for the stable/chaos CV and variance ratio")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES, help="Bootstrap resamples")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="1 - confidence level")
+    parser.add_argument("--seed", type=int, default=0, help="Resampling seed")
+    args = parser.parse_args()
+
+    stable = [c.get('W_pv_nm', 0) for c in load_json("kazi_mc_stable_v3.json") if c.get('status') == 'success']
+    chaos = [c.get('W_pv_nm', 0) for c in load_json("kazi_boundary_mc.json")]
+    level = f"{(1 - args.alpha) * 100:g}%"
+
+    print(f"\n{'Quantity':<22} {'Estimate':>14} {level + ' BCa':>26} {level + ' percentile':>26}")
+    print("-" * 92)
+    start = time.monotonic()
+    for label, x in (("Stable", stable), ("Chaos", chaos)):
+        for stat in ("mean", "cv"):
+            ci = bootstrap_ci(x, stat, args.resamples, args.alpha, args.seed)
+            print(f"{label + ' ' + stat + ' (n=' + str(len(x)) + ')':<22} {ci['estimate']:>14.2f} "
+                  f"{format_ci(ci):>26} {format_ci(ci, method='percentile'):>26}")
+    ci = ratio_ci(stable, chaos, "cv", args.resamples, args.alpha, args.seed)
+    print(f"{'CV ratio chaos/stable':<22} {ci['estimate']:>14.1f} {format_ci(ci, '.1f'):>26} "
+          f"{format_ci(ci, '.1f', 'percentile'):>26}")
+    print(f"\n{args.resamples:,} resamples per interval, {time.monotonic() - start:.1f}s total")
+
+
+if __name__ == "__main__":
+    main()
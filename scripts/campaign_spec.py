@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+CAMPAIGN SPECS — Declarative campaigns compiled into one deduplicated case plan
+================================================================================
+
+The kill shot campaigns each hardcode the same base parameters and draw their
+own Monte Carlo cases, so physically identical cases (e.g. the silicon
+k_azi=0.8 scan cases of the harmonic, cliff mapping and chaos zone campaigns)
+are solved once per campaign.
+
+Here campaigns are JSON specs (configs/campaigns/killshot.json):
+
+    base        parameters shared by every campaign
+    zones       k_azi → zone label, available as {zone} in group names
+    campaigns   name, title, output file, fixed params, sweep axes (full
+                factorial, in listed order), group name template and the
+                Monte Carlo settings {n_cases, design, independent}
+
+Compilation:
+
+1. Every axis combination is a group. Its MC cases are drawn from per-case
+   streams (mc_design.MCSeeder) keyed by the canonical group parameters,
+   not by the campaign, so case i of a group is the same case in every
+   campaign that requests it. (iid and Sobol draws are prefix-stable: a
+   5-case batch is the first five cases of a 50-case batch. Latin
+   hypercubes are not.) A campaign whose cases must be new draws rather
+   than the ones other campaigns already solved (silicon_cliff_mc: "50
+   additional cases") sets "independent": true, which keys its streams by
+   the campaign name as well.
+2. Cases are keyed by a hash of their canonical parameters (generator
+   defaults filled in, floats rounded), and each unique case is solved once.
+3. The plan is ordered longest-predicted-first (LPT) with the runtime model,
+   so the largest meshes never end up as the stragglers of a campaign.
+4. After solving, each campaign's output file is reassembled from the shared
+   solved cases in the legacy {group: {stats, cases}} layout. A shared case
+   therefore appears in several output files under the same plan_<key>
+   case_id; the corpus loaders count each case_id once.
+
+Solved cases are kept in a JSONL file in the work_queue.py results format,
+so a plan can be solved locally (resuming where it stopped) or exported as a
+case list for the distributed coordinator and reassembled from its output.
+
+Usage:
+    python3 scripts/run_killshot_campaign.py --spec configs/campaigns/killshot.json
+    python3 scripts/run_killshot_campaign.py --spec configs/campaigns/killshot.json --export-plan cases.json
+    python3 scripts/run_killshot_campaign.py --spec configs/campaigns/killshot.json --plan-results results.jsonl
+    python3 scripts/campaign_spec.py configs/campaigns/killshot.json   # Plan summary
+
+================================================================================
+"""
+
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from mc_design import MCSeeder, draw_mc_cases
+
+SPEC_FILE = Path(__file__).parent.parent / "configs" / "campaigns" / "killshot.json"
+
+# Generator defaults, filled in before hashing so explicit and implicit defaults match
+CANONICAL_DEFAULTS = {"n_harmonic": 2, "material": "silicon"}
+
+# Significant digits kept when hashing float parameters
+KEY_DIGITS = 12
+
+# Root of the per-case MC streams of every plan
+PLAN_SEEDER = MCSeeder(0, "case_plan")
+
+
+def canonical(params: Dict) -> Dict:
+    """Parameters with generator defaults filled in and floats rounded."""
+    out = {**CANONICAL_DEFAULTS, **params}
+    return {k: float(f"{v:.{KEY_DIGITS}g}") if isinstance(v, float) else v for k, v in sorted(out.items())}
+
+
+def case_key(params: Dict) -> str:
+    """Content hash identifying a physically distinct case."""
+    blob = json.dumps(canonical(params), sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def load_specs(path: Path = SPEC_FILE, names: Optional[List[str]] = None) -> List[Dict]:
+    """Campaign specs of a spec file with the shared base merged in."""
+    with open(path) as f:
+        doc = json.load(f)
+    specs = []
+    for spec in doc["campaigns"]:
+        if names and spec["name"] not in names:
+            continue
+        specs.append({**spec, "base": {**doc.get("base", {}), **spec.get("params", {})},
+                      "zones": {**doc.get("zones", {}), **spec.get("zones", {})}})
+    if names:
+        missing = set(names) - {s["name"] for s in specs}
+        if missing:
+            raise ValueError(f"Unknown campaign(s) in {path}: {sorted(missing)}")
+    return specs
+
+
+def _slug(value) -> str:
+    return str(value).replace(".", "p").replace("-", "m")
+
+
+def expand(spec: Dict) -> List[Dict]:
+    """Groups of a campaign (one per axis combination) with their (key, params) cases."""
+    axes = spec.get("axes", {})
+    mc = spec.get("mc")
+    groups = []
+    for combo in itertools.product(*axes.values()):
+        values = dict(zip(axes, combo))
+        params = {**spec["base"], **values}
+        zone = spec["zones"].get(str(params.get("k_azi")), f"k{_slug(params.get('k_azi'))}")
+        name = spec.get("group", "").format(zone=zone, **values) if axes else None
+        if mc:
+            design = mc.get("design", "iid")
+            stream = {"_design": design, **({"_campaign": spec["name"]} if mc.get("independent") else {})}
+            batch = case_key({**params, **stream})
+            draws = draw_mc_cases(batch, mc["n_cases"], params, PLAN_SEEDER, design=design)
+            cases = [(case_key(p), p) for _, p in draws]
+        else:
+            cases = [(case_key(params), params)]
+        groups.append({"name": name, "axes": values, "params": params, "cases": cases})
+    return groups
+
+
+class CasePlan:
+    """The deduplicated union of the cases requested by a set of campaign specs."""
+
+    def __init__(self, specs: List[Dict], overrides: Optional[Dict] = None):
+        self.specs = specs
+        self.groups: Dict[str, List[Dict]] = {}
+        self.cases: Dict[str, Dict] = {}
+        self.n_requested = 0
+        for spec in specs:
+            if overrides:
+                spec = {**spec, "base": {**spec["base"], **overrides}}
+            self.groups[spec["name"]] = expand(spec)
+            for group in self.groups[spec["name"]]:
+                for key, params in group["cases"]:
+                    self.n_requested += 1
+                    case = self.cases.setdefault(key, {"case_id": f"plan_{key}", "key": key,
+                                                       "params": params, "campaigns": []})
+                    if spec["name"] not in case["campaigns"]:
+                        case["campaigns"].append(spec["name"])
+
+    @property
+    def n_shared(self) -> int:
+        """Unique cases requested by more than one campaign."""
+        return sum(1 for c in self.cases.values() if len(c["campaigns"]) > 1)
+
+    def ordered(self, predict: Callable[[Dict], float]) -> List[Dict]:
+        """Unique cases, longest predicted solve first (ties keep spec order)."""
+        for case in self.cases.values():
+            case["predicted_s"] = predict(case["params"])
+        return sorted(self.cases.values(), key=lambda c: -c["predicted_s"])
+
+    def queue(self, predict: Callable[[Dict], float], campaign: str = "case_plan") -> List[Dict]:
+        """Case list for work_queue.py, in LPT order."""
+        return [{"case_id": c["case_id"], "campaign": campaign, "params": c["params"]}
+                for c in self.ordered(predict)]
+
+    def reassemble(self, name: str, solved: Dict[str, Dict], stats: Callable[[List[Dict]], Dict]) -> Dict:
+        """
+        Output of one campaign from the shared solved cases: {stats, cases}
+        without axes, else {group: {stats, cases, **axis values}}. Cases that
+        failed or are not solved yet are left out of their group.
+        """
+        output = {}
+        for group in self.groups[name]:
+            results = [dict(solved[f"plan_{key}"]) for key, _ in group["cases"] if f"plan_{key}" in solved]
+            entry = {"stats": stats(results), "cases": results}
+            if group["name"] is None:
+                return entry
+            output[group["name"]] = {**entry, **group["axes"]}
+        return output
+
+
+def load_solved(path: Path) -> Dict[str, Dict]:
+    """Successful results of a plan results JSONL (work_queue.py format), by case_id."""
+    solved = {}
+    if not Path(path).exists():
+        return solved
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if rec.get("ok") and rec.get("result"):
+                solved[rec["case_id"]] = rec["result"]
+    return solved
+
+
+def append_solved(path: Path, case_id: str, result: Optional[Dict], failure: Optional[str] = None,
+                  worker: str = "local"):
+    """Append one solve to a plan results JSONL."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps({"case_id": case_id, "ok": result is not None, "worker": worker,
+                            "failure": failure, "result": result}, default=str) + "\n")
+
+
+def main():
+    import argparse
+    from runtime_model import RuntimeModel, estimate_nodes
+    parser = argparse.ArgumentParser(description="Compile campaign specs into a deduplicated case plan")
+    parser.add_argument("spec", type=Path, nargs="?", default=SPEC_FILE, help="Campaign spec JSON")
+    parser.add_argument("--only", nargs="+", default=None, help="Campaign names to include")
+    args = parser.parse_args()
+
+    plan = CasePlan(load_specs(args.spec, args.only))
+    model = RuntimeModel.from_history()
+    ordered = plan.ordered(lambda p: model.predict(estimate_nodes(p)))
+
+    print(f"\n{'Campaign':<26} {'Groups':>7} {'Cases':>7} {'Shared':>7}")
+    print("-" * 50)
+    for name, groups in plan.groups.items():
+        keys = {key for g in groups for key, _ in g["cases"]}
+        shared = sum(1 for k in keys if len(plan.cases[k]["campaigns"]) > 1)
+        print(f"{name:<26} {len(groups):>7} {sum(len(g['cases']) for g in groups):>7} {shared:>7}")
+    print("-" * 50)
+    total = sum(c["predicted_s"] for c in ordered)
+    print(f"{plan.n_requested} cases requested, {len(plan.cases)} unique "
+          f"({plan.n_requested - len(plan.cases)} deduplicated), predicted {total/60:.1f} min serial")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+CASE STORE — Every raw and local case in one typed, memory-mapped column set
+================================================================================
+
+The files in 04_DATA/raw use incompatible shapes (nested inputs/metrics,
+load_mode vs load, flat records, per-file special cases), so every analysis
+re-parses and re-normalizes JSON. The store ingests every case record of
+04_DATA/raw and 04_DATA/local_verified once, through
+analyze_raw_data.case_fields (and its per-file parse cache), into one column
+per field:
+
+    04_DATA/case_store/
+        meta.json          row count, column dtypes, category tables and the
+                           size/mtime of every source file
+        <column>.npy       one array per column, opened with mmap_mode="r"
+
+Column types:
+
+    float64     k_azi, k_azi_base, k_edge, stiffness_scale, bow_um, W_pv_nm,
+                W_exposure_max_nm, solver_time_s       (NaN = missing)
+    int32       n_harmonic, n_radial, node_count, seed (-1 = missing)
+    int16       source, load, material, pattern, element_type, thermal_bc,
+                status, status_raw, exclusion         (codes into meta.json)
+    bool        in_corpus   (the cases iter_corpus_cases yields: first
+                             occurrence of each case_id)
+    <U64        case_id
+
+status is canonical (success / failed / pending); status_raw is the string
+the record carried ("", "pass", "FAIL", "submitted", ...).
+
+Failed and excluded records are kept (exclusion says why), so queries can
+select them too; `in_corpus` reproduces the analysis corpus exactly.
+
+Indexes (04_DATA/case_store/index/) answer predicates without a scan:
+
+    <col>.sorted / <col>.order     values in sorted order and their row ids,
+                                   for range predicates by binary search
+                                   (SORTED_INDEX_COLUMNS)
+    <col>.offsets / <col>.rows     row ids of every category, CSR layout,
+                                   for equality predicates (category columns)
+
+The store is rebuilt atomically (written to a temporary directory, then
+renamed) and load_store() rebuilds it when a source file has changed.
+
+Usage:
+    python3 scripts/case_store.py --build     # (Re)build 04_DATA/case_store
+    python3 scripts/case_store.py             # Summary of the store
+
+    from case_store import load_store
+    store = load_store()
+    m = store.mask(material="silicon", load="scan") & store["in_corpus"]
+    w = store["W_pv_nm"][m]
+
+================================================================================
+"""
+
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from analyze_raw_data import (CASE_FLOAT_FIELDS, CASE_INT_FIELDS, CASE_TEXT_FIELDS, DATA_DIR,
+                              LOCAL_DATA_DIR, load_case_columns)
+
+STORE_DIR = Path(__file__).parent.parent / "04_DATA" / "case_store"
+
+CATEGORY_COLUMNS = ("source",) + tuple(k for k in CASE_TEXT_FIELDS if k != "case_id")
+CASE_ID_DTYPE = "<U64"
+
+# Bumped when the on-disk layout changes, so older stores are rebuilt
+STORE_VERSION = 4
+
+# Columns with a persisted sorted index (range predicates); category columns
+# all get a row-list index (equality predicates)
+SORTED_INDEX_COLUMNS = ("k_azi", "k_azi_base", "n_harmonic", "n_radial", "node_count", "W_pv_nm")
+
+
+def _source_files(dirs) -> Dict[str, Dict]:
+    files = {}
+    for d in dirs:
+        for path in sorted(Path(d).glob("*.json")):
+            st = path.stat()
+            files[str(path)] = {"size": st.st_size, "mtime": st.st_mtime}
+    return files
+
+
+def _write_indexes(index_dir: Path, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]):
+    """Sorted (values, row order) pairs and per-category row lists (CSR offsets + rows)."""
+    index_dir.mkdir()
+    for name in SORTED_INDEX_COLUMNS:
+        order = np.argsort(columns[name], kind="stable")
+        np.save(index_dir / f"{name}.order.npy", order.astype(np.int64))
+        np.save(index_dir / f"{name}.sorted.npy", columns[name][order])
+    for name in CATEGORY_COLUMNS:
+        codes = columns[name]
+        order = np.argsort(codes, kind="stable")
+        offsets = np.searchsorted(codes[order], np.arange(len(categories[name]) + 1))
+        np.save(index_dir / f"{name}.rows.npy", order.astype(np.int64))
+        np.save(index_dir / f"{name}.offsets.npy", offsets.astype(np.int64))
+
+
+def build_store(dirs=(DATA_DIR, LOCAL_DATA_DIR), out: Path = STORE_DIR) -> Dict:
+    """Normalize every case record of dirs into column files under out; returns the metadata."""
+    out = Path(out)
+    files = _source_files(dirs)
+    parts: List[Dict[str, np.ndarray]] = []
+    for name in files:
+        try:
+            cols = load_case_columns(Path(name))
+        except (OSError, ValueError):
+            continue
+        parts.append({**cols, "source": np.full(len(cols["case_id"]), Path(name).name)})
+    joined = {k: np.concatenate([p[k] for p in parts]) if parts else np.array([])
+              for k in CASE_FLOAT_FIELDS + CASE_INT_FIELDS + CASE_TEXT_FIELDS + ("source",)}
+
+    # A case solved once for several campaigns is in each of their output
+    # files; like iter_corpus_cases, only its first occurrence is in the corpus
+    corpus_rows = np.flatnonzero(joined["exclusion"] == "")
+    _, first = np.unique(joined["case_id"][corpus_rows], return_index=True)
+    in_corpus = np.zeros(len(joined["case_id"]), dtype=bool)
+    in_corpus[corpus_rows[first]] = True
+    columns = {"case_id": joined["case_id"].astype(CASE_ID_DTYPE), "in_corpus": in_corpus}
+    for name in CASE_FLOAT_FIELDS:
+        columns[name] = joined[name].astype(np.float64)
+    for name in CASE_INT_FIELDS:
+        columns[name] = joined[name].astype(np.int32)
+    categories = {}
+    for name in CATEGORY_COLUMNS:
+        table, codes = np.unique(joined[name].astype(str), return_inverse=True)
+        categories[name] = table.tolist()
+        columns[name] = codes.astype(np.int16)
+
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(tmp / f"{name}.npy", values)
+    _write_indexes(tmp / "index", columns, categories)
+    meta = {"version": STORE_VERSION, "n_rows": len(columns["case_id"]), "columns": {k: str(v.dtype) for k, v in columns.items()},
+            "categories": categories, "sources": files}
+    with open(tmp / "meta.json", 'w') as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(out, ignore_errors=True)
+    tmp.rename(out)
+    return meta
+
+
+class CaseStore:
+    """Read-only view of a built store; columns are memory-mapped on first access."""
+
+    def __init__(self, path: Path = STORE_DIR):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        self.categories: Dict[str, List[str]] = self.meta["categories"]
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.meta["n_rows"]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta["columns"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            if name not in self.meta["columns"]:
+                raise KeyError(f"No column {name!r} in {self.path}")
+            self._columns[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        return self._columns[name]
+
+    def code(self, column: str, value: str) -> int:
+        """Category code of value in column, or -1 if it never occurs."""
+        try:
+            return self.categories[column].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, column: str, codes: Optional[np.ndarray] = None) -> np.ndarray:
+        """String values of a category column (or of the given codes)."""
+        table = np.array(self.categories[column], dtype=object)
+        return table[self[column] if codes is None else codes]
+
+    def mask(self, **equals) -> np.ndarray:
+        """Rows where every column equals its value (category columns take the string value)."""
+        m = np.ones(len(self), dtype=bool)
+        for column, value in equals.items():
+            if column in self.categories:
+                value = self.code(column, value)
+            m &= np.asarray(self[column] == value)
+        return m
+
+    def _index(self, name: str) -> np.ndarray:
+        key = f"index/{name}"
+        if key not in self._columns:
+            self._columns[key] = np.load(self.path / "index" / f"{name}.npy", mmap_mode="r")
+        return self._columns[key]
+
+    def rows_in_range(self, column: str, lo: float = -np.inf, hi: float = np.inf,
+                      lo_inclusive: bool = True, hi_inclusive: bool = True) -> np.ndarray:
+        """Sorted row ids with lo ≤ column ≤ hi (or strict), by binary search on the sorted index."""
+        if column not in SORTED_INDEX_COLUMNS:
+            raise KeyError(f"No sorted index on {column!r} (indexed: {', '.join(SORTED_INDEX_COLUMNS)})")
+        values = self._index(f"{column}.sorted")
+        start = np.searchsorted(values, lo, side="left" if lo_inclusive else "right")
+        stop = np.searchsorted(values, hi, side="right" if hi_inclusive else "left")
+        return np.sort(self._index(f"{column}.order")[start:max(start, stop)])
+
+    def rows_equal(self, column: str, values) -> np.ndarray:
+        """Sorted row ids where column equals any of values (category names match case-insensitively)."""
+        values = [values] if isinstance(values, (str, int, float)) else list(values)
+        if column in self.categories:
+            lookup = {v.lower(): i for i, v in enumerate(self.categories[column])}
+            rows, offsets = self._index(f"{column}.rows"), self._index(f"{column}.offsets")
+            parts = [rows[offsets[c]:offsets[c + 1]] for c in
+                     (lookup.get(str(v).lower()) for v in values) if c is not None]
+            return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        parts = [self.rows_in_range(column, float(v), float(v)) for v in values]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def is_stale(self, dirs=(DATA_DIR, LOCAL_DATA_DIR)) -> bool:
+        """True when a source file was added, removed or changed since the build (or the layout is old)."""
+        if self.meta.get("version") != STORE_VERSION:
+            return True
+        current = _source_files(dirs)
+        built = self.meta["sources"]
+        if current.keys() != built.keys():
+            return True
+        return any(current[k]["size"] != built[k]["size"] or current[k]["mtime"] != built[k]["mtime"]
+                   for k in current)
+
+
+def load_store(path: Path = STORE_DIR, auto_build: bool = True, dirs=(DATA_DIR, LOCAL_DATA_DIR)) -> CaseStore:
+    """The case store, built (or rebuilt when stale) first if auto_build."""
+    path = Path(path)
+    if auto_build and (not (path / "meta.json").exists() or CaseStore(path).is_stale(dirs)):
+        build_store(dirs, path)
+    return CaseStore(path)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or inspect the columnar case store")
+    parser.add_argument("--build", action="store_true", help="Rebuild the store from the JSON files")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="Store directory")
+    args = parser.parse_args()
+
+    if args.build:
+        meta = build_store(out=args.store)
+        print(f"✅ {meta['n_rows']} cases from {len(meta['sources'])} files -> {args.store}")
+    store = load_store(args.store)
+
+    print(f"\n{'Source':<45} {'Cases':>6} {'Corpus':>7}")
+    print("-" * 60)
+    source, corpus = store["source"], store["in_corpus"]
+    for code, name in enumerate(store.categories["source"]):
+        m = source == code
+        print(f"{name:<45} {int(m.sum()):>6} {int(corpus[m].sum()):>7}")
+    print("-" * 60)
+    print(f"{'Total':<45} {len(store):>6} {int(corpus.sum()):>7}")
+    excluded = store.decode("exclusion")[~np.asarray(corpus)]
+    if len(excluded):
+        reasons, counts = np.unique(excluded.astype(str), return_counts=True)
+        print("Excluded: " + ", ".join(f"{r} {c}" for r, c in zip(reasons, counts)))
+
+
+if __name__ == "__main__":
+    main()
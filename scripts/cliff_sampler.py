@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+ADAPTIVE CLIFF SAMPLER — Concentrate Monte Carlo solves near the transition
+================================================================================
+
+The fixed cliff-mapping grid spends 10 MC solves at each of seven k_azi values,
+most of them far from the transition. This sampler starts from a coarse grid,
+estimates the mean/CV curve and the uncertainty of each CV, and spends every
+further batch where it matters:
+
+- a new k_azi level at the midpoint of the interval with the largest CV jump
+  (plus uncertainty), which is where the cliff is, and
+- extra replicates at a bracketing level whose CV confidence band still
+  straddles the threshold, so the bracket is not decided by noise.
+
+The cliff is located where the CV first crosses cv_threshold (5% — the
+manufacturing threshold used throughout the campaigns). Sampling stops once
+the crossing is bracketed by two levels closer than the tolerance and on
+opposite sides of the threshold with confidence, or when the solve budget is
+spent.
+
+The sampler knows nothing about CalculiX: it calls solve(k_azi, n_cases) and
+expects a list of W_pv values back.
+
+================================================================================
+"""
+
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def cv_standard_error(cv: float, n: int) -> float:
+    """Approximate standard error of a sample CV (normal data, McKay)."""
+    if n < 2:
+        return np.inf
+    return cv * np.sqrt(1.0 / (2 * (n - 1)) + cv ** 2 / n)
+
+
+class AdaptiveCliffSampler:
+    """Locate the k_azi cliff with as few solves as possible."""
+
+    def __init__(self, solve: Callable[[float, int], List[float]],
+                 k_min: float = 0.6, k_max: float = 0.9, tol: float = 0.01,
+                 n_initial_levels: int = 4, cases_per_level: int = 5,
+                 cv_threshold: float = 0.05, z: float = 1.96, max_solves: int = 70):
+        self.solve = solve
+        self.k_min = k_min
+        self.k_max = k_max
+        self.tol = tol
+        self.n_initial_levels = n_initial_levels
+        self.cases_per_level = cases_per_level
+        self.cv_threshold = cv_threshold
+        self.z = z
+        self.max_solves = max_solves
+        self.samples: Dict[float, List[float]] = {}
+        self.history: List[Dict] = []
+
+    @property
+    def n_solves(self) -> int:
+        return sum(len(v) for v in self.samples.values())
+
+    def _run(self, k_azi: float, n: int, reason: str):
+        k_azi = round(float(k_azi), 6)
+        n = min(n, self.max_solves - self.n_solves)
+        if n <= 0:
+            return
+        values = list(self.solve(k_azi, n))
+        self.samples.setdefault(k_azi, []).extend(values)
+        self.history.append({"k_azi": k_azi, "n_requested": n, "n_returned": len(values),
+                             "reason": reason})
+
+    def curve(self) -> List[Dict]:
+        """Mean, CV and CV standard error per level, sorted by k_azi."""
+        rows = []
+        for k in sorted(self.samples):
+            arr = np.asarray(self.samples[k], dtype=float)
+            n = len(arr)
+            mean = float(arr.mean()) if n else np.nan
+            cv = float(arr.std(ddof=1) / mean) if n > 1 and mean != 0 else np.nan
+            rows.append({"k_azi": k, "n": n, "mean": mean, "cv": cv,
+                         "cv_se": cv_standard_error(cv, n) if np.isfinite(cv) else np.inf})
+        return rows
+
+    def _side(self, row: Dict) -> int:
+        """-1 confidently stable, +1 confidently past the cliff, 0 undecided."""
+        if not np.isfinite(row["cv"]):
+            return 0
+        if row["cv"] + self.z * row["cv_se"] < self.cv_threshold:
+            return -1
+        if row["cv"] - self.z * row["cv_se"] > self.cv_threshold:
+            return 1
+        return 0
+
+    def bracket(self) -> Optional[Tuple[Dict, Dict]]:
+        """Adjacent levels whose point CVs straddle the threshold (first crossing)."""
+        rows = [r for r in self.curve() if np.isfinite(r["cv"])]
+        for lo, hi in zip(rows, rows[1:]):
+            if lo["cv"] < self.cv_threshold <= hi["cv"]:
+                return lo, hi
+        return None
+
+    def _next_action(self) -> Optional[Tuple[float, int, str]]:
+        rows = [r for r in self.curve() if np.isfinite(r["cv"])]
+        br = self.bracket()
+        if br is not None:
+            lo, hi = br
+            # Resolve ambiguous bracket ends before splitting further
+            for end in (lo, hi):
+                if self._side(end) == 0:
+                    return end["k_azi"], self.cases_per_level, "replicate (CV band straddles threshold)"
+            if hi["k_azi"] - lo["k_azi"] <= self.tol:
+                return None
+            return (lo["k_azi"] + hi["k_azi"]) / 2, self.cases_per_level, "bisect bracket"
+
+        if len(rows) < 2:
+            return None
+        # No crossing seen yet: split the interval with the largest CV jump + uncertainty
+        scores = []
+        for lo, hi in zip(rows, rows[1:]):
+            if hi["k_azi"] - lo["k_azi"] <= self.tol:
+                continue
+            jump = abs(hi["cv"] - lo["cv"])
+            unc = self.z * (min(lo["cv_se"], 1e3) + min(hi["cv_se"], 1e3))
+            scores.append((jump + unc, lo, hi))
+        if not scores:
+            return None
+        _, lo, hi = max(scores, key=lambda s: s[0])
+        return (lo["k_azi"] + hi["k_azi"]) / 2, self.cases_per_level, "largest CV gradient/uncertainty"
+
+    def run(self) -> Dict:
+        """Sample until the cliff is bracketed to tol or the budget is spent."""
+        for k in np.linspace(self.k_min, self.k_max, self.n_initial_levels):
+            self._run(k, self.cases_per_level, "initial grid")
+
+        while self.n_solves < self.max_solves:
+            action = self._next_action()
+            if action is None:
+                break
+            before = self.n_solves
+            self._run(*action)
+            if self.n_solves == before:
+                break  # solver returned nothing — avoid spinning
+
+        return self.summary()
+
+    def summary(self) -> Dict:
+        br = self.bracket()
+        converged = (br is not None and br[1]["k_azi"] - br[0]["k_azi"] <= self.tol
+                     and self._side(br[0]) == -1 and self._side(br[1]) == 1)
+        out = {
+            "cv_threshold": self.cv_threshold,
+            "tolerance": self.tol,
+            "n_solves": self.n_solves,
+            "n_levels": len(self.samples),
+            "converged": converged,
+            # JSON has no Infinity/NaN: a CV or standard error that cannot be computed yet is null
+            "curve": [{k: None if isinstance(v, float) and not np.isfinite(v) else v for k, v in row.items()}
+                      for row in self.curve()],
+            "history": self.history,
+        }
+        if br is not None:
+            lo, hi = br
+            # Linear interpolation of the threshold crossing inside the bracket
+            frac = (self.cv_threshold - lo["cv"]) / (hi["cv"] - lo["cv"])
+            out["cliff_bracket"] = [lo["k_azi"], hi["k_azi"]]
+            out["cliff_k_azi"] = lo["k_azi"] + frac * (hi["k_azi"] - lo["k_azi"])
+        return out
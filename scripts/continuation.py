@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+CONTINUATION SWEEPS — Warm-start each CalculiX solve from its neighbour
+================================================================================
+
+Near the cliff, Newton-Raphson needs many iterations per increment and shows
+residual spikes (see 04_DATA/logs/solver_convergence_k0.82.log). Every case
+in a sweep also starts from zero displacement, although its neighbour at a
+slightly smaller k_azi (or load scale) has just converged to a nearby state.
+
+This module provides the pieces for a continuation sweep:
+
+1. Order cases by the swept parameter.
+2. Seed each solve with the previous converged displacement field via
+   *INITIAL CONDITIONS, TYPE=DISPLACEMENT (only when the meshes match).
+3. Adapt the initial increment of the *STATIC step when the iteration
+   count grows, and relax it again once the solver recovers.
+4. Count Newton iterations from the .sta file so the savings against cold
+   starts can be reported.
+
+================================================================================
+"""
+
+import re
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+WARM_START_FILE = "warmstart.inp"
+
+
+def read_displacement_field(case_dir: Path) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Read node ids and (Ux, Uy, Uz) from the displacement block of a .dat file.
+
+    Returns (node_ids, U) with U of shape (n, 3), or None if nothing was read.
+    """
+    dat_files = list(Path(case_dir).glob("*.dat"))
+    if not dat_files:
+        return None
+
+    ids, disp = [], []
+    reading = False
+    with open(dat_files[0]) as f:
+        for line in f:
+            if 'displacements' in line.lower():
+                reading = True
+                continue
+            if reading:
+                parts = line.split()
+                if len(parts) == 4:
+                    try:
+                        ids.append(int(parts[0]))
+                        disp.append((float(parts[1]), float(parts[2]), float(parts[3])))
+                    except ValueError:
+                        pass
+                elif len(parts) == 0 or 'total' in line.lower():
+                    if ids:
+                        break
+
+    if not ids:
+        return None
+    return np.array(ids, dtype=np.int64), np.array(disp)
+
+
+def write_initial_conditions(path: Path, node_ids: np.ndarray, disp: np.ndarray):
+    """Write a displacement field as an *INITIAL CONDITIONS include."""
+    with open(path, 'w') as f:
+        f.write("** Warm start: converged displacement field of the previous sweep case\n")
+        f.write("*INITIAL CONDITIONS, TYPE=DISPLACEMENT\n")
+        for nid, u in zip(node_ids, disp):
+            for dof in range(3):
+                if u[dof] != 0.0:
+                    f.write(f"{nid}, {dof + 1}, {u[dof]:.9E}\n")
+
+
+def inject_include_before_step(deck_path: Path, include_name: str):
+    """Insert an *INCLUDE card right before the first *STEP of a deck."""
+    text = Path(deck_path).read_text()
+    card = f"*INCLUDE, INPUT={include_name}\n"
+    if card in text:
+        return
+    m = re.search(r"(?im)^\*STEP\b", text)
+    if not m:
+        raise ValueError(f"No *STEP card in {deck_path}")
+    Path(deck_path).write_text(text[:m.start()] + card + text[m.start():])
+
+
+def set_initial_increment(deck_path: Path, dt: float):
+    """Replace the initial increment (first field after *STATIC) of a deck."""
+    text = Path(deck_path).read_text()
+    m = re.search(r"(?im)^\*STATIC[^\n]*\n([^\n]*)", text)
+    if not m:
+        return
+    fields = [p.strip() for p in m.group(1).split(",")]
+    fields[0] = f"{dt:.4g}"
+    line = ", ".join(fields)
+    Path(deck_path).write_text(text[:m.start(1)] + line + text[m.end(1):])
+
+
+def read_initial_increment(deck_path: Path) -> Optional[float]:
+    """Return the initial increment of the *STATIC step, if present."""
+    m = re.search(r"(?im)^\*STATIC[^\n]*\n\s*([0-9.eE+-]+)", Path(deck_path).read_text())
+    return float(m.group(1)) if m else None
+
+
+def read_iterations(case_dir: Path) -> Optional[int]:
+    """
+    Sum the Newton iterations over all increments from the CalculiX .sta file.
+
+    .sta rows are: STEP INC ATT ITRS TOT-TIME STEP-TIME INC-TIME
+    """
+    sta_files = list(Path(case_dir).glob("*.sta"))
+    if not sta_files:
+        return None
+    total = 0
+    with open(sta_files[0]) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 7 and all(p.isdigit() for p in parts[:4]):
+                total += int(parts[3])
+    return total
+
+
+def apply_warm_start(case_dir: Path, deck_path: Path, prev_case_dir: Path,
+                     expected_nodes: Optional[int] = None) -> bool:
+    """
+    Seed a rendered case with the converged field of a previous case.
+
+    Returns False (cold start) if the previous field is missing or its node
+    count does not match the new mesh.
+    """
+    field = read_displacement_field(prev_case_dir)
+    if field is None:
+        return False
+    node_ids, disp = field
+    if expected_nodes is not None and len(node_ids) != expected_nodes:
+        return False
+    write_initial_conditions(Path(case_dir) / WARM_START_FILE, node_ids, disp)
+    inject_include_before_step(deck_path, WARM_START_FILE)
+    return True
+
+
+class IncrementController:
+    """
+    Adapt the initial *STATIC increment along a continuation sweep.
+
+    When a solve needs noticeably more iterations than the previous one, the
+    next increment is halved; when it needs noticeably fewer, it is grown
+    back towards the deck default.
+
+    dt_default is the deck's own increment (read_initial_increment). When it
+    is not known before the first deck is rendered, leave it None: dt stays
+    None (keep the deck's value) until seed() is called.
+    """
+
+    def __init__(self, dt_default: Optional[float] = None, dt_min: float = 0.0125,
+                 grow: float = 1.5, shrink: float = 0.5, tolerance: float = 0.25):
+        self.dt_default = None
+        self.dt = None
+        self.dt_min = dt_min
+        self.grow = grow
+        self.shrink = shrink
+        self.tolerance = tolerance
+        self.prev_iters = None
+        if dt_default is not None:
+            self.seed(dt_default)
+
+    def seed(self, dt_default: float):
+        """Set the deck's initial increment as the default (and upper bound) of dt."""
+        self.dt_default = self.dt = dt_default
+        self.dt_min = min(self.dt_min, dt_default)
+
+    def update(self, iterations: Optional[int]) -> Optional[float]:
+        """Feed the iteration count of the last solve; return the next increment."""
+        if iterations is None or self.dt is None:
+            return self.dt
+        if self.prev_iters is not None:
+            if iterations > self.prev_iters * (1 + self.tolerance):
+                self.dt = max(self.dt * self.shrink, self.dt_min)
+            elif iterations < self.prev_iters * (1 - self.tolerance):
+                self.dt = min(self.dt * self.grow, self.dt_default)
+        self.prev_iters = iterations
+        return self.dt
+
+
+def summarize_savings(results: List[Dict]) -> Dict:
+    """
+    Compare warm-started iteration counts with cold-start references.
+
+    Each result may carry "ccx_iterations" and, when the sweep was run with a
+    cold check, "ccx_iterations_cold". Otherwise the cold cost is estimated
+    from the cases that did run cold (the first of each sweep, or any case
+    where the meshes did not match).
+    """
+    warm = [r for r in results if r.get("warm_start")]
+    cold = [r["ccx_iterations"] for r in results
+            if not r.get("warm_start") and r.get("ccx_iterations") is not None]
+    measured = all("ccx_iterations_cold" in r for r in warm) and bool(warm)
+
+    warm_iters = sum(r.get("ccx_iterations") or 0 for r in warm)
+    if measured:
+        cold_iters = sum(r["ccx_iterations_cold"] for r in warm)
+    elif cold:
+        cold_iters = float(np.mean(cold)) * len(warm)
+    else:
+        cold_iters = None
+
+    return {
+        "n_cases": len(results),
+        "n_warm": len(warm),
+        "iterations_total": sum(r.get("ccx_iterations") or 0 for r in results),
+        "iterations_warm": warm_iters,
+        "iterations_cold_reference": cold_iters,
+        "iterations_saved": (cold_iters - warm_iters) if cold_iters is not None else None,
+        "reference": "measured" if measured else "estimated from cold-start cases",
+    }
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+COST MODEL — Dry-run wall time, memory and core-hour estimates for campaigns
+================================================================================
+
+The kill shot docstring estimates "~30 minutes on Apple Silicon" by hand.
+This module predicts the cost of a campaign before anything is rendered:
+
+    log t = a + b·log N + δ_element + δ_load
+
+fitted on every record with node_count and solver_time_s in
+04_DATA/local_verified (result files and solved-case JSONL), plus the
+CalculiX logs in 04_DATA/logs (node count, element type, load pattern,
+total wall time, peak memory). Element and load offsets are relative to
+the most common category; categories never seen in the history fall back
+to that baseline. Offsets absorb everything that differs between their
+records and the baseline (a cloud-machine log shifts the C3D20R offset),
+but they leave the node-count slope to the records that share a category.
+
+Peak memory scales with node count at the median GB/node of the records
+that report it (same element type when available, else all records, which
+is conservative for C3D8 while the only memory figures come from C3D20R).
+
+For a plan, the makespan on W workers is the longest-processing-time-first
+list schedule of the predicted wall times, the order the case plan solves in.
+
+Usage:
+    python3 scripts/run_killshot_campaign.py --dry-run --workers 4
+    python3 scripts/run_killshot_campaign.py --dry-run --campaign 2
+    python3 scripts/cost_model.py                  # Fit and print the model
+
+================================================================================
+"""
+
+import heapq
+import json
+import re
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from runtime_model import FALLBACK_SECONDS_PER_NODE, LOCAL_RESULTS_DIR, estimate_nodes
+
+LOG_DIR = Path(__file__).parent.parent / "04_DATA" / "logs"
+
+# Memory without any record: ~80 KB per node (C3D20R cloud log, 49,604 nodes -> 4.1 GB)
+FALLBACK_GB_PER_NODE = 80e-6
+
+# Small ridge on the element/load offsets, only to keep the normal equations regular
+OFFSET_RIDGE = 1e-6
+
+DEFAULT_ELEMENT = "C3D8"
+DEFAULT_LOAD = "scan"
+
+
+def _record(rec: Dict, inherited: Dict, source: str) -> Optional[Dict]:
+    try:
+        n, t = int(rec["node_count"]), float(rec["solver_time_s"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if n <= 0 or t <= 0:
+        return None
+    memory = rec.get("peak_memory_gb")
+    if memory is None and rec.get("peak_rss_mb") is not None:
+        memory = rec["peak_rss_mb"] / 1024
+    return {"node_count": n, "solver_time_s": t,
+            "element_type": str(rec.get("element_type", inherited.get("element_type", DEFAULT_ELEMENT))),
+            "load": str(rec.get("load", inherited.get("load", DEFAULT_LOAD))),
+            "peak_memory_gb": memory, "source": source}
+
+
+def iter_cost_records(obj, source: str, inherited: Optional[Dict] = None) -> Iterable[Dict]:
+    """Result records at any depth, with element_type/load inherited from enclosing dicts."""
+    inherited = dict(inherited or {})
+    if isinstance(obj, dict):
+        for k in ("element_type", "load"):
+            if isinstance(obj.get(k), str):
+                inherited[k] = obj[k]
+        if "node_count" in obj and "solver_time_s" in obj:
+            rec = _record(obj, inherited, source)
+            if rec:
+                yield rec
+        for v in obj.values():
+            yield from iter_cost_records(v, source, inherited)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from iter_cost_records(v, source, inherited)
+
+
+def parse_solver_log(path: Path) -> Optional[Dict]:
+    """Cost record of a CalculiX run log (04_DATA/logs format), or None if incomplete."""
+    text = Path(path).read_text(errors="replace")
+    nodes = re.search(r"^\s*Nodes:\s+([\d,]+)", text, re.M)
+    element = re.search(r"^\s*(C3D\w+|S\d\w*)\s+Elements:", text, re.M)
+    load = re.search(r"Temperature Load:\s+(\w+) pattern", text)
+    wall = re.search(r"Total Wall Time:\s+(.+)", text)
+    memory = re.findall(r"Peak Memory:\s+([\d.]+)\s*GB", text)
+    if not nodes or not wall:
+        return None
+    seconds = 0.0
+    for value, unit in re.findall(r"([\d.]+)\s*(hour|minute|second)", wall.group(1)):
+        seconds += float(value) * {"hour": 3600, "minute": 60, "second": 1}[unit]
+    return _record({"node_count": int(nodes.group(1).replace(",", "")), "solver_time_s": seconds,
+                    "element_type": element.group(1) if element else DEFAULT_ELEMENT,
+                    "load": load.group(1).lower() if load else DEFAULT_LOAD,
+                    "peak_memory_gb": float(memory[-1]) if memory else None}, {}, Path(path).name)
+
+
+def load_cost_records(results_dir: Path = LOCAL_RESULTS_DIR, log_dir: Path = LOG_DIR) -> List[Dict]:
+    """Records from local result files (*.json, *.jsonl) and solver logs."""
+    records = []
+    for path in sorted(Path(results_dir).glob("*.json")):
+        try:
+            with open(path) as f:
+                records += iter_cost_records(json.load(f), path.name)
+        except (OSError, ValueError):
+            continue
+    for path in sorted(Path(results_dir).glob("*.jsonl")):
+        with open(path) as f:
+            for line in f:
+                try:
+                    records += iter_cost_records(json.loads(line), path.name)
+                except ValueError:
+                    continue
+    for path in sorted(Path(log_dir).glob("*.log")):
+        rec = parse_solver_log(path)
+        if rec:
+            records.append(rec)
+    return records
+
+
+class CostModel:
+    """Wall time on node count, element type and load type; memory on node count."""
+
+    def __init__(self, records: Optional[List[Dict]] = None, ridge: float = OFFSET_RIDGE):
+        self.records = list(records or [])
+        self.ridge = ridge
+        self.coef = None
+        self.sigma = None
+        self.offsets: Dict[str, Dict[str, float]] = {"element_type": {}, "load": {}}
+        self.gb_per_node: Dict[str, float] = {}
+        self.fit()
+
+    @classmethod
+    def from_history(cls, results_dir: Path = LOCAL_RESULTS_DIR, log_dir: Path = LOG_DIR, **kwargs) -> "CostModel":
+        return cls(load_cost_records(results_dir, log_dir), **kwargs)
+
+    def fit(self):
+        self._fit_memory()
+        if len(self.records) < 3:
+            self.coef, self.sigma = None, None
+            return
+        levels = {}
+        for field in ("element_type", "load"):
+            counts = {}
+            for r in self.records:
+                counts[r[field]] = counts.get(r[field], 0) + 1
+            baseline = max(counts, key=counts.get)
+            levels[field] = [c for c in sorted(counts) if c != baseline]
+
+        columns = [np.ones(len(self.records)), np.log([r["node_count"] for r in self.records])]
+        names = []
+        for field, cats in levels.items():
+            for cat in cats:
+                columns.append(np.array([float(r[field] == cat) for r in self.records]))
+                names.append((field, cat))
+        X = np.column_stack(columns)
+        y = np.log([r["solver_time_s"] for r in self.records])
+        # Ridge on the offsets only (as extra rows): intercept and slope stay unpenalized
+        penalty = np.sqrt(np.diag([0.0, 0.0] + [self.ridge] * len(names)))
+        beta, *_ = np.linalg.lstsq(np.vstack([X, penalty]), np.concatenate([y, np.zeros(len(penalty))]),
+                                   rcond=None)
+        resid = y - X @ beta
+        self.coef = beta[:2]
+        self.offsets = {"element_type": {}, "load": {}}
+        for (field, cat), b in zip(names, beta[2:]):
+            self.offsets[field][cat] = float(b)
+        self.sigma = float(np.sqrt(np.sum(resid ** 2) / max(len(y) - X.shape[1], 1)))
+
+    def _fit_memory(self):
+        self.gb_per_node = {}
+        by_type: Dict[str, List[float]] = {}
+        for r in self.records:
+            if r["peak_memory_gb"]:
+                by_type.setdefault(r["element_type"], []).append(r["peak_memory_gb"] / r["node_count"])
+        for element_type, ratios in by_type.items():
+            self.gb_per_node[element_type] = float(np.median(ratios))
+        if by_type:
+            self.gb_per_node["*"] = float(np.median([x for v in by_type.values() for x in v]))
+
+    def predict_time(self, node_count: int, element_type: str = DEFAULT_ELEMENT, load: str = DEFAULT_LOAD) -> float:
+        """Median predicted wall time in seconds."""
+        if self.coef is None:
+            return max(node_count, 1) * FALLBACK_SECONDS_PER_NODE
+        log_t = (self.coef[0] + self.coef[1] * np.log(max(node_count, 1))
+                 + self.offsets["element_type"].get(element_type, 0.0) + self.offsets["load"].get(load, 0.0))
+        return float(np.exp(log_t))
+
+    def predict_memory_gb(self, node_count: int, element_type: str = DEFAULT_ELEMENT) -> float:
+        """Predicted peak memory in GB."""
+        ratio = self.gb_per_node.get(element_type, self.gb_per_node.get("*", FALLBACK_GB_PER_NODE))
+        return float(node_count * ratio)
+
+    def predict_case(self, params: Dict) -> Dict:
+        """Node count, wall time and memory of a case from its generator parameters."""
+        nodes = estimate_nodes(params)
+        element_type = str(params.get("element_type", DEFAULT_ELEMENT))
+        load = str(params.get("load", DEFAULT_LOAD))
+        return {"node_count": nodes, "wall_s": self.predict_time(nodes, element_type, load),
+                "memory_gb": self.predict_memory_gb(nodes, element_type)}
+
+    def describe(self) -> str:
+        if self.coef is None:
+            return f"fallback ({len(self.records)} records): t ≈ {FALLBACK_SECONDS_PER_NODE:.2e} s/node"
+        offsets = ", ".join(f"{cat} ×{np.exp(b):.2f}" for field in self.offsets
+                            for cat, b in self.offsets[field].items())
+        return (f"t ≈ {np.exp(self.coef[0]):.3e} · N^{self.coef[1]:.2f} s"
+                f"{' (' + offsets + ')' if offsets else ''}, σ_log={self.sigma:.2f}, {len(self.records)} records")
+
+
+def makespan(times: List[float], workers: int) -> float:
+    """Makespan of the longest-first list schedule of times on `workers` slots."""
+    slots = [0.0] * max(workers, 1)
+    for t in sorted(times, reverse=True):
+        heapq.heapreplace(slots, slots[0] + t)
+    return max(slots)
+
+
+def estimate(cases: List[Dict], model: CostModel, workers: int = 1, threads: int = 1) -> Dict:
+    """Per-case predictions and totals for a list of case parameter dicts."""
+    predicted = [model.predict_case(p) for p in cases]
+    times = [c["wall_s"] for c in predicted]
+    memory = sorted((c["memory_gb"] for c in predicted), reverse=True)
+    return {"n_cases": len(cases), "cases": predicted,
+            "serial_s": float(sum(times)),
+            "core_hours": float(sum(times) * threads / 3600),
+            "max_case_s": max(times, default=0.0),
+            "max_case_memory_gb": memory[0] if memory else 0.0,
+            # Worst case: the largest cases all running at once
+            "peak_memory_gb": float(sum(memory[:max(workers, 1)])),
+            "makespan_s": makespan(times, workers), "workers": workers, "threads": threads}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Fit and print the campaign cost model")
+    parser.add_argument("--nodes", type=int, nargs="*", default=[12_000, 50_000, 100_000],
+                        help="Node counts to predict")
+    args = parser.parse_args()
+
+    model = CostModel.from_history()
+    print(f"Model: {model.describe()}")
+    print(f"\n{'Nodes':>10} {'Element':>8} {'Load':>11} {'Wall (s)':>10} {'Memory (GB)':>12}")
+    print("-" * 56)
+    for n in args.nodes:
+        for element_type in sorted({DEFAULT_ELEMENT, *model.offsets["element_type"]}):
+            for load in sorted({DEFAULT_LOAD, *model.offsets["load"]}):
+                print(f"{n:>10} {element_type:>8} {load:>11} {model.predict_time(n, element_type, load):>10.1f} "
+                      f"{model.predict_memory_gb(n, element_type):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+FAILURE LEDGER — Every non-success case, the compute it cost, and a re-run plan
+================================================================================
+
+The raw datasets record many non-success outcomes ("zombie",
+"executer-terminated-by-user", "submitted" without metrics, "FAIL") and the
+analyzers drop them or read them as W_pv_nm = 0. This tool indexes them:
+
+1. Every case record of 04_DATA/raw and 04_DATA/local_verified (including
+   records without a W_pv result) and every entry of the local failure
+   ledger (job_control.FAILURE_LEDGER) is classified with
+   job_control.classify_status. A record whose status is a failure but
+   which carries a W_pv result is not lost compute:
+
+       stale_status   "submitted"/"queued" but the metrics came back
+       rejected       "FAIL" on a spec check, the solve itself finished
+
+2. Core-hours lost are estimated per failure: the attempts' wall times for
+   local ledger entries; for cloud records the median solver_time_s of the
+   same file's successes when the file records timings, else the
+   runtime_model prediction at the record's node count (or the median node
+   count of the file's successes), the predicted timeout for timeouts. Wall
+   hours are multiplied by --cores-per-case. The runtime model is fitted on
+   the few local runs, so modelled figures are lower bounds and are marked
+   as such.
+3. Failures of the re-runnable classes (transient failures and lost cases)
+   are deduplicated by case_id into a re-run plan. A case with a success
+   anywhere (including earlier re-runs) is left out, so nothing that
+   succeeded is solved again. Cases whose physics the local generator deck
+   cannot reproduce (the corpus exclusions of analyze_raw_data.case_fields:
+   transient pulses, coatings, stacks, wafer radius, thermal BCs, other
+   patterns) are left out too and listed, so a gap is never filled with a
+   result of different physics.
+
+The plan (04_DATA/rerun_plan.json) is consumed by the local runner:
+
+    python3 scripts/run_local_fea.py --rerun
+
+which solves each entry and appends the results to
+04_DATA/local_verified/reruns_local.json; the next ledger run then drops
+them from the plan.
+
+Usage:
+    python3 scripts/failure_ledger.py                        # Summary + write the plan
+    python3 scripts/failure_ledger.py --list                 # Also list every failure
+    python3 scripts/failure_ledger.py --include solver_error no_convergence
+    python3 scripts/failure_ledger.py --cores-per-case 8 --no-plan
+
+================================================================================
+"""
+
+import json
+import os
+import numpy as np
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from analyze_raw_data import DATA_DIR, LOCAL_DATA_DIR, _float, case_fields
+from job_control import FAILURE_LEDGER, LOST, TIMEOUT, TRANSIENT_FAILURES, classify_status
+from runtime_model import RuntimeModel, estimate_nodes
+
+PLAN_FILE = Path(__file__).parent.parent / "04_DATA" / "rerun_plan.json"
+
+# Ledger-only classes: non-success status, but the solve produced a result
+STALE_STATUS = "stale_status"
+REJECTED = "rejected"
+
+# Failure classes put in the re-run plan by default
+RERUN_CLASSES = TRANSIENT_FAILURES | {LOST}
+
+# ccx threads per case (wall hours × this = core-hours)
+DEFAULT_CORES_PER_CASE = 1
+
+# Record keys that are bookkeeping or results, not solver inputs
+NON_PARAM_KEYS = {"case_id", "status", "task_id", "case_dir", "config", "note", "group", "metrics", "inputs",
+                  "timestamp", "solver", "machine", "node_count", "solver_time_s", "attempts",
+                  "solver_telemetry", "_sensitivity_params", "deck_bytes_written", "deck_bytes_shared"}
+RESULT_PREFIXES = ("W_", "U3_", "n_nodes", "peak_rss", "cpu_", "io_", "thread")
+
+# case_fields exclusions the local baseline deck cannot reproduce
+NOT_REPRODUCIBLE = ("physics", "thermal_bc", "pattern", "no_k_azi")
+
+
+def _case_records(obj) -> Iterable[Dict]:
+    """Yield every dict (at any depth) with a case_id or a W_pv result, results or not."""
+    if isinstance(obj, dict):
+        if "case_id" in obj or "W_pv_nm" in obj or "W_pv_nm" in obj.get("metrics", {}):
+            yield obj
+            return
+        for v in obj.values():
+            yield from _case_records(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _case_records(v)
+
+
+def record_params(record: Dict) -> Dict:
+    """Solver inputs of a dataset record (flat and `inputs` layouts)."""
+    merged = {**record, **record.get("inputs", {})}
+    params = {k: v for k, v in merged.items()
+              if k not in NON_PARAM_KEYS and not k.startswith(RESULT_PREFIXES)
+              and isinstance(v, (int, float, str, bool))}
+    if "load_mode" in params:
+        params.setdefault("load", params.pop("load_mode"))
+    return params
+
+
+def not_reproducible(params: Dict) -> Optional[str]:
+    """Why the local runner cannot reproduce a case with these inputs (None if it can)."""
+    # Placeholder result, so the exclusion reflects the inputs only
+    exclusion = case_fields({**params, "W_pv_nm": 1.0})["exclusion"]
+    return exclusion if exclusion in NOT_REPRODUCIBLE else None
+
+
+def classify_record(record: Dict) -> Optional[str]:
+    """Failure class of a dataset record (None for successes)."""
+    metrics = record.get("metrics", {})
+    wpv = _float(metrics.get("W_pv_nm", record.get("W_pv_nm")))
+    has_result = np.isfinite(wpv) and wpv > 0
+    failure = classify_status(record.get("status"))
+    if failure is None:
+        return None if has_result or record.get("status") else LOST
+    if has_result:
+        return STALE_STATUS if failure == LOST else REJECTED
+    return failure
+
+
+class FailureLedger:
+    """Non-success cases of every dataset and of the local failure ledger."""
+
+    def __init__(self, dirs=(DATA_DIR, LOCAL_DATA_DIR), ledger: Path = FAILURE_LEDGER,
+                 model: Optional[RuntimeModel] = None, cores_per_case: int = DEFAULT_CORES_PER_CASE):
+        self.model = model or RuntimeModel.from_history()
+        self.cores = cores_per_case
+        self.entries: List[Dict] = []
+        self.succeeded: Set[str] = set()
+        # Case ids left out of the last plan, with the reason
+        self.unreproducible: Dict[str, str] = {}
+        for d in dirs:
+            for path in sorted(Path(d).glob("*.json")):
+                self._scan_file(path)
+        self._scan_ledger(Path(ledger))
+
+    def _scan_file(self, path: Path):
+        try:
+            with open(path) as f:
+                records = list(_case_records(json.load(f)))
+        except (OSError, ValueError):
+            return
+        failures = []
+        nodes, times = [], []
+        for rec in records:
+            failure = classify_record(rec)
+            if failure is None:
+                if rec.get("case_id"):
+                    self.succeeded.add(str(rec["case_id"]))
+                n = _float(rec.get("node_count", rec.get("metrics", {}).get("node_count")))
+                if np.isfinite(n) and n > 0:
+                    nodes.append(n)
+                t = _float(rec.get("solver_time_s", rec.get("metrics", {}).get("solver_time_s")))
+                if np.isfinite(t) and t > 0:
+                    times.append(t)
+            else:
+                failures.append((rec, failure))
+        typical = int(np.median(nodes)) if nodes else None
+        recorded_s = float(np.median(times)) if times else None
+        for rec, failure in failures:
+            params = record_params(rec)
+            n = _float(rec.get("node_count", rec.get("metrics", {}).get("node_count")))
+            node_count = int(n) if np.isfinite(n) and n > 0 else typical or estimate_nodes(params)
+            modelled = False
+            if failure in (STALE_STATUS, REJECTED):
+                hours = 0.0
+            elif recorded_s is not None:
+                hours = recorded_s / 3600
+            else:
+                modelled = True
+                seconds = self.model.timeout(node_count) if failure == TIMEOUT else self.model.predict(node_count)
+                hours = seconds / 3600
+            self.entries.append({"case_id": str(rec.get("case_id") or ""), "source": path.name,
+                                 "status": str(rec.get("status", "")), "failure": failure,
+                                 "node_count": node_count, "core_hours": hours * self.cores,
+                                 "modelled": modelled, "params": params})
+
+    def _scan_ledger(self, ledger: Path):
+        try:
+            with open(ledger) as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return
+        for rec in lines:
+            wall = sum(a.get("elapsed_s", 0.0) for a in rec.get("attempts", []))
+            self.entries.append({"case_id": str(rec.get("case_id", "")), "source": ledger.name,
+                                 "status": rec.get("status", ""), "failure": rec.get("status", ""),
+                                 "node_count": rec.get("node_count") or estimate_nodes(rec.get("params", {})),
+                                 "core_hours": wall / 3600 * self.cores, "modelled": False,
+                                 "campaign": rec.get("campaign"), "params": rec.get("params", {})})
+
+    def summary(self) -> List[Dict]:
+        """Count and core-hours per failure class, most costly first."""
+        by_class = defaultdict(lambda: {"n": 0, "core_hours": 0.0, "modelled": 0, "sources": set()})
+        for e in self.entries:
+            row = by_class[e["failure"]]
+            row["n"] += 1
+            row["core_hours"] += e["core_hours"]
+            row["modelled"] += e["modelled"]
+            row["sources"].add(e["source"])
+        return sorted(({"failure": k, **v} for k, v in by_class.items()),
+                      key=lambda r: (-r["core_hours"], -r["n"]))
+
+    def plan(self, classes: Set[str] = RERUN_CLASSES) -> List[Dict]:
+        """
+        One entry per case_id whose failures fall in `classes`, which has no
+        success anywhere and which the local runner can reproduce, in ledger
+        order. Left-out unreproducible cases are in self.unreproducible.
+        """
+        plan: Dict[str, Dict] = {}
+        self.unreproducible = {}
+        for e in self.entries:
+            cid = e["case_id"]
+            if e["failure"] not in classes or not cid or cid in self.succeeded:
+                continue
+            reason = not_reproducible(e["params"])
+            if reason:
+                self.unreproducible[cid] = reason
+                continue
+            if cid in plan:
+                plan[cid]["failures"] += 1
+                plan[cid]["sources"] = sorted(set(plan[cid]["sources"]) | {e["source"]})
+                continue
+            plan[cid] = {"case_id": cid, "failure": e["failure"], "failures": 1, "sources": [e["source"]],
+                         "campaign": e.get("campaign") or Path(e["source"]).stem,
+                         "node_count": e["node_count"],
+                         "est_core_hours": self.model.predict(e["node_count"]) / 3600 * self.cores,
+                         "params": e["params"]}
+        return list(plan.values())
+
+
+def save_plan(plan: List[Dict], path: Path = PLAN_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump({"n_cases": len(plan), "est_core_hours": sum(p["est_core_hours"] for p in plan),
+                   "cases": plan}, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def load_plan(path: Path = PLAN_FILE) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)["cases"]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Index non-success cases and write a re-run plan")
+    parser.add_argument("--include", nargs="*", default=[],
+                        help="Extra failure classes to re-run (default: transient failures and lost cases)")
+    parser.add_argument("--cores-per-case", type=int, default=DEFAULT_CORES_PER_CASE,
+                        help="Cores each case occupied (core-hours = wall hours × this)")
+    parser.add_argument("--list", action="store_true", help="List every failure")
+    parser.add_argument("--plan", type=Path, default=PLAN_FILE, help="Re-run plan file")
+    parser.add_argument("--no-plan", action="store_true", help="Do not write the plan")
+    args = parser.parse_args()
+
+    ledger = FailureLedger(cores_per_case=args.cores_per_case)
+    print("\n" + "=" * 80)
+    print("🧾 FAILURE LEDGER")
+    print("=" * 80)
+    print(f"Runtime model: {ledger.model.describe()}")
+
+    if args.list:
+        print(f"\n{'Case':<36} {'Source':<34} {'Class':<14} {'Core-h':>8}")
+        print("-" * 95)
+        for e in ledger.entries:
+            print(f"{e['case_id'][:36]:<36} {e['source'][:34]:<34} {e['failure']:<14} {e['core_hours']:>8.2f}")
+
+    rows = ledger.summary()
+    print(f"\n{'Class':<16} {'Cases':>6} {'Core-h lost':>12}  Sources")
+    print("-" * 80)
+    for r in rows:
+        bound = "≥" if r["modelled"] else " "
+        print(f"{r['failure']:<16} {r['n']:>6} {bound}{r['core_hours']:>11.2f}  {', '.join(sorted(r['sources']))}")
+    print("-" * 80)
+    modelled = sum(r["modelled"] for r in rows)
+    print(f"{'Total':<16} {sum(r['n'] for r in rows):>6} {'≥' if modelled else ' '}"
+          f"{sum(r['core_hours'] for r in rows):>11.2f}")
+    if modelled:
+        print(f"≥: {modelled} case(s) without recorded timings, estimated from the local runtime model "
+              f"({len(ledger.model.pairs)} records); lower bounds")
+
+    classes = RERUN_CLASSES | set(args.include)
+    plan = ledger.plan(classes)
+    skipped = len({e["case_id"] for e in ledger.entries
+                   if e["failure"] in classes and e["case_id"] in ledger.succeeded})
+    print(f"\nRe-run plan: {len(plan)} case(s), ~{sum(p['est_core_hours'] for p in plan):.2f} core-h "
+          f"({skipped} failed case id(s) already succeeded elsewhere)")
+    if ledger.unreproducible:
+        reasons = defaultdict(int)
+        for reason in ledger.unreproducible.values():
+            reasons[reason] += 1
+        print(f"⚠️  {len(ledger.unreproducible)} case(s) left out: the local deck cannot reproduce their physics "
+              f"({', '.join(f'{k} {v}' for k, v in sorted(reasons.items()))}); re-submit them to the cloud")
+    if not args.no_plan:
+        save_plan(plan, args.plan)
+        print(f"📁 Plan saved: {args.plan}")
+        print("   Run it with: python3 scripts/run_local_fea.py --rerun")
+
+
+if __name__ == "__main__":
+    main()
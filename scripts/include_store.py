@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+SHARED INCLUDE STORE — Content-addressed dedup of CalculiX include files
+================================================================================
+
+Monte Carlo batches render one complete case directory per seed, yet the mesh
+includes (nodes.inp, elements.inp, materials.inp) are byte-identical across
+seeds: only the spring constants, bow and k_azi change, and those live in the
+small supports/loads decks.
+
+This module keeps every *INCLUDE file in a store keyed by its SHA-256 and
+hard-links it back into the case directory. Cases are rendered into a RAM
+staging directory (/dev/shm when available), so the only bytes that reach the
+disk per case are the main deck and the includes the store has not seen yet.
+If a hard link is impossible (store on another filesystem), the main deck is
+rewritten to *INCLUDE the store copy by absolute path instead.
+
+Usage (from the runners):
+    store = IncludeStore(LOCAL_WORK_DIR / "_include_store")
+    staging = store.staging_dir(case_id)
+    render_case(case_name=case_id, output_dir=str(staging), ...)
+    stats = store.commit_case(staging, case_dir)
+
+    python3 scripts/include_store.py --stats local_runs/_include_store
+    python3 scripts/include_store.py --prune local_runs/_include_store
+
+================================================================================
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+INCLUDE_RE = re.compile(r"^\*INCLUDE\s*,\s*INPUT\s*=\s*(\S+)\s*$", re.IGNORECASE | re.MULTILINE)
+
+# RAM-backed staging area; falls back to staging next to the store
+RAM_STAGING_ROOT = Path("/dev/shm")
+
+# CalculiX truncates *INCLUDE paths beyond this many characters
+CCX_MAX_INCLUDE_PATH = 132
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Stream a file through SHA-256 and return the hex digest."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_includes(deck_text: str) -> List[str]:
+    """Return the file names referenced by *INCLUDE cards in a deck."""
+    return [m.group(1).strip().strip('"') for m in INCLUDE_RE.finditer(deck_text)]
+
+
+class IncludeStore:
+    """Content-addressed store of include files shared across case decks."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str, suffix: str = ".inp") -> Path:
+        return self.root / f"{digest}{suffix}"
+
+    def staging_dir(self, case_id: str) -> Path:
+        """Create a scratch directory for the generator to render into."""
+        base = RAM_STAGING_ROOT if RAM_STAGING_ROOT.is_dir() and os.access(RAM_STAGING_ROOT, os.W_OK) else self.root
+        return Path(tempfile.mkdtemp(prefix=f"{case_id}_", dir=str(base)))
+
+    def intern(self, path: Path) -> Dict:
+        """Add a file to the store (if new) and return its digest and size."""
+        path = Path(path)
+        digest = sha256_file(path)
+        target = self.path_for(digest, path.suffix)
+        new = not target.exists()
+        if new:
+            # Write to a temp name first so concurrent batches never see partial files
+            tmp = target.with_name(target.name + f".tmp{os.getpid()}")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        return {"digest": digest, "store_path": target, "bytes": path.stat().st_size, "new": new}
+
+    def commit_case(self, staging: Path, case_dir: Path) -> Dict:
+        """
+        Move a rendered case from staging into case_dir, sharing its includes.
+
+        Included files are linked from the store; everything else (main deck,
+        anything not referenced by *INCLUDE) is moved as a regular file.
+        Returns bytes written to and bytes avoided on the case filesystem.
+        """
+        staging, case_dir = Path(staging), Path(case_dir)
+        case_dir.mkdir(parents=True, exist_ok=True)
+
+        decks = {}
+        includes = set()
+        for inp in staging.glob("*.inp"):
+            text = inp.read_text()
+            refs = find_includes(text)
+            if refs:
+                decks[inp.name] = text
+                includes.update(refs)
+
+        stats = {"n_shared": 0, "n_new": 0, "bytes_written": 0, "bytes_shared": 0}
+        rewrites = {}
+        for name in sorted(includes):
+            src = staging / name
+            if not src.is_file() or name in decks:
+                continue
+            entry = self.intern(src)
+            dst = case_dir / name
+            if dst.exists() or dst.is_symlink():
+                dst.unlink()
+            try:
+                os.link(entry["store_path"], dst)
+            except OSError:
+                abs_path = str(entry["store_path"].resolve())
+                if len(abs_path) > CCX_MAX_INCLUDE_PATH:
+                    shutil.copyfile(entry["store_path"], dst)
+                    stats["bytes_written"] += entry["bytes"]
+                    continue
+                rewrites[name] = abs_path
+            if entry["new"]:
+                stats["n_new"] += 1
+                stats["bytes_written"] += entry["bytes"]
+            else:
+                stats["n_shared"] += 1
+                stats["bytes_shared"] += entry["bytes"]
+
+        for f in staging.iterdir():
+            if f.name in includes and f.name not in decks:
+                continue
+            dst = case_dir / f.name
+            if f.name in decks and rewrites:
+                text = decks[f.name]
+                for name, abs_path in rewrites.items():
+                    text = re.sub(rf"(?im)^(\*INCLUDE\s*,\s*INPUT\s*=\s*){re.escape(name)}\s*$",
+                                  lambda m: m.group(1) + abs_path, text)
+                dst.write_text(text)
+            else:
+                shutil.move(str(f), str(dst))
+            stats["bytes_written"] += dst.stat().st_size
+
+        shutil.rmtree(staging, ignore_errors=True)
+        return stats
+
+    def prune(self) -> int:
+        """Delete store entries no case directory links to any more."""
+        removed = 0
+        for f in self.root.glob("*.inp"):
+            if f.stat().st_nlink <= 1:
+                f.unlink()
+                removed += 1
+        return removed
+
+    def summary(self) -> Dict:
+        """Report how many entries the store holds and how often they are reused."""
+        entries = list(self.root.glob("*.inp"))
+        size = sum(f.stat().st_size for f in entries)
+        links = sum(f.stat().st_nlink - 1 for f in entries)
+        logical = sum(f.stat().st_size * max(f.stat().st_nlink - 1, 1) for f in entries)
+        return {"entries": len(entries), "bytes_stored": size, "case_links": links,
+                "bytes_logical": logical}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or prune the shared include store")
+    parser.add_argument("store", type=Path, help="Store directory (e.g. local_runs/_include_store)")
+    parser.add_argument("--stats", action="store_true", help="Print store usage")
+    parser.add_argument("--prune", action="store_true", help="Remove entries no case links to")
+    args = parser.parse_args()
+
+    store = IncludeStore(args.store)
+    if args.prune:
+        print(f"Pruned {store.prune()} unreferenced include(s)")
+    s = store.summary()
+    print(f"Entries: {s['entries']}, case links: {s['case_links']}")
+    print(f"Stored: {s['bytes_stored']/1e6:.1f} MB for {s['bytes_logical']/1e6:.1f} MB of case includes")
+
+
+if __name__ == "__main__":
+    main()
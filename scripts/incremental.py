@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+INCREMENTAL ANALYSIS — Corpus group statistics updated from new cases only
+================================================================================
+
+Every analyze_raw_data.py run recomputed every statistic from every file,
+although campaigns only ever add cases. The corpus report now keeps its
+state in 04_DATA/.analysis_state.json:
+
+    groups       per (material, load, n_harmonic, k_azi) group, the
+                 sufficient statistics of W_pv as a serialized
+                 online_stats.RunningStats (n, mean, M2, min, max, t-digest)
+    watermarks   per source file: size, mtime, SHA-256, the number of rows
+                 already consumed and a digest of their contents
+
+On update:
+
+1. Files whose size and mtime match their watermark are skipped without
+   being read. A file that was touched but has the same SHA-256 is skipped
+   too.
+2. A changed file is loaded through the parse cache. If its first rows
+   hash to the digest of the rows already consumed (case ids, group keys,
+   W_pv and corpus membership all unchanged: cases were appended), only the
+   rows after the watermark are pushed into their groups.
+3. Anything else cannot be subtracted from the sketches, so the state is
+   rebuilt from all files: rows removed, or rewritten with the same case
+   ids but new values (the runners rewrite their JSON files whole, and a
+   re-run redraws every MC case), a file deleted, a new grouping.
+
+k_azi is grouped on the nominal value (k_azi_base) binned to
+K_AZI_REPORT_TOL, so Monte Carlo batches form one group per nominal point.
+Corpus membership is the one of analyze_raw_data.iter_corpus_cases.
+
+Usage:
+    python3 scripts/analyze_raw_data.py --corpus     # Update and print the corpus report
+    python3 scripts/incremental.py                   # Same, standalone
+    python3 scripts/incremental.py --rebuild         # Discard the state first
+
+================================================================================
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from analyze_raw_data import DATA_DIR, LOCAL_DATA_DIR, check_manifest, load_case_columns
+from online_stats import RunningStats
+
+STATE_FILE = Path(__file__).parent.parent / "04_DATA" / ".analysis_state.json"
+STATE_VERSION = 2
+
+GROUP_KEYS = ("material", "load", "n_harmonic", "k_azi")
+
+# Bin width of the nominal k_azi in the corpus report
+K_AZI_REPORT_TOL = 0.01
+
+
+def _group_keys(cols: Dict[str, np.ndarray], rows: np.ndarray) -> List[str]:
+    k = np.where(np.isfinite(cols["k_azi_base"][rows]), cols["k_azi_base"][rows], cols["k_azi"][rows])
+    k = np.round(np.round(k / K_AZI_REPORT_TOL) * K_AZI_REPORT_TOL, 6)
+    return [f"{m}|{l}|{h}|{kk:g}" for m, l, h, kk in
+            zip(cols["material"][rows], cols["load"][rows], cols["n_harmonic"][rows], k)]
+
+
+# Columns whose values decide what a consumed row contributed
+DIGEST_COLUMNS = ("case_id", "exclusion", "material", "load", "n_harmonic", "k_azi", "k_azi_base", "W_pv_nm")
+
+
+def rows_digest(cols: Dict[str, np.ndarray], n: int) -> str:
+    """SHA-256 of the first n rows of the columns that feed the group statistics."""
+    h = hashlib.sha256()
+    for k in DIGEST_COLUMNS:
+        # Values rather than raw bytes: the width of a string column grows
+        # with the longest value, so appending could change the bytes of the prefix
+        h.update("\x1f".join([k] + [repr(v) for v in cols[k][:n].tolist()]).encode())
+    return h.hexdigest()
+
+
+class IncrementalAnalysis:
+    """Persisted per-group W_pv statistics with per-file watermarks."""
+
+    def __init__(self, path: Path = STATE_FILE, dirs=(DATA_DIR, LOCAL_DATA_DIR)):
+        self.path = Path(path)
+        self.dirs = [str(Path(d)) for d in dirs]
+        self.groups: Dict[str, RunningStats] = {}
+        self.watermarks: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("version") != STATE_VERSION or state.get("dirs") != self.dirs \
+                or state.get("k_azi_tol") != K_AZI_REPORT_TOL:
+            return
+        self.groups = {k: RunningStats.from_dict(v) for k, v in state["groups"].items()}
+        self.watermarks = state["watermarks"]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump({"version": STATE_VERSION, "dirs": self.dirs, "k_azi_tol": K_AZI_REPORT_TOL,
+                       "groups": {k: v.to_dict() for k, v in self.groups.items()},
+                       "watermarks": self.watermarks}, f)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.groups, self.watermarks = {}, {}
+
+    def _consume(self, cols: Dict[str, np.ndarray], start: int) -> int:
+        rows = start + np.flatnonzero(cols["exclusion"][start:] == "")
+        for key, wpv in zip(_group_keys(cols, rows), cols["W_pv_nm"][rows]):
+            self.groups.setdefault(key, RunningStats()).push(wpv)
+        return len(rows)
+
+    def update(self) -> Dict:
+        """Consume new cases of every source file; returns what was read."""
+        files = {str(p): p for d in self.dirs for p in sorted(Path(d).glob("*.json"))}
+        summary = {"files": len(files), "skipped": 0, "changed": 0, "new_cases": 0, "rebuilt": False}
+        if set(self.watermarks) - set(files):
+            # A file disappeared: its cases cannot be subtracted
+            self.reset()
+            summary["rebuilt"] = True
+
+        pending = []
+        for name, path in files.items():
+            st = path.stat()
+            mark = self.watermarks.get(name)
+            if mark and (mark["size"], mark["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                summary["skipped"] += 1
+                continue
+            digest = check_manifest(path)
+            if mark and mark["sha256"] == digest:
+                mark.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                summary["skipped"] += 1
+                continue
+            try:
+                cols = load_case_columns(path)
+            except (OSError, ValueError):
+                continue
+            n_rows = len(cols["case_id"])
+            if mark and (n_rows < mark["n_rows"] or rows_digest(cols, mark["n_rows"]) != mark["rows_sha256"]):
+                # Rows removed or rewritten rather than appended
+                self.reset()
+                summary["rebuilt"] = True
+                return self._rebuild(files, summary)
+            pending.append((name, st, digest, cols, mark["n_rows"] if mark else 0))
+
+        for name, st, digest, cols, start in pending:
+            summary["new_cases"] += self._consume(cols, start)
+            summary["changed"] += 1
+            self.watermarks[name] = self._watermark(st, digest, cols)
+        return summary
+
+    @staticmethod
+    def _watermark(st: os.stat_result, digest: str, cols: Dict[str, np.ndarray]) -> Dict:
+        n_rows = len(cols["case_id"])
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest,
+                "n_rows": n_rows, "rows_sha256": rows_digest(cols, n_rows)}
+
+    def _rebuild(self, files: Dict[str, Path], summary: Dict) -> Dict:
+        summary.update(skipped=0, changed=0, new_cases=0)
+        for name, path in files.items():
+            try:
+                cols = load_case_columns(path)
+            except (OSError, ValueError):
+                continue
+            summary["new_cases"] += self._consume(cols, 0)
+            summary["changed"] += 1
+            self.watermarks[name] = self._watermark(path.stat(), check_manifest(path), cols)
+        return summary
+
+    def rows(self) -> List[Dict]:
+        """One row per group (key fields plus n, mean, std, cv_pct, min, max, median), sorted by key."""
+        out = []
+        for key, stats in self.groups.items():
+            material, load, harmonic, k_azi = key.split("|")
+            out.append({"material": material, "load": load, "n_harmonic": int(harmonic),
+                        "k_azi": float(k_azi), **stats.summary()})
+        return sorted(out, key=lambda r: tuple(r[k] for k in GROUP_KEYS))
+
+
+def corpus_report(path: Path = STATE_FILE, rebuild: bool = False) -> Optional[List[Dict]]:
+    """Update the persisted state with new cases, print the corpus group table and save."""
+    analysis = IncrementalAnalysis(path)
+    if rebuild:
+        analysis.reset()
+    summary = analysis.update()
+    analysis.save()
+    rows = analysis.rows()
+
+    print(f"\n{'Material':<10} {'Load':<12} {'n':>3} {'k_azi':>6} {'N':>6} {'Mean W_pv (nm)':>16} "
+          f"{'CV (%)':>9} {'Median (nm)':>13}")
+    print("-" * 82)
+    for r in rows:
+        print(f"{r['material']:<10} {r['load']:<12} {r['n_harmonic']:>3} {r['k_azi']:>6.2f} {r['n']:>6} "
+              f"{r['mean']:>16.2f} {r['cv_pct']:>9.2f} {r['median']:>13.2f}")
+    print("-" * 82)
+    how = "rebuilt from all files" if summary["rebuilt"] else "incremental"
+    print(f"{sum(r['n'] for r in rows)} corpus cases in {len(rows)} groups; {how}: "
+          f"{summary['new_cases']} new case(s) from {summary['changed']} changed file(s), "
+          f"{summary['skipped']} unchanged file(s) skipped")
+    return rows
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Incrementally updated corpus group statistics")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the persisted state first")
+    parser.add_argument("--state", type=Path, default=STATE_FILE, help="State file")
+    args = parser.parse_args()
+    corpus_report(args.state, args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
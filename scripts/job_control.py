@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+JOB CONTROL — Timeouts, retries, straggler mitigation and failure records
+================================================================================
+
+The runners used fixed timeouts (120 s / 600 s) and silently returned None on
+any failure, while the cloud datasets are full of "zombie" and
+"executer-terminated-by-user" cases. This module runs CalculiX processes with:
+
+1. A per-case timeout predicted by runtime_model.RuntimeModel from the node
+   count of the rendered mesh.
+2. Automatic retries with exponential backoff for transient failures
+   (timeouts, killed processes, launch errors); a retry after a timeout gets
+   a longer timeout.
+3. Speculative re-launch of stragglers: when a slot is idle and a running
+   case is well past its predicted time, a copy is started in a sibling
+   directory and whichever finishes first wins.
+4. Live convergence telemetry: the solver log is tailed on every poll and
+   fed to solver_telemetry.ConvergenceMonitor; a case whose residual trend
+   shows divergence is killed at once instead of burning its timeout, and
+   the parsed records are saved as telemetry.json in the case directory.
+5. A failure class for every non-success, appended to a JSONL failure ledger
+   (04_DATA/local_verified/failures_local.jsonl) and to failure.json in the
+   case directory.
+6. Resource accounting: each ccx is reaped with wait4() and sampled from
+   /proc while it runs, so outcomes carry its peak RSS, CPU time, I/O and
+   thread utilization (resource_usage.py).
+
+================================================================================
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from resource_usage import ProcessSampler, usage_record
+from runtime_model import RuntimeModel
+from solver_telemetry import ConvergenceMonitor
+
+FAILURE_LEDGER = Path(__file__).parent.parent / "04_DATA" / "local_verified" / "failures_local.jsonl"
+
+# Failure classes
+TIMEOUT = "timeout"
+KILLED = "killed"
+LAUNCH_FAILED = "launch_failed"
+NO_CONVERGENCE = "no_convergence"
+DIVERGED = "diverged"
+SOLVER_ERROR = "solver_error"
+PARSE_FAILED = "parse_failed"
+GENERATOR_FAILED = "generator_failed"
+NO_INPUT = "no_input"
+LOST = "lost"
+
+TRANSIENT_FAILURES = {TIMEOUT, KILLED, LAUNCH_FAILED}
+
+# Status strings found in the cloud datasets (04_DATA/raw) mapped to classes
+STATUS_CLASSES = {
+    "zombie": KILLED,
+    "executer-terminated-by-user": KILLED,
+    "killed": KILLED,
+    "failed": SOLVER_ERROR,
+    "fail": SOLVER_ERROR,
+    "error": SOLVER_ERROR,
+    "timeout": TIMEOUT,
+    "submitted": LOST,
+    "started": LOST,
+    "queued": LOST,
+}
+
+SOLVER_LOG = "solver.log"
+OUTPUT_SUFFIXES = (".dat", ".frd", ".sta", ".cvg", ".12d")
+
+# Environment variables CalculiX (and its OpenMP solvers) read for thread counts
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "CCX_NPROC_STIFFNESS", "CCX_NPROC_EQUATION_SOLVER",
+                   "CCX_NPROC_RESULTS")
+
+
+def thread_env(threads: Optional[int]) -> Optional[Dict[str, str]]:
+    """SolverPool env pinning every ccx process to `threads` threads (None: inherit)."""
+    if not threads:
+        return None
+    return {var: str(threads) for var in THREAD_ENV_VARS}
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently to retry transient failures."""
+    max_attempts: int = 3
+    backoff_s: float = 5.0
+    backoff_factor: float = 2.0
+    timeout_growth: float = 1.5
+    straggler_factor: float = 2.0
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before attempt number `attempt` (1-based; attempt 1 has none)."""
+        return 0.0 if attempt <= 1 else self.backoff_s * self.backoff_factor ** (attempt - 2)
+
+
+@dataclass
+class SolveJob:
+    """One CalculiX solve: `ccx -i inp_stem` in case_dir."""
+    case_id: str
+    case_dir: Path
+    inp_stem: str
+    node_count: int = 0
+
+
+def classify_status(status: Optional[str]) -> Optional[str]:
+    """Map a dataset status string to a failure class (None for successes and missing statuses)."""
+    if status is None:
+        return None
+    s = str(status).strip().lower()
+    if not s:
+        return None
+    if s in ("success", "pass", "completed", "finished"):
+        return None
+    return STATUS_CLASSES.get(s, s)
+
+
+def classify_failure(returncode: Optional[int], output: str = "", timed_out: bool = False,
+                     launch_error: Optional[BaseException] = None,
+                     diverged: Optional[str] = None) -> Optional[str]:
+    """Classify a finished CalculiX process; None means it succeeded."""
+    if launch_error is not None:
+        return LAUNCH_FAILED
+    if diverged:
+        return DIVERGED
+    if timed_out:
+        return TIMEOUT
+    if returncode is not None and returncode < 0:
+        return KILLED
+    text = output.lower()
+    if "*error" in text:
+        if "convergence" in text or "cutback" in text or "increment size smaller" in text:
+            return NO_CONVERGENCE
+        return SOLVER_ERROR
+    if returncode:
+        return SOLVER_ERROR
+    return None
+
+
+def record_failure(record: Dict, case_dir: Optional[Path] = None, ledger: Path = FAILURE_LEDGER):
+    """Append a failure record to the ledger (and to case_dir/failure.json)."""
+    record = {"timestamp": datetime.now().isoformat(), **record}
+    ledger.parent.mkdir(parents=True, exist_ok=True)
+    with open(ledger, 'a') as f:
+        f.write(json.dumps(record, default=str) + "\n")
+    if case_dir is not None and Path(case_dir).is_dir():
+        with open(Path(case_dir) / "failure.json", 'w') as f:
+            json.dump(record, f, indent=2, default=str)
+
+
+def _read_log(path: Path, limit: int = 200_000) -> str:
+    try:
+        with open(path, errors="replace") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(size - limit, 0))
+            return f.read()
+    except OSError:
+        return ""
+
+
+class _Run:
+    """A launched attempt of a job."""
+
+    def __init__(self, job: SolveJob, attempt: int, cwd: Path, timeout: float, speculative: bool):
+        self.job = job
+        self.attempt = attempt
+        self.cwd = cwd
+        self.timeout = timeout
+        self.speculative = speculative
+        self.start = time.monotonic()
+        self.proc = None
+        self.launch_error = None
+        self.timed_out = False
+        self.monitor = ConvergenceMonitor()
+        self.log_offset = 0
+        self.sampler = None
+        self.rusage = None
+
+
+class SolverPool:
+    """
+    Run CalculiX jobs on a fixed number of slots with retries and speculation.
+
+    The pool polls its child processes; no threads are involved. Every process
+    it kills is also reaped, so it never leaves zombies behind.
+    """
+
+    def __init__(self, ccx: str, workers: int = 1, model: Optional[RuntimeModel] = None,
+                 policy: Optional[RetryPolicy] = None, poll_s: float = 0.2, speculate: bool = True,
+                 env: Optional[Dict[str, str]] = None):
+        self.ccx = ccx
+        self.workers = max(1, workers)
+        self.model = model or RuntimeModel.from_history()
+        self.policy = policy or RetryPolicy()
+        self.poll_s = poll_s
+        self.speculate = speculate
+        self.env = env
+
+    # -- process handling --------------------------------------------------
+
+    def _launch(self, run: _Run):
+        cmd = [self.ccx, "-i", run.job.inp_stem]
+        if shutil.which("stdbuf"):
+            # Line-buffer ccx stdout so the log can be followed while it runs
+            cmd = ["stdbuf", "-oL"] + cmd
+        try:
+            with open(run.cwd / SOLVER_LOG, 'w') as log:
+                run.proc = subprocess.Popen(cmd, cwd=str(run.cwd),
+                                            stdout=log, stderr=subprocess.STDOUT,
+                                            env={**os.environ, **self.env} if self.env else None)
+            run.sampler = ProcessSampler(run.proc.pid)
+        except OSError as e:
+            run.launch_error = e
+        run.start = time.monotonic()
+
+    @staticmethod
+    def _reap(run: _Run, block: bool = False) -> Optional[int]:
+        """
+        Return code of a run, or None while it is running. The process is
+        reaped with wait4() so its own rusage is kept; while it runs, each
+        call takes a /proc sample.
+        """
+        if run.proc is None or run.proc.returncode is not None:
+            return run.proc.returncode if run.proc is not None else None
+        try:
+            pid, status, rusage = os.wait4(run.proc.pid, 0 if block else os.WNOHANG)
+        except ChildProcessError:
+            return run.proc.wait() if block else run.proc.poll()
+        if pid == 0:
+            run.sampler.sample()
+            return None
+        run.proc.returncode = os.waitstatus_to_exitcode(status)
+        run.rusage = rusage
+        return run.proc.returncode
+
+    def _resources(self, run: _Run, elapsed: float) -> Dict:
+        threads = int(self.env["OMP_NUM_THREADS"]) if self.env and "OMP_NUM_THREADS" in self.env else None
+        return usage_record(run.rusage, run.sampler, elapsed, threads=threads)
+
+    @staticmethod
+    def _stream(run: _Run, final: bool = False) -> Optional[str]:
+        """Feed newly written solver output to the run's monitor."""
+        try:
+            with open(run.cwd / SOLVER_LOG, errors="replace") as f:
+                f.seek(run.log_offset)
+                text = f.read()
+                run.log_offset = f.tell()
+        except OSError:
+            text = ""
+        t = time.monotonic() - run.start
+        run.monitor.feed_text(text, t)
+        if final:
+            run.monitor.flush(t)
+        return run.monitor.abort_reason
+
+    @classmethod
+    def _kill(cls, run: _Run):
+        if run.proc is not None and run.proc.returncode is None:
+            run.proc.kill()
+        cls._reap(run, block=True)
+
+    @staticmethod
+    def _spec_dir(job: SolveJob) -> Path:
+        return job.case_dir.with_name(job.case_dir.name + "_spec")
+
+    def _prepare_spec_dir(self, job: SolveJob) -> Path:
+        """Clone a case's inputs into a sibling directory (hard links where possible)."""
+        spec = self._spec_dir(job)
+        shutil.rmtree(spec, ignore_errors=True)
+        spec.mkdir(parents=True)
+        for f in job.case_dir.iterdir():
+            if f.is_file() and f.suffix == ".inp":
+                try:
+                    os.link(f, spec / f.name)
+                except OSError:
+                    shutil.copyfile(f, spec / f.name)
+        return spec
+
+    @staticmethod
+    def _adopt_outputs(spec: Path, case_dir: Path):
+        """Move a winning speculative run's outputs into the real case directory."""
+        for f in spec.iterdir():
+            if f.suffix in OUTPUT_SUFFIXES or f.name == SOLVER_LOG:
+                os.replace(f, case_dir / f.name)
+        shutil.rmtree(spec, ignore_errors=True)
+
+    # -- scheduling ---------------------------------------------------------
+
+    def run(self, jobs: List[SolveJob]) -> Dict[str, Dict]:
+        """
+        Solve all jobs; returns {case_id: outcome}.
+
+        An outcome has ok, failure (class or None), elapsed_s, timeout_s,
+        attempts (per-attempt records), speculative_win, telemetry (the
+        ConvergenceMonitor summary of the deciding attempt) and resources
+        (its peak RSS, CPU time, I/O and thread utilization).
+        """
+        pending = deque((job, 1, 0.0) for job in jobs)  # (job, attempt, ready_at)
+        running: List[_Run] = []
+        history: Dict[str, List[Dict]] = {job.case_id: [] for job in jobs}
+        done: Dict[str, Dict] = {}
+        speculated = set()
+
+        while pending or running:
+            now = time.monotonic()
+
+            for run in list(running):
+                if run not in running:
+                    # Killed earlier in this pass: a sibling of a run that succeeded
+                    continue
+                rc = self._reap(run)
+                if run.launch_error is None and rc is None:
+                    diverged = self._stream(run)
+                    if diverged:
+                        print(f"    [{run.job.case_id}] diverging: {diverged}; aborting", flush=True)
+                    elif now - run.start <= run.timeout:
+                        continue
+                    else:
+                        run.timed_out = True
+                    self._kill(run)
+                    rc = run.proc.returncode
+                self._stream(run, final=True)
+                running.remove(run)
+                job = run.job
+                if job.case_id in done:
+                    continue
+
+                elapsed = time.monotonic() - run.start
+                failure = classify_failure(rc, _read_log(run.cwd / SOLVER_LOG),
+                                           timed_out=run.timed_out, launch_error=run.launch_error,
+                                           diverged=run.monitor.abort_reason)
+                history[job.case_id].append({
+                    "attempt": run.attempt, "speculative": run.speculative, "failure": failure,
+                    "returncode": rc, "elapsed_s": round(elapsed, 1), "timeout_s": round(run.timeout, 1),
+                    "abort_reason": run.monitor.abort_reason,
+                })
+                siblings = [r for r in running if r.job is job]
+
+                if failure is None:
+                    for other in siblings:
+                        self._kill(other)
+                        running.remove(other)
+                    if run.speculative:
+                        self._adopt_outputs(run.cwd, job.case_dir)
+                    else:
+                        shutil.rmtree(self._spec_dir(job), ignore_errors=True)
+                    run.monitor.save(job.case_dir)
+                    self.model.observe(job.node_count, elapsed)
+                    done[job.case_id] = {"ok": True, "failure": None, "elapsed_s": elapsed,
+                                         "timeout_s": run.timeout, "attempts": history[job.case_id],
+                                         "speculative_win": run.speculative,
+                                         "telemetry": run.monitor.summary(),
+                                         "resources": self._resources(run, elapsed)}
+                elif siblings:
+                    continue  # the other copy is still going
+                elif failure in TRANSIENT_FAILURES and run.attempt < self.policy.max_attempts:
+                    nxt = run.attempt + 1
+                    pending.append((job, nxt, time.monotonic() + self.policy.delay(nxt)))
+                    print(f"    [{job.case_id}] {failure} on attempt {run.attempt}; "
+                          f"retrying in {self.policy.delay(nxt):.0f}s", flush=True)
+                else:
+                    shutil.rmtree(self._spec_dir(job), ignore_errors=True)
+                    run.monitor.save(job.case_dir)
+                    done[job.case_id] = {"ok": False, "failure": failure, "elapsed_s": elapsed,
+                                         "timeout_s": run.timeout, "attempts": history[job.case_id],
+                                         "speculative_win": False,
+                                         "telemetry": run.monitor.summary(),
+                                         "resources": self._resources(run, elapsed)}
+
+            while len(running) < self.workers:
+                ready = next((p for p in pending if p[2] <= now), None)
+                if ready is not None:
+                    pending.remove(ready)
+                    job, attempt, _ = ready
+                    timeouts = sum(1 for a in history[job.case_id] if a["failure"] == TIMEOUT)
+                    timeout = self.model.timeout(job.node_count) * self.policy.timeout_growth ** timeouts
+                    run = _Run(job, attempt, job.case_dir, timeout, speculative=False)
+                    self._launch(run)
+                    running.append(run)
+                    continue
+                if pending or not self.speculate:
+                    break
+                # Idle slot and nothing queued: duplicate the worst straggler
+                stragglers = [r for r in running if r.job.case_id not in speculated and not r.speculative
+                              and now - r.start > self.policy.straggler_factor * self.model.predict(r.job.node_count)]
+                if not stragglers:
+                    break
+                slow = max(stragglers, key=lambda r: (now - r.start) / max(self.model.predict(r.job.node_count), 1e-9))
+                speculated.add(slow.job.case_id)
+                spec = _Run(slow.job, slow.attempt, self._prepare_spec_dir(slow.job), slow.timeout, speculative=True)
+                print(f"    [{slow.job.case_id}] straggling ({now - slow.start:.0f}s); launching speculative copy",
+                      flush=True)
+                self._launch(spec)
+                running.append(spec)
+
+            if running or pending:
+                time.sleep(self.poll_s)
+
+        return done
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+DATA MANIFEST — Parallel, incremental SHA-256 verification of the data files
+================================================================================
+
+DATA_MANIFEST.md lists a SHA-256 hash for every raw data file (in its table
+and in the checksum block), and 04_DATA/DATA_MANIFEST.sha256 is its
+sha256sum-format companion. Checking them with `sha256sum -c` hashes every
+file serially; with local campaigns writing thousands of result files into
+04_DATA/local_verified that gets slow.
+
+Verification here:
+
+1. Every file is looked up in 04_DATA/.manifest_cache.json by path. If its
+   (size, mtime, inode) match the cached record, the cached hash is used
+   and the file is not read.
+2. The remaining files are hashed in a process pool with streaming reads
+   (HASH_CHUNK blocks, so memory stays flat for large files).
+3. Each hash is compared with the manifest (the .sha256 companion and the
+   markdown table/checksum block):
+
+       ok         hash matches the manifest
+       mismatch   file listed with a different hash (modified since release)
+       unlisted   file not in the manifest (new campaigns, local results)
+
+4. The summary reports how many files were hashed vs skipped and the
+   hashing throughput in MB/s.
+
+With --write, the manifest is regenerated from the files on disk: the
+markdown table (existing Cases/Description cells are kept, new raw files
+are added with their case count), its checksum block, and the .sha256
+companion covering 04_DATA/raw and 04_DATA/local_verified (paths relative
+to 04_DATA/raw, as the README's `sha256sum -c` command expects). With FILE
+arguments, --write merges: only the given files are added or updated and
+every other row and checksum line is kept. A file whose hash no longer
+matches its manifest entry is not overwritten unless --accept-mismatch is
+given, so a modified release file is not silently re-blessed.
+
+Loaders (analyze_raw_data.load_json, the parse cache) verify in-process
+with verify_file(), which is memoized per process and seeded from the same
+stat cache.
+
+Usage:
+    python3 scripts/manifest.py                  # Verify raw + local_verified
+    python3 scripts/manifest.py --workers 8      # Hash pool size
+    python3 scripts/manifest.py --rehash         # Ignore the stat cache
+    python3 scripts/manifest.py --write          # Regenerate the table and .sha256
+    python3 scripts/manifest.py FILE ...         # Verify specific files
+    python3 scripts/manifest.py FILE --write     # Add/update only these files
+    python3 scripts/manifest.py --write --accept-mismatch   # Also re-hash modified files
+
+================================================================================
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from include_store import sha256_file
+
+MANIFEST_FILE = Path(__file__).parent.parent / "DATA_MANIFEST.md"
+RAW_DIR = Path(__file__).parent.parent / "04_DATA" / "raw"
+LOCAL_DIR = Path(__file__).parent.parent / "04_DATA" / "local_verified"
+CHECKSUM_FILE = Path(__file__).parent.parent / "04_DATA" / "DATA_MANIFEST.sha256"
+STAT_CACHE_FILE = Path(__file__).parent.parent / "04_DATA" / ".manifest_cache.json"
+
+# Streaming read size for hashing
+HASH_CHUNK = 1 << 20
+
+# Below this many files to hash, a process pool costs more than it saves
+POOL_MIN_FILES = 8
+
+_CHECKSUM_LINE = re.compile(r"^([0-9a-f]{64})\s+\*?(\S+)\s*$", re.M)
+_TABLE_ROW = re.compile(r"^\|\s*`([^`]+)`\s*\|[^|]*\|\s*`([0-9a-f]{64})`", re.M)
+_CHECKSUM_HEADER = "# SHA-256 Checksums for 04_DATA/raw/"
+
+_hash_memo: Dict[Tuple, str] = {}
+_manifest_memo: Dict[Tuple, Dict[str, str]] = {}
+
+
+def manifest_name(path: Path) -> str:
+    """Name of a file in the manifest: its path relative to 04_DATA/raw."""
+    return os.path.relpath(Path(path).resolve(), RAW_DIR.resolve())
+
+
+def _stat_key(path: Path) -> Tuple:
+    st = Path(path).stat()
+    return (str(Path(path).resolve()), st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def load_stat_cache(path: Path = STAT_CACHE_FILE) -> Dict[str, Dict]:
+    """Resolved path -> {size, mtime_ns, ino, sha256} of previously hashed files."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_stat_cache(cache: Dict[str, Dict], path: Path = STAT_CACHE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _seed_memo():
+    if _hash_memo:
+        return
+    for p, rec in load_stat_cache().items():
+        _hash_memo[(p, rec["size"], rec["mtime_ns"], rec["ino"])] = rec["sha256"]
+
+
+def file_hash(path: Path) -> str:
+    """sha256_file, memoized on (path, size, mtime, inode) for the process and from the stat cache."""
+    _seed_memo()
+    key = _stat_key(path)
+    if key not in _hash_memo:
+        _hash_memo[key] = sha256_file(path, HASH_CHUNK)
+    return _hash_memo[key]
+
+
+def _hash_one(path: str) -> str:
+    return sha256_file(Path(path), HASH_CHUNK)
+
+
+def hash_files(paths: List[Path], workers: Optional[int] = None, cache: Optional[Dict[str, Dict]] = None) -> Dict:
+    """
+    SHA-256 of every path, reading only files whose (size, mtime, inode)
+    changed since they were cached. Updates cache in place; returns
+    {hashes, hashed, skipped, bytes_hashed, bytes_total, seconds}.
+    """
+    cache = {} if cache is None else cache
+    hashes, todo = {}, []
+    bytes_total = 0
+    for path in paths:
+        key = _stat_key(path)
+        bytes_total += key[1]
+        rec = cache.get(key[0])
+        if rec and (rec["size"], rec["mtime_ns"], rec["ino"]) == key[1:]:
+            hashes[path] = rec["sha256"]
+        else:
+            todo.append((path, key))
+
+    start = time.monotonic()
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(todo) >= POOL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            digests = list(ex.map(_hash_one, [str(p) for p, _ in todo],
+                                  chunksize=max(1, len(todo) // (workers * 4))))
+    else:
+        digests = [_hash_one(str(p)) for p, _ in todo]
+    seconds = time.monotonic() - start
+
+    for (path, key), digest in zip(todo, digests):
+        hashes[path] = digest
+        cache[key[0]] = {"size": key[1], "mtime_ns": key[2], "ino": key[3], "sha256": digest}
+        _hash_memo[key] = digest
+    return {"hashes": hashes, "hashed": len(todo), "skipped": len(paths) - len(todo),
+            "bytes_hashed": sum(k[1] for _, k in todo), "bytes_total": bytes_total, "seconds": seconds}
+
+
+def read_manifest(path: Path = MANIFEST_FILE, checksum_file: Path = CHECKSUM_FILE) -> Dict[str, str]:
+    """Manifest name -> SHA-256 from the markdown table, its checksum block and the .sha256 companion."""
+    hashes = {}
+    for p in (Path(path), Path(checksum_file)):
+        if not p.exists():
+            continue
+        st = p.stat()
+        key = (str(p.resolve()), st.st_size, st.st_mtime_ns)
+        if key not in _manifest_memo:
+            text = p.read_text()
+            found = {name: h for name, h in _TABLE_ROW.findall(text)}
+            # The checksum lines are what sha256sum -c reads, so they win over the table
+            found.update({name: h for h, name in _CHECKSUM_LINE.findall(text)})
+            _manifest_memo[key] = found
+        hashes.update(_manifest_memo[key])
+    return hashes
+
+
+def verify_file(path: Path, manifest: Optional[Dict[str, str]] = None) -> Tuple[str, str]:
+    """(status, sha256) of a file: status is "ok", "mismatch" or "unlisted"."""
+    manifest = read_manifest() if manifest is None else manifest
+    digest = file_hash(path)
+    expected = manifest.get(manifest_name(path))
+    if expected is None:
+        return "unlisted", digest
+    return ("ok" if expected == digest else "mismatch"), digest
+
+
+def data_files(dirs=(RAW_DIR, LOCAL_DIR)) -> List[Path]:
+    return [p for d in dirs for p in sorted(Path(d).glob("*.json"))]
+
+
+def _count_cases(path: Path) -> str:
+    from analyze_raw_data import _case_records
+    try:
+        with open(path) as f:
+            n = sum(1 for _ in _case_records(json.load(f)))
+    except (OSError, ValueError):
+        return "—"
+    return str(n) if n else "—"
+
+
+def write_manifest(hashes: Dict[Path, str], path: Path = MANIFEST_FILE, checksum_file: Path = CHECKSUM_FILE,
+                   merge: bool = False):
+    """
+    Regenerate the raw file table, its checksum block and the .sha256
+    companion. With merge, hashes covers only some files: the entries of
+    every other file are kept instead of being dropped as deleted.
+    """
+    raw = {manifest_name(p): h for p, h in hashes.items() if Path(p).parent.resolve() == RAW_DIR.resolve()}
+    text = Path(path).read_text() if Path(path).exists() else ""
+    lines = text.splitlines()
+
+    # Table: update hashes in place, drop rows of deleted files, append new files
+    listed, last_row, out = set(), None, []
+    for line in lines:
+        m = _TABLE_ROW.match(line)
+        if m:
+            name = m.group(1)
+            if name not in raw:
+                if merge:
+                    out.append(line)
+                    last_row = len(out)
+                continue
+            listed.add(name)
+            out.append(line.replace(m.group(2), raw[name]))
+            last_row = len(out)
+        else:
+            out.append(line)
+    new_rows = [f"| `{name}` | {_count_cases(RAW_DIR / name)} | `{raw[name]}` | — |"
+                for name in sorted(set(raw) - listed)]
+    if last_row is not None:
+        out[last_row:last_row] = new_rows
+    else:
+        out += ["", "| File | Cases | SHA-256 Hash | Description |",
+                "|:-----|------:|:-------------|:------------|"] + new_rows
+    table = [m.groups() for m in map(_TABLE_ROW.match, out) if m]
+
+    # Checksum block: the table's files in table order
+    block = [_CHECKSUM_HEADER] + [f"{h}  {name}" for name, h in table]
+    if _CHECKSUM_HEADER in out:
+        start = out.index(_CHECKSUM_HEADER)
+        end = next(i for i in range(start, len(out)) if out[i].startswith("```"))
+        out[start:end] = block
+    else:
+        out += ["", "```"] + block + ["```"]
+    Path(path).write_text("\n".join(out) + "\n")
+
+    entries = {}
+    if merge and Path(checksum_file).exists():
+        entries = {name: h for h, name in _CHECKSUM_LINE.findall(Path(checksum_file).read_text())}
+    entries.update({manifest_name(p): h for p, h in hashes.items()})
+    with open(checksum_file, 'w') as f:
+        for name in sorted(entries):
+            f.write(f"{entries[name]}  {name}\n")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Verify data files against DATA_MANIFEST.md")
+    parser.add_argument("files", type=Path, nargs="*",
+                        help="Files to verify (default: 04_DATA/raw and 04_DATA/local_verified)")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_FILE, help="Manifest file")
+    parser.add_argument("--checksums", type=Path, default=CHECKSUM_FILE, help=".sha256 companion file")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: all cores)")
+    parser.add_argument("--rehash", action="store_true", help="Hash every file, ignoring the stat cache")
+    parser.add_argument("--write", action="store_true",
+                        help="Regenerate the manifest table and .sha256 file (only the given FILEs, if any)")
+    parser.add_argument("--accept-mismatch", action="store_true",
+                        help="With --write, overwrite the manifest hash of files that no longer match it")
+    parser.add_argument("--quiet", action="store_true", help="Only list files that are not ok")
+    args = parser.parse_args()
+
+    files = args.files or data_files()
+    stored = load_stat_cache()
+    cache = {} if args.rehash else stored
+    run = hash_files(files, args.workers, cache)
+    stored.update(cache)
+    save_stat_cache({p: rec for p, rec in stored.items() if os.path.exists(p)})
+
+    manifest = read_manifest(args.manifest, args.checksums)
+    counts = {"ok": 0, "mismatch": 0, "unlisted": 0}
+    icons = {"ok": "✅", "mismatch": "❌", "unlisted": "⚠️ "}
+    for path in files:
+        digest = run["hashes"][path]
+        expected = manifest.get(manifest_name(path))
+        status = "unlisted" if expected is None else ("ok" if expected == digest else "mismatch")
+        counts[status] += 1
+        if status != "ok" or not args.quiet:
+            print(f"{icons[status]} {status:<9} {digest[:16]}  {manifest_name(path)}")
+
+    mb = run["bytes_hashed"] / 1e6
+    print(f"\n{counts['ok']} ok, {counts['mismatch']} mismatch, {counts['unlisted']} unlisted "
+          f"({len(files)} files, {run['bytes_total']/1e6:.1f} MB)")
+    if run["hashed"]:
+        rate = mb / run["seconds"] if run["seconds"] > 0 else float("inf")
+        print(f"Hashed {run['hashed']} file(s), {mb:.1f} MB in {run['seconds']:.2f}s ({rate:.1f} MB/s); "
+              f"{run['skipped']} unchanged file(s) skipped")
+    else:
+        print(f"All {run['skipped']} file(s) unchanged since the last verification, nothing hashed")
+
+    if args.write and counts["mismatch"] and not args.accept_mismatch:
+        print(f"\n❌ Not writing: {counts['mismatch']} file(s) no longer match the manifest. "
+              f"Re-run with --accept-mismatch to record their new hashes.")
+        raise SystemExit(1)
+    if args.write:
+        write_manifest(run["hashes"], args.manifest, args.checksums, merge=bool(args.files))
+        print(f"\n✅ {'Updated' if args.files else 'Regenerated'} {args.manifest.name} and {args.checksums.name}")
+    elif counts["mismatch"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+MC DESIGN — Quasi-Monte Carlo perturbations and sequential stopping
+================================================================================
+
+run_mc_batch perturbs three inputs per case (k_azi ±5%, spring stiffness
+±5%, bow ±5 µm). With i.i.d. draws, a 10-case batch can easily leave a
+corner of that cube unsampled, and every batch runs its full n_cases even
+when the CV has long been pinned down.
+
+This module provides:
+
+1. unit_design(): n points in [0,1)^3 from i.i.d. draws, a scrambled Sobol
+   sequence or a Latin hypercube (scipy.stats.qmc). A batch draws its QMC
+   points as RQMC_REPLICATES independent scrambles, interleaved so that
+   case i belongs to replicate i mod R (rqmc_replicate). Sobol prefixes stay
+   balanced as the batch grows, so it is the design to combine with
+   sequential stopping; a Latin hypercube is only stratified over the full n.
+2. SequentialStopper: after each solved case, the 95% half-widths of the
+   mean (relative) and of the CV (absolute) are compared with targets; the
+   batch stops once both are met. For i.i.d. draws these are the t interval
+   and the McKay standard error. QMC points are not independent, so for
+   Sobol and LHS the intervals come from the spread of the per-replicate
+   means and CVs (randomized QMC, t with R-1 degrees of freedom).
+3. draw_mc_cases(): the (case_id, params) list of a batch, shared by
+   run_mc_batch and the campaign spec compiler.
+4. MCSeeder: counter-based seeding. Each case draws from its own stream,
+   SeedSequence(root, spawn_key=(campaign, batch, index)), so its inputs do
+   not depend on execution order, on earlier batches or on which other
+   cases run. Any subset of a batch (indices=...) can be drawn on any worker
+   and is bit-identical to the same cases of a full run. QMC designs are
+   scrambled from the (campaign, batch) stream and case i takes point i.
+
+Usage:
+    python3 scripts/run_killshot_campaign.py --campaign 6 --mc-design sobol --ci-cv 0.5 --ci-mean 1.0
+    python3 scripts/mc_design.py --n 64     # Discrepancy of each design
+
+================================================================================
+"""
+
+import hashlib
+import warnings
+import numpy as np
+from scipy import stats
+from scipy.stats import qmc
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from cliff_sampler import cv_standard_error
+
+DESIGNS = ("iid", "sobol", "lhs")
+
+# Perturbed inputs: k_azi factor, stiffness factor, bow
+N_DIMS = 3
+
+# Independent scrambles per QMC batch; their spread gives the error estimate
+RQMC_REPLICATES = 4
+
+
+def _scrambled(n: int, method: str, seed: int) -> np.ndarray:
+    if method == "sobol":
+        with warnings.catch_warnings():
+            # Prefixes that are not powers of two are still well balanced
+            warnings.simplefilter("ignore", UserWarning)
+            return qmc.Sobol(d=N_DIMS, scramble=True, seed=seed).random(n)
+    if method == "lhs":
+        return qmc.LatinHypercube(d=N_DIMS, seed=seed).random(n)
+    raise ValueError(f"Unknown design {method!r}; expected one of {DESIGNS}")
+
+
+def rqmc_replicate(index: int, replicates: int = RQMC_REPLICATES) -> int:
+    """Replicate (independent scramble) that point `index` of a QMC batch comes from."""
+    return index % replicates
+
+
+def unit_design(n: int, method: str = "iid", rng: Optional[np.random.Generator] = None,
+                replicates: int = 1) -> np.ndarray:
+    """
+    n points in [0,1)^3; QMC designs are scrambled with seeds drawn from rng.
+
+    With replicates > 1, a QMC design is made of that many independent
+    scrambles, interleaved: point i is point i // R of replicate i % R.
+    """
+    rng = rng if rng is not None else np.random.default_rng(42)
+    if method == "iid":
+        return rng.random((n, N_DIMS))
+    if method not in DESIGNS:
+        raise ValueError(f"Unknown design {method!r}; expected one of {DESIGNS}")
+    per = -(-n // replicates)
+    reps = [_scrambled(per, method, int(rng.integers(2**32))) for _ in range(replicates)]
+    return np.array([reps[rqmc_replicate(i, replicates)][i // replicates] for i in range(n)]).reshape(n, N_DIMS)
+
+
+def perturbations(u: np.ndarray, tol: float = 0.05, bow_max: float = 5e-6) -> List[Dict]:
+    """Map unit points to the run_mc_batch perturbations (same ranges as the i.i.d. draws)."""
+    return [{"k_azi_factor": 1 + tol * (2 * a - 1),
+             "stiffness_scale": 1 + tol * (2 * b - 1),
+             "bow": -bow_max + 2 * bow_max * c} for a, b, c in u]
+
+
+def _label_key(label: str) -> int:
+    """Stable 32-bit integer for a campaign or batch name (hash() is salted per process)."""
+    return int(hashlib.sha256(str(label).encode()).hexdigest()[:8], 16)
+
+
+class MCSeeder:
+    """Random streams keyed by (root, campaign, batch, case index) instead of draw order."""
+
+    def __init__(self, root: int, campaign: str):
+        self.root = root
+        self.campaign = campaign
+
+    def sequence(self, batch: str, index: Optional[int] = None) -> np.random.SeedSequence:
+        key = (_label_key(self.campaign), _label_key(batch)) + ((index,) if index is not None else ())
+        return np.random.SeedSequence(self.root, spawn_key=key)
+
+    def rng(self, batch: str, index: Optional[int] = None) -> np.random.Generator:
+        """Stream of one case (index given) or of a whole batch design (index None)."""
+        return np.random.default_rng(self.sequence(batch, index))
+
+
+def draw_mc_cases(name: str, n_cases: int, base_params: Dict, rng: Union[MCSeeder, np.random.Generator],
+                  design: str = "iid", indices: Optional[Iterable[int]] = None) -> List[Tuple[str, Dict]]:
+    """
+    Draw the (case_id, params) list of a Monte Carlo batch in seed order.
+
+    With an MCSeeder, case `seed` of batch `name` is drawn from its own
+    stream, and indices selects a subset of the n_cases seeds. A plain
+    Generator is consumed sequentially, as in the original campaigns, and
+    then the whole batch must be drawn. "sobol" and "lhs" place the same
+    ±5% / ±5 µm perturbations on RQMC_REPLICATES interleaved scrambles of a
+    low-discrepancy design.
+    """
+    seeded = isinstance(rng, MCSeeder)
+    if indices is not None and not seeded:
+        raise ValueError("drawing a subset of a batch needs an MCSeeder")
+    if design != "iid":
+        draws = perturbations(unit_design(n_cases, design, rng.rng(name) if seeded else rng,
+                                          replicates=RQMC_REPLICATES))
+    cases = []
+    for seed in (range(n_cases) if indices is None else indices):
+        k_azi_base = base_params.get("k_azi", 0.5)
+        if design == "iid":
+            case_rng = rng.rng(name, seed) if seeded else rng
+            k_azi_perturbed = k_azi_base * (1 + 0.05 * (2 * case_rng.random() - 1))
+            stiffness_scale = 1.0 + 0.05 * (2 * case_rng.random() - 1)
+            bow = case_rng.uniform(-5e-6, 5e-6)
+        else:
+            k_azi_perturbed = k_azi_base * draws[seed]["k_azi_factor"]
+            stiffness_scale = draws[seed]["stiffness_scale"]
+            bow = draws[seed]["bow"]
+
+        case_id = f"{name}_seed{seed}"
+        params = {**base_params}
+        params["k_azi"] = k_azi_perturbed
+        params["stiffness"] = 1.5e5 * stiffness_scale
+        params["bow"] = bow
+        params["k_azi_base"] = k_azi_base
+        params["seed"] = seed
+        cases.append((case_id, params))
+    return cases
+
+
+def halfwidths(n: int, mean: float, sd: float, confidence: float = 0.95) -> Dict:
+    """Half-widths of the mean (t interval, % of mean) and of the CV (McKay, percentage points)."""
+    if n < 2 or mean == 0:
+        return {"n": n, "mean_halfwidth_pct": np.inf, "cv_halfwidth_pct": np.inf}
+    t = stats.t.ppf(0.5 + confidence / 2, n - 1)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    cv = sd / mean
+    return {"n": n,
+            "mean_halfwidth_pct": float(t * sd / np.sqrt(n) / abs(mean) * 100),
+            "cv_pct": float(cv * 100),
+            "cv_halfwidth_pct": float(z * cv_standard_error(cv, n) * 100)}
+
+
+def rqmc_halfwidths(values: List[float], replicates: List[int], confidence: float = 0.95) -> Dict:
+    """
+    Half-widths of the mean (% of mean) and of the CV (percentage points)
+    from the spread of the per-replicate estimates of a randomized QMC batch.
+    """
+    arr = np.asarray(values, dtype=float)
+    groups = [arr[np.asarray(replicates) == r] for r in sorted(set(replicates))]
+    means = np.array([g.mean() for g in groups])
+    cvs = np.array([g.std(ddof=1) / g.mean() for g in groups if len(g) > 1 and g.mean() != 0])
+    mean = float(means.mean()) if len(means) else 0.0
+    out = {"n": len(arr), "replicates": len(groups), "mean_halfwidth_pct": np.inf, "cv_halfwidth_pct": np.inf,
+           "cv_pct": float(arr.std(ddof=1) / arr.mean() * 100) if len(arr) > 1 and arr.mean() != 0 else np.nan}
+    q = 0.5 + confidence / 2
+    if len(means) > 1 and mean != 0:
+        r = len(means)
+        out["mean_halfwidth_pct"] = float(stats.t.ppf(q, r - 1) * means.std(ddof=1) / np.sqrt(r) / abs(mean) * 100)
+    if len(cvs) > 1:
+        r = len(cvs)
+        out["cv_halfwidth_pct"] = float(stats.t.ppf(q, r - 1) * cvs.std(ddof=1) / np.sqrt(r) * 100)
+    return out
+
+
+class SequentialStopper:
+    """
+    Stop a batch once the mean and CV confidence intervals are narrow enough.
+
+    Pass the RQMC replicate of every value (rqmc_replicate of its seed) for
+    Sobol and LHS batches; without them the values are treated as i.i.d.
+    """
+
+    def __init__(self, mean_halfwidth_pct: Optional[float] = None, cv_halfwidth_pct: Optional[float] = None,
+                 min_cases: int = 8, confidence: float = 0.95):
+        self.mean_halfwidth_pct = mean_halfwidth_pct
+        self.cv_halfwidth_pct = cv_halfwidth_pct
+        self.min_cases = min_cases
+        self.confidence = confidence
+
+    def intervals(self, values: List[float], replicates: Optional[List[int]] = None) -> Dict:
+        """Half-widths of the mean (% of mean) and of the CV (percentage points)."""
+        if replicates is not None:
+            return rqmc_halfwidths(values, replicates, self.confidence)
+        arr = np.asarray(values, dtype=float)
+        n = len(arr)
+        return halfwidths(n, arr.mean() if n else 0.0, arr.std(ddof=1) if n > 1 else 0.0, self.confidence)
+
+    def done(self, values: List[float], replicates: Optional[List[int]] = None) -> bool:
+        if len(values) < self.min_cases:
+            return False
+        ci = self.intervals(values, replicates)
+        ok_mean = self.mean_halfwidth_pct is None or ci["mean_halfwidth_pct"] <= self.mean_halfwidth_pct
+        ok_cv = self.cv_halfwidth_pct is None or ci["cv_halfwidth_pct"] <= self.cv_halfwidth_pct
+        return ok_mean and ok_cv
+
+    @property
+    def active(self) -> bool:
+        return self.mean_halfwidth_pct is not None or self.cv_halfwidth_pct is not None
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare MC perturbation designs")
+    parser.add_argument("--n", type=int, default=64, help="Points per design")
+    parser.add_argument("--reps", type=int, default=20, help="Repetitions per design")
+    args = parser.parse_args()
+
+    print(f"\n{'Design':<8} {'Mean L2-star discrepancy':>26} {'Worst':>10}  (n={args.n}, {args.reps} reps)")
+    print("-" * 50)
+    rng = np.random.default_rng(0)
+    for method in DESIGNS:
+        d = [qmc.discrepancy(unit_design(args.n, method, rng), method="L2-star") for _ in range(args.reps)]
+        print(f"{method:<8} {np.mean(d):>26.2e} {np.max(d):>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
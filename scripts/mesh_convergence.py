@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+MESH CONVERGENCE DRIVER — Refine until Richardson says the mesh is good enough
+================================================================================
+
+The fixed study solves N = 25, 30, 40, 50, 70 and only afterwards looks at
+the last change. This driver refines one level at a time and, after every
+solve with three or more levels, estimates:
+
+- the observed order of convergence p from the three finest solutions
+  (Celik et al. GCI procedure, which handles non-constant refinement ratios
+  with h = 1/n_radial),
+- the Richardson-extrapolated W_pv, and
+- the discretization error of the finest mesh, as the grid convergence
+  index GCI = 1.25·|e_a| / (r^p − 1).
+
+Refinement stops as soon as that error is below the tolerance. If the three
+finest solutions oscillate (no monotone convergence, p undefined), the
+driver falls back to the half-spread of those solutions as the error
+estimate and keeps refining.
+
+Once converged, every solved level is scored against the extrapolated value
+and the cheapest (n_radial, element type) within tolerance is recommended and
+written to 04_DATA/local_verified/mesh_recommendation.json, which later
+campaigns can apply (run_killshot_campaign.py --recommended-mesh).
+
+Usage:
+    python3 scripts/run_local_fea.py --mesh-convergence
+    python3 scripts/run_local_fea.py --mesh-convergence --mesh-tol 0.02 --elements C3D8 S4R
+    python3 scripts/mesh_convergence.py 04_DATA/local_verified/mesh_convergence_c3d8_local.json
+
+================================================================================
+"""
+
+import json
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+RECOMMENDATION_FILE = Path(__file__).parent.parent / "04_DATA" / "local_verified" / "mesh_recommendation.json"
+
+# Refinement ladder; the expensive end is only reached when needed
+DEFAULT_LEVELS = (25, 30, 40, 50, 70, 100)
+
+# GCI safety factor for three-grid studies
+GCI_SAFETY = 1.25
+
+# Bounds on the observed order (the formal order of linear hexes is 2)
+P_MIN, P_MAX = 0.5, 4.0
+
+
+def observed_order(h: List[float], f: List[float], iters: int = 50) -> Optional[float]:
+    """
+    Observed order from three solutions on meshes h[0] > h[1] > h[2].
+
+    Fixed-point iteration of p = |ln|e32/e21| + q(p)| / ln r21 with
+    q(p) = ln((r21^p − s)/(r32^p − s)). Returns None for oscillatory or
+    stagnant sequences.
+    """
+    e21 = f[1] - f[0]
+    e32 = f[2] - f[1]
+    if e21 == 0 or e32 == 0:
+        return None
+    s = np.sign(e32 / e21)
+    if s < 0:
+        return None
+    r21 = h[0] / h[1]
+    r32 = h[1] / h[2]
+    p = 2.0
+    for _ in range(iters):
+        q = np.log((r32 ** p - s) / (r21 ** p - s))
+        p_new = abs(np.log(abs(e21 / e32)) + q) / np.log(r32)
+        if abs(p_new - p) < 1e-8:
+            p = p_new
+            break
+        p = p_new
+    if not np.isfinite(p):
+        return None
+    return float(np.clip(p, P_MIN, P_MAX))
+
+
+def richardson(h: List[float], f: List[float]) -> Dict:
+    """Extrapolated value and fine-mesh error estimate from the three finest levels."""
+    h, f = list(h[-3:]), list(f[-3:])
+    p = observed_order(h, f)
+    if p is None:
+        spread = (max(f) - min(f)) / 2
+        return {"order": None, "extrapolated": float(np.mean(f)),
+                "error": abs(spread / f[-1]) if f[-1] else np.inf, "oscillatory": True}
+    r = h[1] / h[2]
+    f_ext = (r ** p * f[2] - f[1]) / (r ** p - 1)
+    e_a = abs((f[2] - f[1]) / f[2]) if f[2] else np.inf
+    return {"order": p, "extrapolated": float(f_ext),
+            "error": float(GCI_SAFETY * e_a / (r ** p - 1)), "oscillatory": False}
+
+
+class MeshConvergenceDriver:
+    """Refine one level at a time until the estimated discretization error is below tol."""
+
+    def __init__(self, solve: Callable[[int], Optional[Dict]], element_type: str = "C3D8",
+                 levels=DEFAULT_LEVELS, tol: float = 0.05, key: str = "W_pv_nm"):
+        self.solve = solve
+        self.element_type = element_type
+        self.levels = sorted(levels)
+        self.tol = tol
+        self.key = key
+        self.results: List[Dict] = []
+        self.estimates: List[Dict] = []
+
+    def run(self) -> Dict:
+        for n_radial in self.levels:
+            result = self.solve(n_radial)
+            if result is None:
+                continue
+            self.results.append({**result, "n_radial": n_radial})
+            if len(self.results) < 3:
+                continue
+            est = richardson([1.0 / r["n_radial"] for r in self.results],
+                             [r[self.key] for r in self.results])
+            est["n_radial"] = n_radial
+            self.estimates.append(est)
+            order = f"p={est['order']:.2f}" if est["order"] is not None else "oscillatory"
+            print(f"    Richardson after N={n_radial}: {order}, W_ext={est['extrapolated']:.1f} nm, "
+                  f"est. error {est['error']*100:.2f}% (tol {self.tol*100:.1f}%)")
+            if est["error"] < self.tol:
+                break
+        return self.summary()
+
+    def summary(self) -> Dict:
+        est = self.estimates[-1] if self.estimates else None
+        converged = est is not None and est["error"] < self.tol
+        levels = []
+        for r in self.results:
+            err = abs(r[self.key] - est["extrapolated"]) / abs(est["extrapolated"]) if est else None
+            levels.append({"n_radial": r["n_radial"], "element_type": self.element_type,
+                           "node_count": r.get("node_count"), "solver_time_s": r.get("solver_time_s"),
+                           self.key: r[self.key], "error_vs_extrapolated": err})
+        return {"element_type": self.element_type, "tolerance": self.tol, "converged": converged,
+                "n_solved": len(self.results), "final_estimate": est, "history": self.estimates,
+                "levels": levels}
+
+
+def recommend(studies: List[Dict], tol: float) -> Optional[Dict]:
+    """Cheapest solved (n_radial, element type) within tol of its extrapolated value."""
+    candidates = [lvl for s in studies if s["converged"] for lvl in s["levels"]
+                  if lvl["error_vs_extrapolated"] is not None and lvl["error_vs_extrapolated"] < tol]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda l: (l["solver_time_s"] or np.inf, l["node_count"] or np.inf))
+    return {"n_radial": best["n_radial"], "element_type": best["element_type"],
+            "node_count": best["node_count"], "solver_time_s": best["solver_time_s"],
+            "error_vs_extrapolated": best["error_vs_extrapolated"], "tolerance": tol,
+            "timestamp": datetime.now().isoformat()}
+
+
+def save_recommendation(rec: Dict, path: Path = RECOMMENDATION_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(rec, f, indent=2)
+
+
+def load_recommendation(path: Path = RECOMMENDATION_FILE) -> Optional[Dict]:
+    """Mesh parameters to apply to later campaigns, or None if no study has converged."""
+    if not path.exists():
+        return None
+    with open(path) as f:
+        rec = json.load(f)
+    return {"n_radial": rec["n_radial"], "element_type": rec["element_type"]}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Richardson analysis of an existing mesh convergence study")
+    parser.add_argument("results", type=Path, help="Mesh convergence JSON (with a 'cases' list)")
+    parser.add_argument("--tol", type=float, default=0.05, help="Relative error tolerance")
+    args = parser.parse_args()
+
+    with open(args.results) as f:
+        cases = json.load(f)["cases"]
+    # A study run with several --elements holds one level per (element type, N)
+    by_level = {(c.get("element_type", "C3D8"), c["n_radial"]): c for c in cases}
+    element_types = list(dict.fromkeys(et for et, _ in by_level))
+
+    summaries = []
+    for element_type in element_types:
+        levels = sorted(n for et, n in by_level if et == element_type)
+        # Replay the study level by level as the driver would have run it
+        driver = MeshConvergenceDriver(lambda n, et=element_type: by_level.get((et, n)),
+                                       element_type=element_type, levels=levels, tol=args.tol)
+        summary = driver.run()
+        summaries.append(summary)
+
+        print(f"\n{element_type}:")
+        print(f"{'N':>6} {'Nodes':>10} {'W_pv (nm)':>12} {'Err vs ext':>11} {'Time':>8}")
+        print("-" * 52)
+        for lvl in summary["levels"]:
+            err = f"{lvl['error_vs_extrapolated']*100:.2f}%" if lvl["error_vs_extrapolated"] is not None else "-"
+            print(f"{lvl['n_radial']:>6} {lvl['node_count']:>10} {lvl['W_pv_nm']:>12.1f} {err:>11} "
+                  f"{lvl['solver_time_s']:>7.1f}s")
+    rec = recommend(summaries, args.tol)
+    if rec:
+        print(f"\n✅ Cheapest mesh within {args.tol*100:.1f}%: N={rec['n_radial']} {rec['element_type']}")
+    else:
+        print(f"\n⚠️  Not converged to {args.tol*100:.1f}% — refine further")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+NEIGHBOURS — Nearest solved cases and interpolated W_pv over the parameter space
+================================================================================
+
+"What W_pv would k_azi=0.73, n_harmonic=3, gradient_z give?" used to mean a
+new FEA run even when kazi_dense_sweep, harmonic_sweep and the cross-load
+sweep hold solved cases right next to it. This index answers from them:
+
+1. Corpus cases (the case store's in_corpus rows) are partitioned by the
+   categorical inputs (load, material). Within a partition, the continuous
+   inputs (k_azi, k_edge, n_harmonic, stiffness_scale, bow_um) are divided
+   by a per-input scale and put in a k-d tree (scipy cKDTree).
+2. A lookup returns the k nearest solved cases of the query's partition and
+   an inverse-distance-weighted estimate of W_pv, interpolated in log space
+   like the surrogate (W_pv spans orders of magnitude across the cliff).
+3. Confidence is the weighted mean of exp(−d²/2) over the neighbours, with d
+   in scale units: 1 on a solved point, ≈0.6 with neighbours one scale away,
+   0 for a partition with no solved cases. Confidence only measures
+   distance: spread_pct, the scatter of the neighbours' log W_pv (NaN for a
+   single neighbour), shows whether they agree. On the cliff, neighbours
+   within one scale differ by orders of magnitude.
+
+The scales say how far apart two cases may be and still describe the same
+physics. The k_azi scale (0.05) is about the ARD length scale the surrogate
+fits for k_azi; the others cover the Monte Carlo tolerances (±5% stiffness,
+±5 µm bow). n_harmonic is continuous, so n=3 interpolates between the n=2
+and n=4 sweeps. Override with --scale.
+
+A lookup is a tree query plus a few array operations (tens of µs, a few
+µs per case when a candidate list is looked up in one batch), so
+candidate case lists (campaign plan exports, failure_ledger re-run plans,
+surrogate proposals) can be screened before they reach the solver queue.
+A case is answered only when its confidence is at least --min-confidence
+AND its neighbours agree within --max-spread, so chaos-zone cases always go
+to the solver; the rest are written out to be solved.
+
+Usage:
+    python3 scripts/neighbours.py k_azi=0.73 n_harmonic=3 load=gradient_z
+    python3 scripts/neighbours.py k_azi=0.8 material=sic --k 8 --scale k_azi=0.02
+    python3 scripts/neighbours.py --screen cases.json --min-confidence 0.9 --max-spread 5 --out to_solve.json
+
+================================================================================
+"""
+
+import json
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from typing import Dict, List, Optional, Tuple
+
+from analyze_raw_data import case_fields
+from surrogate import CATEGORICAL, CONTINUOUS, NOMINAL_STIFFNESS
+
+# Distance of one unit along each continuous input
+DEFAULT_SCALES = {"k_azi": 0.05, "k_edge": 1.0, "n_harmonic": 1.0, "stiffness_scale": 0.05, "bow_um": 5.0}
+
+DEFAULT_K = 5
+
+# Inverse-distance weight exponent, and the distance treated as an exact hit
+IDW_POWER = 2
+EXACT_DISTANCE = 1e-9
+
+# Screening thresholds: candidates at or above MIN_CONFIDENCE whose
+# neighbours agree within MAX_SPREAD_PCT need no solve. Stable-zone MC
+# scatter is 1–2%; neighbours across the cliff scatter by 100% and more.
+MIN_CONFIDENCE = 0.8
+MAX_SPREAD_PCT = 10.0
+
+# Physics the index does not describe (see analyze_raw_data.case_fields)
+UNINDEXED_EXCLUSIONS = ("physics", "thermal_bc", "pattern", "no_k_azi")
+
+
+class NeighbourIndex:
+    """One k-d tree of scaled continuous inputs per (load, material) partition."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], scales: Optional[Dict[str, float]] = None):
+        self.scales = np.array([{**DEFAULT_SCALES, **(scales or {})}[k] for k in CONTINUOUS])
+        X = np.column_stack([np.asarray(columns[k], dtype=np.float64) for k in CONTINUOUS])
+        wpv = np.asarray(columns["W_pv_nm"], dtype=np.float64)
+        keep = np.all(np.isfinite(X), axis=1) & np.isfinite(wpv) & (wpv > 0)
+        self.columns = {k: np.asarray(v)[keep] for k, v in columns.items()}
+        X, self.log_wpv = X[keep], np.log(wpv[keep])
+
+        keys = list(zip(*(self.columns[k].astype(str) for k in CATEGORICAL)))
+        self.partitions: Dict[Tuple[str, ...], Tuple[cKDTree, np.ndarray]] = {}
+        for key in sorted(set(keys)):
+            rows = np.flatnonzero([k == key for k in keys])
+            self.partitions[key] = (cKDTree(X[rows] / self.scales), rows)
+
+    @classmethod
+    def from_store(cls, scales: Optional[Dict[str, float]] = None) -> "NeighbourIndex":
+        """Index of the corpus cases of the case store."""
+        from case_store import load_store
+        store = load_store()
+        corpus = np.asarray(store["in_corpus"])
+        columns = {}
+        for k in CONTINUOUS + CATEGORICAL + ("W_pv_nm", "case_id", "source"):
+            values = store.decode(k) if k in store.categories else np.asarray(store[k])
+            columns[k] = np.asarray(values)[corpus]
+        return cls(columns, scales)
+
+    def __len__(self) -> int:
+        return len(self.log_wpv)
+
+    def lookup(self, cases: List[Dict], k: int = DEFAULT_K, details: bool = True) -> List[Dict]:
+        """
+        Nearest solved cases and the interpolated W_pv for normalized cases
+        (the CONTINUOUS and CATEGORICAL keys of surrogate.py). Cases of one
+        partition are queried and interpolated in single array operations;
+        details=False leaves out the per-neighbour records.
+        """
+        out: List[Optional[Dict]] = [None] * len(cases)
+        by_partition: Dict[Tuple[str, ...], List[int]] = {}
+        for i, case in enumerate(cases):
+            by_partition.setdefault(tuple(str(case[c]) for c in CATEGORICAL), []).append(i)
+
+        for key, idx in by_partition.items():
+            part = self.partitions.get(key)
+            if part is None:
+                for i in idx:
+                    out[i] = {"W_pv_nm": float("nan"), "confidence": 0.0, "spread_pct": float("nan"),
+                              "neighbours": []}
+                continue
+            tree, rows = part
+            kk = min(k, tree.n)
+            q = np.array([[cases[i][c] for c in CONTINUOUS] for i in idx], dtype=np.float64) / self.scales
+            dist, nn = tree.query(q, k=kk)
+            dist, nn = dist.reshape(len(idx), kk), rows[nn.reshape(len(idx), kk)]
+            y = self.log_wpv[nn]
+
+            exact = dist <= EXACT_DISTANCE
+            with np.errstate(divide="ignore"):
+                w = np.where(exact.any(axis=1, keepdims=True), exact, 1.0 / dist ** IDW_POWER)
+            w /= w.sum(axis=1, keepdims=True)
+            wpv = np.exp(np.sum(w * y, axis=1))
+            confidence = np.sum(w * np.exp(-0.5 * dist ** 2), axis=1)
+            spread = np.std(y, axis=1) * 100 if kk > 1 else np.full(len(idx), np.nan)
+
+            for j, i in enumerate(idx):
+                out[i] = {"W_pv_nm": float(wpv[j]), "confidence": float(confidence[j]),
+                          "spread_pct": float(spread[j]),
+                          "neighbours": self._neighbours(dist[j], nn[j]) if details else []}
+        return out
+
+    def _neighbours(self, dist: np.ndarray, rows: np.ndarray) -> List[Dict]:
+        return [{"case_id": str(self.columns["case_id"][r]), "source": str(self.columns["source"][r]),
+                 "distance": float(d), "W_pv_nm": float(np.exp(self.log_wpv[r])),
+                 **{c: float(self.columns[c][r]) for c in CONTINUOUS}}
+                for r, d in zip(rows, dist)]
+
+
+def normalize_candidate(case: Dict) -> Optional[Dict]:
+    """
+    Normalized inputs of a candidate (flat generator params, or a case-list
+    entry with "params"), or None if its physics is not in the index.
+    """
+    # Placeholder result, so the exclusion reflects the inputs only
+    fields = case_fields({**case.get("params", case), "W_pv_nm": 1.0}, stiffness_ref=NOMINAL_STIFFNESS)
+    if fields["exclusion"] in UNINDEXED_EXCLUSIONS:
+        return None
+    return {k: fields[k] for k in CONTINUOUS + CATEGORICAL}
+
+
+def screen(index: NeighbourIndex, cases: List[Dict], min_confidence: float = MIN_CONFIDENCE,
+           k: int = DEFAULT_K, max_spread_pct: float = MAX_SPREAD_PCT) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Split candidates into (answered, to_solve). A case is answered when its
+    neighbours are close (confidence ≥ min_confidence) and agree (spread_pct
+    ≤ max_spread_pct). Answered cases carry the neighbour estimate as
+    predicted_W_pv_nm, neighbour_confidence and neighbour_spread_pct.
+    """
+    normalized = [normalize_candidate(c) for c in cases]
+    indexable = [i for i, n in enumerate(normalized) if n is not None]
+    results = dict(zip(indexable, index.lookup([normalized[i] for i in indexable], k, details=False)))
+    answered, to_solve = [], []
+    for i, case in enumerate(cases):
+        r = results.get(i)
+        if r is not None and r["confidence"] >= min_confidence and r["spread_pct"] <= max_spread_pct:
+            answered.append({**case, "predicted_W_pv_nm": r["W_pv_nm"], "neighbour_confidence": r["confidence"],
+                             "neighbour_spread_pct": r["spread_pct"]})
+        else:
+            to_solve.append(case)
+    return answered, to_solve
+
+
+def _parse_pairs(pairs: List[str], option: str) -> Dict:
+    out = {}
+    for p in pairs:
+        if "=" not in p:
+            raise SystemExit(f"❌ {option}: expected KEY=VALUE, got {p!r}")
+        k, v = p.split("=", 1)
+        out[k] = v if k in CATEGORICAL else float(v)
+    return out
+
+
+def main():
+    import argparse
+    from pathlib import Path
+    parser = argparse.ArgumentParser(description="Nearest solved cases and interpolated W_pv")
+    parser.add_argument("case", nargs="*", metavar="KEY=VALUE",
+                        help="Query inputs (defaults: the surrogate's baseline case)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Neighbours per lookup")
+    parser.add_argument("--scale", nargs="+", default=[], metavar="KEY=VALUE", help="Override input scales")
+    parser.add_argument("--screen", type=Path, default=None, help="JSON case list to screen")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE,
+                        help="Confidence at which a screened case needs no solve")
+    parser.add_argument("--max-spread", type=float, default=MAX_SPREAD_PCT,
+                        help="Largest neighbour spread (%%) at which a screened case needs no solve")
+    parser.add_argument("--out", type=Path, default=None, help="Write the cases still to solve here")
+    args = parser.parse_args()
+
+    scales = _parse_pairs(args.scale, "--scale")
+    unknown = set(scales) - set(CONTINUOUS)
+    if unknown:
+        raise SystemExit(f"❌ --scale: not a continuous input: {', '.join(sorted(unknown))}")
+
+    t0 = time.perf_counter()
+    index = NeighbourIndex.from_store(scales)
+    print(f"Index: {len(index)} corpus cases in {len(index.partitions)} (load, material) partitions "
+          f"({(time.perf_counter() - t0) * 1000:.0f} ms)")
+
+    if args.screen:
+        with open(args.screen) as f:
+            cases = json.load(f)
+        cases = cases.get("cases", cases) if isinstance(cases, dict) else cases
+        t0 = time.perf_counter()
+        answered, to_solve = screen(index, cases, args.min_confidence, args.k, args.max_spread)
+        dt = (time.perf_counter() - t0) / max(len(cases), 1) * 1e6
+        print(f"\nScreened {len(cases)} case(s) at confidence ≥ {args.min_confidence:g} and spread ≤ "
+              f"{args.max_spread:g}% ({dt:.0f} µs/case)")
+        for c in answered:
+            print(f"  ✅ {c.get('case_id', '?'):<32} W_pv ≈ {c['predicted_W_pv_nm']:.1f} nm "
+                  f"(confidence {c['neighbour_confidence']:.2f}, spread {c['neighbour_spread_pct']:.1f}%)")
+        print(f"  {len(answered)} answered by solved neighbours, {len(to_solve)} to solve")
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(to_solve, f, indent=2)
+            print(f"\n📁 Cases to solve saved: {args.out}")
+        return
+
+    case = {"k_azi": 0.5, "k_edge": 2.0, "n_harmonic": 2, "stiffness_scale": 1.0, "bow_um": 0.0,
+            "load": "scan", "material": "silicon", **_parse_pairs(args.case, "case")}
+    repeats = 2000
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        index.lookup([case], args.k, details=False)
+    dt = (time.perf_counter() - t0) / repeats * 1e6
+    result = index.lookup([case], args.k)[0]
+
+    if not result["neighbours"]:
+        print(f"\n❌ No solved cases with load={case['load']}, material={case['material']}")
+        return
+    print(f"\n{'Case':<30} {'Source':<32} {'k_azi':>6} {'n':>3} {'Dist':>6} {'W_pv (nm)':>11}")
+    print("-" * 93)
+    for n in result["neighbours"]:
+        print(f"{n['case_id'][:30]:<30} {n['source'][:32]:<32} {n['k_azi']:>6.3f} {n['n_harmonic']:>3.0f} "
+              f"{n['distance']:>6.2f} {n['W_pv_nm']:>11.1f}")
+    print(f"\nW_pv ≈ {result['W_pv_nm']:.1f} nm  (confidence {result['confidence']:.2f}, "
+          f"neighbour spread {result['spread_pct']:.1f}%)  [{dt:.0f} µs]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+QUERY CASES — Indexed range/equality queries over every case in the corpus
+================================================================================
+
+Questions like "all scan-load cases with 0.78 ≤ k_azi ≤ 0.84 on SiC with
+status success" used to mean opening JSON files by hand. This tool answers
+them from the case store (case_store.py, built from the analyze_raw_data
+loaders and rebuilt automatically when a data file changes):
+
+1. Every predicate is resolved to a sorted array of row ids through a
+   persisted index: binary search on the sorted index of a numeric column
+   for ranges, the CSR row list of a category for equality.
+2. The row-id arrays are intersected smallest first; only the matching rows
+   of the requested columns are read from the memory-mapped store.
+
+Predicates:
+
+    material=sic              equality (category names are case-insensitive)
+    material=sic,gaas         any of several values
+    0.78<=k_azi<=0.84         range (also <, >, >=, <= on one side)
+    n_radial>=50              numeric columns: k_azi, k_azi_base,
+                              n_harmonic, n_radial, node_count, W_pv_nm
+    n_harmonic=2              numeric equality
+
+Category columns: source, load, material, pattern, element_type,
+thermal_bc, status (success, failed or pending), status_raw (the recorded
+string), exclusion. --corpus restricts to the analysis corpus
+(the cases analyze_raw_data.iter_corpus_cases yields).
+
+Usage:
+    python3 scripts/query_cases.py load=scan "0.78<=k_azi<=0.84" material=sic status=success
+    python3 scripts/query_cases.py material=inp,gan --corpus --format csv > inp_gan.csv
+    python3 scripts/query_cases.py "n_radial>=70" --columns case_id node_count solver_time_s --format json
+
+================================================================================
+"""
+
+import contextlib
+import csv
+import json
+import re
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+
+from case_store import STORE_DIR, CaseStore, load_store
+
+DEFAULT_COLUMNS = ("case_id", "source", "material", "load", "n_harmonic", "k_azi", "n_radial", "status",
+                   "W_pv_nm")
+
+_RANGE = re.compile(r"^\s*([-+\d.eE]+)\s*(<=|<)\s*(\w+)\s*(<=|<)\s*([-+\d.eE]+)\s*$")
+_COMPARE = re.compile(r"^\s*(\w+)\s*(<=|>=|==|=|<|>)\s*(.+?)\s*$")
+
+
+def parse_predicate(text: str) -> Tuple:
+    """("range", column, lo, hi, lo_inclusive, hi_inclusive) or ("equal", column, [values])."""
+    m = _RANGE.match(text)
+    if m:
+        lo, op_lo, column, op_hi, hi = m.groups()
+        return ("range", column, float(lo), float(hi), op_lo == "<=", op_hi == "<=")
+    m = _COMPARE.match(text)
+    if not m:
+        raise ValueError(f"Cannot parse predicate {text!r}")
+    column, op, value = m.groups()
+    if op in ("=", "=="):
+        return ("equal", column, [v.strip() for v in value.split(",")])
+    bound = float(value)
+    if op in (">", ">="):
+        return ("range", column, bound, np.inf, op == ">=", True)
+    return ("range", column, -np.inf, bound, True, op == "<=")
+
+
+def query(store: CaseStore, predicates: List[str], corpus: bool = False) -> np.ndarray:
+    """Sorted row ids matching every predicate."""
+    sets = []
+    for text in predicates:
+        kind, column, *args = parse_predicate(text)
+        if kind == "range":
+            sets.append(store.rows_in_range(column, *args))
+        else:
+            sets.append(store.rows_equal(column, args[0]))
+    if corpus:
+        sets.append(np.flatnonzero(store["in_corpus"]))
+    if not sets:
+        return np.arange(len(store))
+    sets.sort(key=len)
+    rows = sets[0]
+    for other in sets[1:]:
+        rows = np.intersect1d(rows, other, assume_unique=True)
+    return rows
+
+
+def fetch(store: CaseStore, rows: np.ndarray, columns) -> Dict[str, list]:
+    """Values of the requested columns at rows, category codes decoded."""
+    out = {}
+    for name in columns:
+        values = np.asarray(store[name][rows])
+        if name in store.categories:
+            values = store.decode(name, values)
+        out[name] = values.tolist()
+    return out
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        return "" if np.isnan(value) else f"{value:.6g}"
+    return str(value)
+
+
+def main():
+    import argparse
+    from pathlib import Path
+    parser = argparse.ArgumentParser(description="Indexed queries over the case store")
+    parser.add_argument("predicates", nargs="*", help='e.g. load=scan "0.78<=k_azi<=0.84" material=sic')
+    parser.add_argument("--columns", nargs="+", default=list(DEFAULT_COLUMNS), help="Columns to output")
+    parser.add_argument("--corpus", action="store_true", help="Only analysis corpus cases")
+    parser.add_argument("--format", choices=("table", "csv", "json"), default="table")
+    parser.add_argument("--limit", type=int, default=None, help="Print at most this many rows")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="Store directory")
+    args = parser.parse_args()
+
+    # A rebuild may print manifest warnings; keep stdout clean for CSV/JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        store = load_store(args.store)
+    start = time.perf_counter()
+    try:
+        rows = query(store, args.predicates, args.corpus)
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0]}", file=sys.stderr)
+        sys.exit(2)
+    elapsed = time.perf_counter() - start
+    shown = rows[:args.limit] if args.limit is not None else rows
+    data = fetch(store, shown, args.columns)
+    records = [dict(zip(data, values)) for values in zip(*data.values())] if data else []
+
+    if args.format == "json":
+        records = [{k: None if isinstance(v, float) and np.isnan(v) else v for k, v in r.items()}
+                   for r in records]
+        json.dump(records, sys.stdout, indent=2, default=str)
+        print()
+    elif args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(args.columns)
+        for r in records:
+            writer.writerow([_cell(r[c]) for c in args.columns])
+    else:
+        cells = [[_cell(r[c]) for c in args.columns] for r in records]
+        widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(args.columns)]
+        print("  ".join(f"{c:>{w}}" for c, w in zip(args.columns, widths)))
+        print("-" * (sum(widths) + 2 * (len(widths) - 1)))
+        for row in cells:
+            print("  ".join(f"{v:>{w}}" for v, w in zip(row, widths)))
+        print(f"\n{len(rows)} of {len(store)} cases match ({elapsed * 1000:.2f} ms)"
+              + (f", first {len(shown)} shown" if len(shown) < len(rows) else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+RESOURCE USAGE — Peak RSS, CPU time and I/O of every solver process
+================================================================================
+
+Result records used to carry only solver_time_s. The cloud log shows ~2–4 GB
+peak memory for 49k nodes, but nothing was measured in our own runs.
+
+SolverPool now reaps each ccx with wait4(), which returns the rusage of that
+one process, and samples /proc/<pid> on every poll while it runs. Every
+result gets:
+
+    peak_rss_mb          ru_maxrss, or the last sampled VmHWM when ru_maxrss
+                         is only the runner's own RSS inherited at fork
+    cpu_user_s           user CPU time (ru_utime)
+    cpu_sys_s            system CPU time (ru_stime)
+    io_read_bytes        bytes fetched from storage (ru_inblock × 512)
+    io_write_bytes       bytes sent to storage (ru_oublock × 512)
+    threads              threads of the process (configured, else sampled)
+    thread_utilization   CPU time / (wall time × threads)
+
+Linux ru_maxrss includes the pages the child shared with the runner before
+exec(), so for solves smaller than the runner (numpy, scipy) it reports the
+runner; VmHWM is reset by exec() and is used instead. /proc sampling also
+records the largest syscall-level rchar/wchar seen, since data served from
+the page cache never shows up in the block counts.
+
+/proc (VmHWM, Threads, rchar/wchar) exists on Linux only. Elsewhere the
+sampler reads nothing and the record comes from rusage alone: no
+io_*_chars fields, and peak_rss_mb is ru_maxrss as reported. ru_maxrss is in
+kB on Linux but in bytes on macOS; it is converted with MAXRSS_UNIT_BYTES,
+so peak_rss_mb (and the autotune profile built from it) is in MB on both.
+
+The summary fits metric = c · N^b on every local result with a node count
+and prints how each resource scales with mesh size.
+
+Usage:
+    python3 scripts/resource_usage.py                # Scaling summary of 04_DATA/local_verified
+    python3 scripts/resource_usage.py results.jsonl  # Any result JSON/JSONL files
+
+================================================================================
+"""
+
+import json
+import resource
+import sys
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from runtime_model import LOCAL_RESULTS_DIR, iter_result_records
+
+# Scalar fields added to result records
+RESOURCE_FIELDS = ("peak_rss_mb", "cpu_user_s", "cpu_sys_s", "io_read_bytes", "io_write_bytes",
+                   "threads", "thread_utilization")
+
+# ru_inblock / ru_oublock count 512-byte blocks on Linux
+BLOCK_BYTES = 512
+
+# Unit of ru_maxrss: bytes on macOS, kB on Linux (and the other BSDs)
+MAXRSS_UNIT_BYTES = 1 if sys.platform == "darwin" else 1024
+
+
+def maxrss_kb(ru_maxrss: int) -> float:
+    """ru_maxrss in kB, whatever unit the platform reports it in."""
+    return ru_maxrss * MAXRSS_UNIT_BYTES / 1024
+
+
+def _read_proc(path: Path) -> Dict[str, str]:
+    try:
+        with open(path) as f:
+            return dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {}
+
+
+class ProcessSampler:
+    """Latest VmHWM and running maxima of threads and I/O from /proc/<pid> for one process (Linux only)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        # Anything up to the runner's own peak may be inherited from fork
+        self.parent_kb = maxrss_kb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        self.samples = 0
+        self.hwm_kb = 0
+        self.threads = 0
+        self.rchar = 0
+        self.wchar = 0
+
+    def sample(self):
+        status = _read_proc(Path(f"/proc/{self.pid}/status"))
+        if not status:
+            return
+        self.samples += 1
+        # Latest value, not the maximum: early samples may predate exec()
+        self.hwm_kb = int(status.get("VmHWM", "0 kB").split()[0])
+        self.threads = max(self.threads, int(status.get("Threads", "0").strip() or 0))
+        io = _read_proc(Path(f"/proc/{self.pid}/io"))
+        if io:
+            self.rchar = max(self.rchar, int(io.get("rchar", 0)))
+            self.wchar = max(self.wchar, int(io.get("wchar", 0)))
+
+
+def usage_record(rusage, sampler: Optional[ProcessSampler], wall_s: float,
+                 threads: Optional[int] = None) -> Dict:
+    """Resource fields of one finished process from its wait4() rusage and /proc samples."""
+    if rusage is None:
+        return {}
+    peak_kb = maxrss_kb(rusage.ru_maxrss)
+    if sampler and sampler.samples and peak_kb <= sampler.parent_kb:
+        peak_kb = sampler.hwm_kb
+    threads = threads or (sampler.threads if sampler and sampler.threads else 1)
+    cpu = rusage.ru_utime + rusage.ru_stime
+    rec = {"peak_rss_mb": round(peak_kb / 1024, 1),
+           "cpu_user_s": round(rusage.ru_utime, 2),
+           "cpu_sys_s": round(rusage.ru_stime, 2),
+           "io_read_bytes": int(rusage.ru_inblock * BLOCK_BYTES),
+           "io_write_bytes": int(rusage.ru_oublock * BLOCK_BYTES),
+           "threads": int(threads),
+           "thread_utilization": round(cpu / (wall_s * threads), 3) if wall_s > 0 else None}
+    if sampler and sampler.samples:
+        rec["io_read_chars"] = sampler.rchar
+        rec["io_write_chars"] = sampler.wchar
+    return rec
+
+
+def load_usage(paths: List[Path]) -> List[Dict]:
+    """Result records with node_count and resource fields from JSON/JSONL files."""
+    records = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                objs = [json.loads(l) for l in f if l.strip()] if path.suffix == ".jsonl" else [json.load(f)]
+        except (OSError, ValueError):
+            continue
+        for obj in objs:
+            records += [r for r in iter_result_records(obj) if r.get("peak_rss_mb") is not None]
+    return records
+
+
+def scaling(records: List[Dict], field: str) -> Optional[Dict]:
+    """Fit field = c · N^b over records with positive values."""
+    pts = [(r["node_count"], r[field]) for r in records
+           if r.get(field) is not None and r[field] > 0 and r.get("node_count")]
+    if len(pts) < 2 or len({n for n, _ in pts}) < 2:
+        return None
+    n, y = np.log([p[0] for p in pts]), np.log([p[1] for p in pts])
+    b, a = np.polyfit(n, y, 1)
+    return {"field": field, "n": len(pts), "exponent": float(b), "coef": float(np.exp(a))}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="How solver resources scale with node_count")
+    parser.add_argument("files", type=Path, nargs="*", help="Result JSON/JSONL files (default: local_verified)")
+    args = parser.parse_args()
+
+    paths = args.files or sorted(LOCAL_RESULTS_DIR.glob("*.json")) + sorted(LOCAL_RESULTS_DIR.glob("*.jsonl"))
+    records = load_usage(paths)
+    if not records:
+        print("No results with resource accounting yet (re-run cases with the current runners)")
+        return
+
+    cpu = lambda r: (r.get("cpu_user_s") or 0) + (r.get("cpu_sys_s") or 0)
+    print(f"\n{'Nodes':>10} {'Cases':>6} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak RSS (MB)':>14} "
+          f"{'Read (MB)':>10} {'Write (MB)':>11} {'Thread util':>12}")
+    print("-" * 88)
+    by_nodes = {}
+    for r in records:
+        by_nodes.setdefault(int(r["node_count"]), []).append(r)
+    for n, recs in sorted(by_nodes.items()):
+        util = [r["thread_utilization"] for r in recs if r.get("thread_utilization") is not None]
+        print(f"{n:>10} {len(recs):>6} {np.median([r['solver_time_s'] for r in recs]):>9.1f} "
+              f"{np.median([cpu(r) for r in recs]):>9.1f} {np.median([r['peak_rss_mb'] for r in recs]):>14.1f} "
+              f"{np.median([r.get('io_read_bytes', 0) for r in recs])/1e6:>10.1f} "
+              f"{np.median([r.get('io_write_bytes', 0) for r in recs])/1e6:>11.1f} "
+              f"{(np.median(util) * 100 if util else float('nan')):>11.0f}%")
+
+    print("\nScaling with node count (metric ≈ c · N^b, medians per mesh shown above):")
+    for r in records:
+        r["cpu_s"] = cpu(r)
+    for field in ("solver_time_s", "cpu_s", "peak_rss_mb", "io_write_bytes"):
+        fit = scaling(records, field)
+        if fit:
+            print(f"  {field:<16} b = {fit['exponent']:.2f}  (c = {fit['coef']:.3e}, {fit['n']} cases)")
+        else:
+            print(f"  {field:<16} needs results at two or more mesh sizes")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,10 @@ Campaign Structure:
 6. SILICON CLIFF MC:   50 more chaos zone cases to match 100 stable (50 cases)
 
 TOTAL: ~260 new verified FEA cases
-ESTIMATED TIME: ~30 minutes on Apple Silicon
+ESTIMATED TIME: ~30 minutes on Apple Silicon (--dry-run predicts it from past runs)
+
+The same campaigns are described in configs/campaigns/killshot.json; with
+--spec they run as one deduplicated, longest-first case plan (campaign_spec.py).
 
 ================================================================================
 """
@@ -26,8 +29,8 @@ ESTIMATED TIME: ~30 minutes on Apple Silicon
 import sys
 import os
 import json
+import shutil
 import subprocess
-import time
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -38,9 +41,54 @@ EUV_TEMPLATES = Path("/Users/nharris/Desktop/euv/templates")
 sys.path.insert(0, str(EUV_SCRIPTS))
 from generator import render_case
 
+from include_store import IncludeStore
+from autotune import load_profile
+from campaign_spec import SPEC_FILE, CasePlan, append_solved, load_solved, load_specs
+from cliff_sampler import AdaptiveCliffSampler
+from cost_model import CostModel, estimate
+from continuation import (WARM_START_FILE, IncrementController, apply_warm_start, read_initial_increment,
+                          read_iterations, set_initial_increment, summarize_savings)
+from mc_design import DESIGNS, MCSeeder, SequentialStopper, draw_mc_cases, rqmc_replicate
+from job_control import (GENERATOR_FAILED, NO_INPUT, PARSE_FAILED, SolveJob, SolverPool,
+                         record_failure, thread_env)
+from mesh_convergence import load_recommendation
+from online_stats import RunningStats
+from runtime_model import RuntimeModel, count_deck_nodes, estimate_nodes
+from scratch import ArtifactStore, ScratchArea
+from surrogate import Surrogate, candidate_pool, propose, runnable_domain, to_run_params
+
 LOCAL_WORK_DIR = Path(__file__).parent.parent / "local_runs"
 RESULTS_DIR = Path(__file__).parent.parent / "04_DATA" / "local_verified"
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+INCLUDE_STORE_DIR = LOCAL_WORK_DIR / "_include_store"
+ARTIFACTS_DIR = LOCAL_WORK_DIR / "_artifacts"
+
+# Solved cases of spec-driven campaigns (--spec), in the work_queue.py results format
+PLAN_RESULTS_FILE = RESULTS_DIR / "case_plan_local.jsonl"
+
+# Parameters that change the mesh — warm starts only chain across equal meshes
+MESH_KEYS = ("n_radial", "element_type", "n_layers", "pitch")
+
+# Concurrent ccx processes for MC batches (--workers); timeouts come from the model.
+# Threads per ccx (--threads); None leaves the environment alone. Both default
+# to the benchmarked profile (autotune.py) when there is one.
+SOLVER_WORKERS = 1
+SOLVER_THREADS = None
+# The former fixed ccx timeout stays the floor until the history covers the mesh size
+FIXED_TIMEOUT_S = 120.0
+RUNTIME_MODEL = RuntimeModel.from_history(RESULTS_DIR, fixed_timeout_s=FIXED_TIMEOUT_S)
+
+# Scratch mode (--scratch): cases are solved on tmpfs and persisted as compact
+# artifacts in ARTIFACTS; both stay None for the classic local_runs/ layout
+SCRATCH = None
+ARTIFACTS = None
+
+# MC perturbation design (--mc-design) and optional CI-based early stop of batches
+MC_DESIGN = "iid"
+MC_STOPPER = None
+
+# Mesh from the mesh convergence study (--recommended-mesh), applied to every case
+MESH_OVERRIDE = None
 
 
 def find_ccx():
@@ -91,99 +139,342 @@ def extract_warpage(case_dir):
     }
 
 
-def run_case(case_id, ccx, work_dir, **params):
-    """Generate and run a single FEA case. Returns result dict or None."""
-    case_dir = work_dir / case_id
+def case_path(work_dir, case_id):
+    """Directory a case is rendered and solved in (scratch tree in scratch mode)."""
+    if SCRATCH is not None:
+        return SCRATCH.path_for(work_dir, case_id)
+    return work_dir / case_id
+
+
+def include_store(dedup=True):
+    """Include store for a batch: in RAM alongside the cases in scratch mode."""
+    if not dedup:
+        return None
+    return SCRATCH.include_store() if SCRATCH is not None else IncludeStore(INCLUDE_STORE_DIR)
+
+
+def prepare_case(case_id, work_dir, store=None, warm_start=None, initial_increment=None, **params):
+    """
+    Render a case deck. Returns a prepared-case dict, or None after recording
+    a generator/input failure.
+    
+    With an IncludeStore, the deck is rendered into RAM staging and its
+    includes are hard-linked from the store instead of rewritten per case.
+    warm_start is a previous case directory whose converged displacement
+    field seeds this solve; initial_increment overrides the *STATIC step.
+    """
+    case_dir = case_path(work_dir, case_id)
+    deck_stats = None
+    if MESH_OVERRIDE:
+        params = {**params, **MESH_OVERRIDE}
     
     try:
-        render_case(case_name=case_id, output_dir=str(case_dir),
-                    templates_dir=str(EUV_TEMPLATES), **params)
+        if store is not None:
+            staging = store.staging_dir(case_id)
+            try:
+                render_case(case_name=case_id, output_dir=str(staging),
+                            templates_dir=str(EUV_TEMPLATES), **params)
+                deck_stats = store.commit_case(staging, case_dir)
+            finally:
+                # Never leave a half-rendered deck in RAM staging
+                shutil.rmtree(staging, ignore_errors=True)
+        else:
+            render_case(case_name=case_id, output_dir=str(case_dir),
+                        templates_dir=str(EUV_TEMPLATES), **params)
     except Exception as e:
         print(f"    FAIL (gen): {e}")
+        record_failure(failure_record(case_id, work_dir, GENERATOR_FAILED, params, error=str(e)), case_dir)
         return None
     
-    # Find input file
-    inp_file = None
-    for f in case_dir.glob("*.inp"):
-        if f.name not in ("nodes.inp", "elements.inp", "materials.inp", "supports.inp", "loads.inp"):
-            inp_file = f
-            break
+    inp_file = find_input_deck(case_dir, case_id)
     if not inp_file:
+        print(f"    FAIL (no input deck)")
+        record_failure(failure_record(case_id, work_dir, NO_INPUT, params), case_dir)
         return None
     
-    t0 = time.time()
-    try:
-        subprocess.run([ccx, "-i", inp_file.stem], capture_output=True, text=True,
-                      timeout=120, cwd=str(case_dir))
-    except:
+    node_count = count_deck_nodes(case_dir)
+    warm = False
+    if warm_start is not None:
+        # A field from a different mesh would seed the wrong nodes
+        warm = apply_warm_start(case_dir, inp_file, warm_start, expected_nodes=node_count or None)
+    if initial_increment is not None:
+        set_initial_increment(inp_file, initial_increment)
+    
+    return {"case_id": case_id, "work_dir": work_dir, "case_dir": case_dir, "inp_file": inp_file, "params": params,
+            "node_count": node_count, "deck_stats": deck_stats,
+            "warm_start": warm if warm_start is not None else None,
+            "initial_increment": initial_increment}
+
+
+def find_input_deck(case_dir, case_id):
+    """Main .inp deck of a rendered case (not one of its includes), or None."""
+    inp_file = case_dir / f"{case_id}.inp"
+    if inp_file.exists():
+        return inp_file
+    for f in case_dir.glob("*.inp"):
+        if f.name not in ("nodes.inp", "elements.inp", "materials.inp", "supports.inp", "loads.inp",
+                          WARM_START_FILE):
+            return f
+    return None
+
+
+def failure_record(case_id, work_dir, failure, params, **extra):
+    """Build a failure-ledger entry for a case of this campaign."""
+    return {
+        "case_id": case_id,
+        "campaign": Path(work_dir).name,
+        "status": failure,
+        "runner": "run_killshot_campaign",
+        "params": {k: v for k, v in params.items() if isinstance(v, (int, float, str, bool))},
+        **extra,
+    }
+
+
+def finish_case(prepared, outcome):
+    """Turn a solver outcome into a result dict, or record the failure and return None."""
+    case_id, case_dir, params = prepared["case_id"], prepared["case_dir"], prepared["params"]
+    work_dir = prepared["work_dir"]
+    
+    if not outcome["ok"]:
+        print(f"    FAIL ({outcome['failure']} after {len(outcome['attempts'])} attempt(s))")
+        record_failure(failure_record(case_id, work_dir, outcome["failure"], params,
+                                      node_count=prepared["node_count"], attempts=outcome["attempts"]),
+                       case_dir)
         return None
-    elapsed = time.time() - t0
+    elapsed = outcome["elapsed_s"]
     
     warpage = extract_warpage(case_dir)
     if not warpage:
+        print(f"    FAIL ({PARSE_FAILED})")
+        record_failure(failure_record(case_id, work_dir, PARSE_FAILED, params,
+                                      node_count=prepared["node_count"], attempts=outcome["attempts"]),
+                       case_dir)
         return None
     
-    return {
+    result = {
         "case_id": case_id,
         "W_pv_nm": warpage["W_pv_nm"],
         "W_exposure_max_nm": warpage["W_exposure_max_nm"],
         "node_count": warpage["n_nodes"],
         "solver_time_s": round(elapsed, 1),
+        "ccx_iterations": read_iterations(case_dir),
+        "solver_telemetry": outcome["telemetry"],
+        **outcome["resources"],
         "solver": "CalculiX 2.23 (local)",
         "timestamp": datetime.now().isoformat(),
         **{k: v for k, v in params.items() if isinstance(v, (int, float, str, bool))},
     }
+    if len(outcome["attempts"]) > 1 or outcome["speculative_win"]:
+        result["attempts"] = len(outcome["attempts"])
+        result["speculative_win"] = outcome["speculative_win"]
+    if prepared["warm_start"] is not None:
+        result["warm_start"] = prepared["warm_start"]
+    if prepared["initial_increment"] is not None:
+        result["initial_increment"] = prepared["initial_increment"]
+    if prepared["deck_stats"]:
+        result["deck_bytes_written"] = prepared["deck_stats"]["bytes_written"]
+        result["deck_bytes_shared"] = prepared["deck_stats"]["bytes_shared"]
+    if SCRATCH is None:
+        # Bytes this case left on disk (includes shared through the store not counted)
+        result["bytes_written"] = sum(f.stat().st_size for f in case_dir.iterdir()
+                                      if f.is_file() and f.stat().st_nlink == 1)
+    return result
+
+
+def compact_case(prepared, result, keep_scratch=False):
+    """
+    Scratch mode: persist a solved (or failed) case as one compact artifact
+    and delete its scratch directory. keep_scratch leaves a successful case
+    in place, e.g. as the warm start of the next case in a sweep.
+    """
+    case_dir = prepared["case_dir"]
+    metadata = result
+    if metadata is None:
+        failure_file = case_dir / "failure.json"
+        metadata = json.loads(failure_file.read_text()) if failure_file.exists() else {
+            "case_id": prepared["case_id"], "status": "failed"}
+    info = ARTIFACTS.put(Path(prepared["work_dir"]).name, prepared["case_id"], case_dir, metadata)
+    if result is not None:
+        result["bytes_written"] = info["bytes"]
+    if info["evicted"]:
+        print(f"    Artifact quota: evicted {len(info['evicted'])} oldest artifact(s)")
+    if result is None or not keep_scratch:
+        SCRATCH.release(case_dir)
+
+
+def solve_prepared(prepared_cases, ccx, workers=1, keep_scratch=False):
+    """Solve prepared cases on a SolverPool; returns results in input order (None = failed)."""
+    jobs = [SolveJob(p["case_id"], p["case_dir"], p["inp_file"].stem, p["node_count"])
+            for p in prepared_cases]
+    pool = SolverPool(ccx, workers=workers, model=RUNTIME_MODEL, env=thread_env(SOLVER_THREADS))
+    outcomes = pool.run(jobs)
+    results = []
+    for p in prepared_cases:
+        result = finish_case(p, outcomes[p["case_id"]])
+        if SCRATCH is not None:
+            compact_case(p, result, keep_scratch=keep_scratch)
+        results.append(result)
+    return results
+
+
+def run_case(case_id, ccx, work_dir, store=None, warm_start=None, initial_increment=None,
+             keep_scratch=False, **params):
+    """
+    Generate and run a single FEA case. Returns result dict or None.
+    
+    The timeout is predicted from the mesh size; transient failures are
+    retried with backoff and every failure is written to the failure ledger.
+    """
+    prepared = prepare_case(case_id, work_dir, store=store, warm_start=warm_start,
+                            initial_increment=initial_increment, **params)
+    if prepared is None:
+        if SCRATCH is not None:
+            SCRATCH.release(case_path(work_dir, case_id))
+        return None
+    return solve_prepared([prepared], ccx, keep_scratch=keep_scratch)[0]
 
 
-def run_mc_batch(name, ccx, work_dir, n_cases, base_params, rng=None):
-    """Run a Monte Carlo batch with ±5% manufacturing tolerances."""
+def run_mc_batch(name, ccx, work_dir, n_cases, base_params, rng=None, dedup=True,
+                 design=None, stopper=None):
+    """
+    Run a Monte Carlo batch with ±5% manufacturing tolerances.
+    
+    The mesh is identical across seeds, so by default the include files are
+    deduplicated through the shared store and only per-seed deltas are written.
+    With SOLVER_WORKERS > 1 decks are solved concurrently, with stragglers
+    speculatively re-launched on idle slots: all at once, or a pool-full at
+    a time when a stopper has to check the intervals in between.
+    
+    design defaults to MC_DESIGN and stopper to MC_STOPPER; with a stopper,
+    n_cases is the maximum and the batch ends as soon as the confidence
+    intervals of the mean and CV are within target (from the spread of the
+    RQMC replicates for sobol/lhs designs).
+    
+    rng is an MCSeeder: every case's perturbations come from its own
+    (campaign, batch, seed) stream, so they do not depend on solve order.
+    """
     if rng is None:
-        rng = np.random.default_rng(42)
+        rng = MCSeeder(42, Path(work_dir).name)
+    design = design or MC_DESIGN
+    stopper = stopper if stopper is not None else MC_STOPPER
+    store = include_store(dedup)
+    cases = draw_mc_cases(name, n_cases, base_params, rng, design=design)
     
     results = []
-    for seed in range(n_cases):
-        k_azi_base = base_params.get("k_azi", 0.5)
-        k_azi_perturbed = k_azi_base * (1 + 0.05 * (2 * rng.random() - 1))
-        stiffness_scale = 1.0 + 0.05 * (2 * rng.random() - 1)
-        bow = rng.uniform(-5e-6, 5e-6)
-        
-        case_id = f"{name}_seed{seed}"
-        params = {**base_params}
-        params["k_azi"] = k_azi_perturbed
-        params["stiffness"] = 1.5e5 * stiffness_scale
-        params["bow"] = bow
-        params["k_azi_base"] = k_azi_base
-        params["seed"] = seed
+    running = RunningStats()
+    stopping = stopper is not None and stopper.active
+    chunk = max(SOLVER_WORKERS, 1) if stopping else max(len(cases), 1)
+    for start in range(0, len(cases), chunk):
+        batch = cases[start:start + chunk]
+        if SOLVER_WORKERS > 1:
+            prepared = [prepare_case(case_id, work_dir, store=store, **params) for case_id, params in batch]
+            prepared = [p for p in prepared if p is not None]
+            solved = zip(prepared, solve_prepared(prepared, ccx, workers=SOLVER_WORKERS))
+            solved = [(p["params"]["seed"], r) for p, r in solved]
+        else:
+            solved = [(params["seed"], run_case(case_id, ccx, work_dir, store=store, **params))
+                      for case_id, params in batch]
+        for seed, result in solved:
+            if result:
+                results.append(result)
+                running.push(result["W_pv_nm"])
+                print(f"    [{seed+1}/{n_cases}] W_pv={result['W_pv_nm']:.1f} nm | {running.progress()}", flush=True)
         
-        result = run_case(case_id, ccx, work_dir, **params)
-        if result:
-            results.append(result)
-            print(f"    [{seed+1}/{n_cases}] W_pv={result['W_pv_nm']:.1f} nm")
+        values = [r["W_pv_nm"] for r in results]
+        replicates = [rqmc_replicate(r["seed"]) for r in results] if design != "iid" else None
+        if stopping and stopper.done(values, replicates):
+            ci = stopper.intervals(values, replicates)
+            print(f"    Stopped after {len(results)}/{n_cases} cases ({design}): mean ±{ci['mean_halfwidth_pct']:.2f}%, "
+                  f"CV {ci['cv_pct']:.2f} ±{ci['cv_halfwidth_pct']:.2f} pts")
+            break
+    
+    if store is not None and results:
+        written = sum(r.get("deck_bytes_written", 0) for r in results)
+        shared = sum(r.get("deck_bytes_shared", 0) for r in results)
+        print(f"    Decks: {written/1e6:.1f} MB written, {shared/1e6:.1f} MB shared via include store")
+    if results:
+        per_case = sum(r.get("bytes_written", 0) for r in results) / len(results)
+        where = "artifact" if SCRATCH is not None else "case directory"
+        print(f"    Disk: {per_case/1e3:.1f} KB written per case ({where})")
     
     return results
 
 
+def run_continuation_sweep(cases, ccx, work_dir, sweep_param="k_azi", check_cold=False, dedup=True):
+    """
+    Solve cases in order of sweep_param, warm-starting each from its neighbour.
+    
+    The initial increment starts at the deck's own value (read from the first
+    solved deck) and is adapted to the iteration count of the previous
+    solve. With check_cold, every warm-started case is also solved from zero
+    displacement so the iterations saved (and the W_pv agreement) are measured
+    rather than estimated. Returns (results, savings summary).
+    """
+    store = include_store(dedup)
+    ordered = sorted(cases, key=lambda c: c[1][sweep_param])
+    controller = IncrementController()
+    
+    results = []
+    prev_dir, prev_mesh = None, None
+    for i, (case_id, params) in enumerate(ordered):
+        mesh = tuple(params.get(k) for k in MESH_KEYS)
+        warm_from = prev_dir if mesh == prev_mesh else None
+        result = run_case(case_id, ccx, work_dir, store=store, warm_start=warm_from,
+                          initial_increment=controller.dt, keep_scratch=True, **params)
+        if SCRATCH is not None and prev_dir is not None:
+            SCRATCH.release(prev_dir)
+        if not result:
+            # Never chain from a failed solve
+            prev_dir, prev_mesh = None, None
+            continue
+        
+        if check_cold and result.get("warm_start"):
+            cold = run_case(f"{case_id}_cold", ccx, work_dir / "_cold_check", store=store, **params)
+            if cold:
+                result["ccx_iterations_cold"] = cold["ccx_iterations"]
+                result["W_pv_cold_nm"] = cold["W_pv_nm"]
+        
+        if controller.dt is None:
+            deck = find_input_deck(case_path(work_dir, case_id), case_id)
+            deck_dt = read_initial_increment(deck) if deck else None
+            if deck_dt is not None:
+                controller.seed(deck_dt)
+                result["initial_increment"] = deck_dt
+        controller.update(result.get("ccx_iterations"))
+        prev_dir, prev_mesh = case_path(work_dir, case_id), mesh
+        results.append(result)
+        mode = "warm" if result.get("warm_start") else "cold"
+        print(f"    [{i+1}/{len(ordered)}] {sweep_param}={params[sweep_param]:.4f} "
+              f"W_pv={result['W_pv_nm']:.1f} nm ({mode}, {result.get('ccx_iterations')} its, "
+              f"dt0={result.get('initial_increment', float('nan')):.3g})")
+    
+    if SCRATCH is not None and prev_dir is not None:
+        SCRATCH.release(prev_dir)
+    
+    savings = summarize_savings(results)
+    if savings["iterations_saved"] is not None:
+        print(f"    Continuation: {savings['iterations_saved']:.0f} Newton iterations saved vs cold starts "
+              f"({savings['n_warm']}/{savings['n_cases']} warm, {savings['reference']})")
+    return results, savings
+
+
 def compute_stats(results):
     """Compute statistics from a list of results."""
-    if not results:
-        return {}
-    wpvs = np.array([r["W_pv_nm"] for r in results])
-    return {
-        "n": len(wpvs),
-        "mean": float(np.mean(wpvs)),
-        "std": float(np.std(wpvs, ddof=1)) if len(wpvs) > 1 else 0,
-        "cv_pct": float(np.std(wpvs, ddof=1) / np.mean(wpvs) * 100) if len(wpvs) > 1 else 0,
-        "min": float(np.min(wpvs)),
-        "max": float(np.max(wpvs)),
-    }
+    return RunningStats.from_values(r["W_pv_nm"] for r in results).summary()
 
 
 # ============================================================================
 # CAMPAIGN FUNCTIONS
 # ============================================================================
 
-def campaign_cliff_mapping(ccx):
-    """Map the exact cliff shape with MC at multiple k_azi values."""
+def campaign_cliff_mapping(ccx, continuation=False, check_cold=False):
+    """
+    Map the exact cliff shape with MC at multiple k_azi values.
+    
+    With continuation, all 70 perturbed cases are drawn exactly as in the
+    level-by-level run, then solved as one sweep ordered by k_azi with each
+    solve warm-started from its neighbour.
+    """
     print("\n" + "="*70)
     print("CAMPAIGN 1: CLIFF SHAPE MAPPING (Silicon, scan load)")
     print("="*70)
@@ -196,12 +487,27 @@ def campaign_cliff_mapping(ccx):
                 support_profile="density_scaled")
     
     all_results = {}
-    rng = np.random.default_rng(123)
-    
-    for k_azi in [0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9]:
+    rng = MCSeeder(123, "cliff_mapping")
+    levels = [0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9]
+    
+    swept = {}
+    if continuation:
+        cases = []
+        for k_azi in levels:
+            cases += draw_mc_cases(f"cliff_k{str(k_azi).replace('.','p')}", 10, {**base, "k_azi": k_azi}, rng)
+        print(f"\n  Continuation sweep over {len(cases)} cases:")
+        sweep_results, savings = run_continuation_sweep(cases, ccx, work_dir, check_cold=check_cold)
+        all_results["continuation"] = savings
+        for k_azi in levels:
+            swept[k_azi] = [r for r in sweep_results if r["k_azi_base"] == k_azi]
+    
+    for k_azi in levels:
         print(f"\n  k_azi = {k_azi}:")
-        params = {**base, "k_azi": k_azi}
-        results = run_mc_batch(f"cliff_k{str(k_azi).replace('.','p')}", ccx, work_dir, 10, params, rng)
+        if continuation:
+            results = swept[k_azi]
+        else:
+            params = {**base, "k_azi": k_azi}
+            results = run_mc_batch(f"cliff_k{str(k_azi).replace('.','p')}", ccx, work_dir, 10, params, rng)
         stats = compute_stats(results)
         all_results[f"k_azi_{k_azi}"] = {"stats": stats, "cases": results}
         if stats:
@@ -212,6 +518,110 @@ def campaign_cliff_mapping(ccx):
     return all_results
 
 
+def campaign_adaptive_cliff(ccx, tol=0.01, max_solves=70):
+    """
+    Locate the cliff with an adaptive sampler instead of the fixed 7×10 grid.
+    
+    Starts from a coarse 4-level grid over 0.6–0.9 and places each further
+    5-case batch where the CV jump or CV uncertainty is largest, until the
+    5% CV crossing is bracketed to tol.
+    """
+    print("\n" + "="*70)
+    print(f"CAMPAIGN 1 (ADAPTIVE): CLIFF LOCATION TO ±{tol/2:.4f} k_azi (Silicon, scan load)")
+    print("="*70)
+    
+    work_dir = LOCAL_WORK_DIR / "cliff_adaptive"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    
+    base = dict(pattern="parametric", load="scan", n_radial=50, element_type="C3D8",
+                n_layers=3, k_edge=2.0, pitch=0.005, rho_0=1.0, r_trans=0.13,
+                support_profile="density_scaled")
+    
+    rng = MCSeeder(123, "cliff_adaptive")
+    cases = []
+    batches = {}
+    
+    def solve(k_azi, n):
+        # Each repeat batch at a level gets its own case names
+        tag = f"{k_azi:.5f}".replace('.', 'p')
+        batches[tag] = batches.get(tag, 0) + 1
+        print(f"\n  k_azi = {k_azi:.5f} (batch {batches[tag]}, {n} cases):")
+        results = run_mc_batch(f"acliff_k{tag}_b{batches[tag]}", ccx, work_dir, n,
+                               {**base, "k_azi": k_azi}, rng)
+        cases.extend(results)
+        return [r["W_pv_nm"] for r in results]
+    
+    sampler = AdaptiveCliffSampler(solve, k_min=0.6, k_max=0.9, tol=tol, max_solves=max_solves)
+    summary = sampler.run()
+    
+    print(f"\n  {'k_azi':>9} {'N':>4} {'Mean (nm)':>14} {'CV (%)':>10}")
+    for row in summary["curve"]:
+        print(f"  {row['k_azi']:>9.5f} {row['n']:>4} {row['mean']:>14.1f} {row['cv']*100:>10.2f}")
+    if "cliff_bracket" in summary:
+        lo, hi = summary["cliff_bracket"]
+        state = "converged" if summary["converged"] else "NOT converged"
+        print(f"\n  -> Cliff at k_azi ≈ {summary['cliff_k_azi']:.4f}, bracket [{lo:.5f}, {hi:.5f}] "
+              f"({state}, {summary['n_solves']} solves vs 70 on the fixed grid)")
+    else:
+        print(f"\n  -> No CV crossing of {summary['cv_threshold']*100:.0f}% found in [0.6, 0.9]")
+    
+    output = {"summary": summary, "cases": cases}
+    with open(RESULTS_DIR / "cliff_adaptive_local.json", 'w') as f:
+        json.dump(output, f, indent=2)
+    return output
+
+
+def campaign_active_learning(ccx, rounds=3, batch=5, k_range=(0.6, 0.95)):
+    """
+    Spend FEA runs where the W_pv surrogate is least certain.
+    
+    Each round refits the Gaussian process on the whole corpus (including
+    the cases solved in earlier rounds, which are saved after every round),
+    proposes a batch of the most uncertain inputs and solves them.
+    """
+    print("\n" + "="*70)
+    print(f"ACTIVE LEARNING: {rounds} rounds × {batch} cases where the surrogate is least certain")
+    print("="*70)
+    
+    work_dir = LOCAL_WORK_DIR / "active_learning"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    
+    base = dict(pattern="parametric", load="scan", n_radial=50, element_type="C3D8",
+                n_layers=3, k_edge=2.0, pitch=0.005, rho_0=1.0, r_trans=0.13,
+                support_profile="density_scaled")
+    
+    rng = np.random.default_rng(404)
+    output = {"rounds": [], "cases": []}
+    for rnd in range(rounds):
+        model = Surrogate.from_corpus()
+        loo = model.loo()
+        print(f"\n  Round {rnd+1}: surrogate on {loo['n']} cases, LOO median error "
+              f"{loo['median_abs_pct']:.1f}%")
+        proposals = propose(model, batch, candidate_pool(model, 2000, rng, runnable_domain(model, k_range)))
+        
+        solved = []
+        for i, p in enumerate(proposals):
+            params = {**base, **to_run_params(p)}
+            print(f"    [{i+1}/{len(proposals)}] k_azi={p['k_azi']:.3f} n={p['n_harmonic']} {p['load']} "
+                  f"{p['material']} (pred {p['predicted_W_pv_nm']:.0f} nm, σ_log={p['log_std']:.2f})")
+            result = run_case(f"al_r{rnd}_{i}", ccx, work_dir, **params)
+            if result:
+                result["predicted_W_pv_nm"] = p["predicted_W_pv_nm"]
+                result["predicted_log_std"] = p["log_std"]
+                solved.append(result)
+                print(f"        W_pv={result['W_pv_nm']:.1f} nm")
+        
+        errors = [abs(np.log(r["W_pv_nm"] / r["predicted_W_pv_nm"])) for r in solved]
+        output["rounds"].append({"round": rnd + 1, "n_train": loo["n"], "loo": loo,
+                                 "n_solved": len(solved),
+                                 "mean_abs_log_error": float(np.mean(errors)) if errors else None})
+        output["cases"] += solved
+        # Saved every round so the next refit sees the new cases
+        with open(RESULTS_DIR / "active_learning_local.json", 'w') as f:
+            json.dump(output, f, indent=2)
+    return output
+
+
 def campaign_harmonic_sweep(ccx):
     """Prove cliff exists at all harmonic orders."""
     print("\n" + "="*70)
@@ -222,7 +632,7 @@ def campaign_harmonic_sweep(ccx):
     work_dir.mkdir(parents=True, exist_ok=True)
     
     all_results = {}
-    rng = np.random.default_rng(456)
+    rng = MCSeeder(456, "harmonic_sweep")
     
     for n_harm in [2, 3, 4, 6]:
         for k_azi in [0.5, 0.8]:
@@ -258,7 +668,7 @@ def campaign_sweet_spot_b_kill(ccx):
                 n_layers=3, k_edge=2.0, pitch=0.005, rho_0=1.0, r_trans=0.13,
                 support_profile="density_scaled", k_azi=1.3)
     
-    rng = np.random.default_rng(789)
+    rng = MCSeeder(789, "sweetspot_b")
     results = run_mc_batch("ssb_k1p3", ccx, work_dir, 20, base, rng)
     stats = compute_stats(results)
     
@@ -286,7 +696,7 @@ def campaign_crossload(ccx):
     work_dir.mkdir(parents=True, exist_ok=True)
     
     all_results = {}
-    rng = np.random.default_rng(101)
+    rng = MCSeeder(101, "crossload")
     
     for load_type in ["gradient_z", "uniform"]:
         for k_azi in [0.5, 0.8]:
@@ -319,7 +729,7 @@ def campaign_more_materials(ccx):
     work_dir.mkdir(parents=True, exist_ok=True)
     
     all_results = {}
-    rng = np.random.default_rng(202)
+    rng = MCSeeder(202, "more_materials")
     
     for material in ["sic", "gaas"]:
         for k_azi in [0.5, 0.8]:
@@ -355,7 +765,7 @@ def campaign_silicon_cliff_mc(ccx):
                 n_layers=3, k_edge=2.0, pitch=0.005, rho_0=1.0, r_trans=0.13,
                 support_profile="density_scaled", k_azi=0.8)
     
-    rng = np.random.default_rng(303)
+    rng = MCSeeder(303, "silicon_cliff_mc")
     results = run_mc_batch("si_cliff", ccx, work_dir, 50, base, rng)
     stats = compute_stats(results)
     
@@ -368,6 +778,81 @@ def campaign_silicon_cliff_mc(ccx):
     return output
 
 
+def run_case_plan(specs, ccx, results_path=PLAN_RESULTS_FILE, dedup=True):
+    """
+    Solve the deduplicated case plan of a set of campaign specs, then write
+    every campaign's output file from the shared solved cases.
+    
+    Cases already in results_path (from an earlier or distributed run) are
+    not solved again. The rest are solved longest-predicted-first, a few
+    pool-fulls at a time, and appended to results_path as they finish.
+    """
+    plan = CasePlan(specs, overrides=MESH_OVERRIDE)
+    solved = load_solved(results_path)
+    ordered = plan.ordered(lambda p: RUNTIME_MODEL.predict(estimate_nodes(p)))
+    todo = [c for c in ordered if c["case_id"] not in solved]
+    print(f"\n  Plan: {plan.n_requested} cases requested by {len(specs)} campaign(s), "
+          f"{len(plan.cases)} unique ({plan.n_shared} shared across campaigns)")
+    print(f"  {len(ordered) - len(todo)} already solved, {len(todo)} to solve "
+          f"(predicted {sum(c['predicted_s'] for c in todo)/60:.1f} min serial, longest first)")
+    
+    work_dir = LOCAL_WORK_DIR / "case_plan"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    store = include_store(dedup)
+    chunk = max(SOLVER_WORKERS, 1) * 4
+    for start in range(0, len(todo), chunk):
+        batch = todo[start:start + chunk]
+        prepared = [prepare_case(c["case_id"], work_dir, store=store, **c["params"]) for c in batch]
+        prepared = [p for p in prepared if p is not None]
+        for p, result in zip(prepared, solve_prepared(prepared, ccx, workers=SOLVER_WORKERS)):
+            append_solved(results_path, p["case_id"], result, failure=None if result else "failed")
+            if result:
+                solved[p["case_id"]] = result
+        print(f"    [{min(start + chunk, len(todo))}/{len(todo)}] solved")
+    
+    outputs = {}
+    for spec in specs:
+        output = plan.reassemble(spec["name"], solved, compute_stats)
+        outputs[spec["name"]] = output
+        print(f"\n  {spec['title']}")
+        groups = {"all": output} if "stats" in output else output
+        for group, entry in groups.items():
+            if entry["stats"]:
+                print(f"    {group}: n={entry['stats']['n']}, Mean={entry['stats']['mean']:.1f}nm, "
+                      f"CV={entry['stats']['cv_pct']:.2f}%")
+        with open(RESULTS_DIR / spec["output"], 'w') as f:
+            json.dump(output, f, indent=2)
+    return outputs
+
+
+def dry_run(specs, workers=1, threads=1):
+    """
+    Expand campaign specs into their cases and print predicted wall time,
+    peak memory, core-hours and makespan without rendering anything.
+    """
+    model = CostModel.from_history(RESULTS_DIR)
+    plan = CasePlan(specs, overrides=MESH_OVERRIDE)
+    print(f"\nCost model: {model.describe()}")
+    print(f"\n{'Campaign':<26} {'Cases':>6} {'Nodes':>8} {'Per case':>9} {'Serial':>9} {'Mem/case':>9}")
+    print("-" * 72)
+    for spec in specs:
+        cases = [params for group in plan.groups[spec["name"]] for _, params in group["cases"]]
+        est = estimate(cases, model, workers=1, threads=threads)
+        nodes = max((c["node_count"] for c in est["cases"]), default=0)
+        print(f"{spec['name']:<26} {est['n_cases']:>6} {nodes:>8} {est['serial_s']/max(est['n_cases'], 1):>8.1f}s "
+              f"{est['serial_s']/60:>7.1f}min {est['max_case_memory_gb']:>7.2f}GB")
+    print("-" * 72)
+    
+    total = estimate([c["params"] for c in plan.cases.values()], model, workers=workers, threads=threads)
+    print(f"Plan: {plan.n_requested} cases requested, {total['n_cases']} unique after deduplication")
+    print(f"  Serial wall time:  {total['serial_s']/60:.1f} min  (longest case {total['max_case_s']:.1f}s)")
+    print(f"  Core-hours:        {total['core_hours']:.2f}  ({threads} thread(s) per solve)")
+    print(f"  Makespan:          {total['makespan_s']/60:.1f} min on {workers} worker(s), longest first")
+    print(f"  Peak memory:       {total['peak_memory_gb']:.1f} GB with {workers} concurrent solve(s) "
+          f"({total['max_case_memory_gb']:.2f} GB per case)")
+    return total
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -376,8 +861,79 @@ def main():
     import argparse
     parser = argparse.ArgumentParser(description="Design-Around Desert Kill Shot Campaign")
     parser.add_argument("--campaign", type=int, default=0, help="Run specific campaign (1-6) or 0 for all")
+    parser.add_argument("--continuation", action="store_true",
+                        help="Cliff mapping as one k_azi sweep, warm-starting each solve from its neighbour")
+    parser.add_argument("--continuation-check", action="store_true",
+                        help="Also solve each warm-started case cold to measure iterations saved")
+    parser.add_argument("--adaptive-cliff", action="store_true",
+                        help="Cliff mapping with the adaptive sampler instead of the fixed 7-level grid")
+    parser.add_argument("--cliff-tol", type=float, default=0.01,
+                        help="k_azi width to which the adaptive sampler brackets the cliff")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent ccx processes per MC batch (enables straggler speculation; "
+                             "default: autotune profile, else 1)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Threads per ccx process (default: autotune profile, else inherited)")
+    parser.add_argument("--active-learning", action="store_true",
+                        help="Run surrogate-guided active learning instead of the fixed campaigns")
+    parser.add_argument("--al-rounds", type=int, default=3, help="Active-learning rounds")
+    parser.add_argument("--al-batch", type=int, default=5, help="FEA cases per active-learning round")
+    parser.add_argument("--mc-design", choices=DESIGNS, default="iid",
+                        help="Perturbation design of MC batches (scrambled Sobol / Latin hypercube)")
+    parser.add_argument("--ci-mean", type=float, default=None,
+                        help="Stop MC batches once the 95%% CI half-width of the mean is below this %% of the mean")
+    parser.add_argument("--ci-cv", type=float, default=None,
+                        help="Stop MC batches once the 95%% CI half-width of the CV is below this many %% points")
+    parser.add_argument("--recommended-mesh", action="store_true",
+                        help="Use the cheapest converged mesh from run_local_fea.py --mesh-convergence")
+    parser.add_argument("--scratch", action="store_true",
+                        help="Solve on tmpfs and keep only a compact .npz artifact per case")
+    parser.add_argument("--artifact-quota-gb", type=float, default=None,
+                        help="Evict the oldest artifacts beyond this size (scratch mode)")
+    parser.add_argument("--spec", type=Path, default=None,
+                        help="Run the campaigns of a JSON spec as one deduplicated, LPT-ordered case plan")
+    parser.add_argument("--only", nargs="+", default=None, help="Campaign names of the spec to run")
+    parser.add_argument("--plan-results", type=Path, default=PLAN_RESULTS_FILE,
+                        help="Solved-case JSONL of the plan (also accepts work_queue.py coordinator output)")
+    parser.add_argument("--export-plan", type=Path, default=None,
+                        help="Write the plan as a work_queue.py case list instead of solving it")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Predict wall time, memory, core-hours and makespan (--workers) without solving")
     args = parser.parse_args()
     
+    global SOLVER_WORKERS, SOLVER_THREADS, SCRATCH, ARTIFACTS, MESH_OVERRIDE, MC_DESIGN, MC_STOPPER
+    profile = load_profile() or {}
+    SOLVER_WORKERS = max(1, args.workers or profile.get("workers", 1))
+    SOLVER_THREADS = args.threads or profile.get("threads")
+    MC_DESIGN = args.mc_design
+    if args.ci_mean is not None or args.ci_cv is not None:
+        MC_STOPPER = SequentialStopper(mean_halfwidth_pct=args.ci_mean, cv_halfwidth_pct=args.ci_cv)
+    if args.recommended_mesh:
+        MESH_OVERRIDE = load_recommendation()
+        if MESH_OVERRIDE is None:
+            parser.error("no mesh recommendation yet; run run_local_fea.py --mesh-convergence first")
+    if args.scratch:
+        SCRATCH = ScratchArea()
+        quota = args.artifact_quota_gb * 1e9 if args.artifact_quota_gb is not None else None
+        ARTIFACTS = ArtifactStore(ARTIFACTS_DIR, quota_bytes=quota)
+    
+    if args.dry_run:
+        specs = load_specs(args.spec or SPEC_FILE, args.only)
+        if args.campaign > 0 and not args.only:
+            specs = specs[args.campaign - 1:args.campaign]
+        dry_run(specs, workers=SOLVER_WORKERS, threads=SOLVER_THREADS or 1)
+        return
+    
+    if args.export_plan:
+        if args.spec is None:
+            parser.error("--export-plan needs --spec")
+        plan = CasePlan(load_specs(args.spec, args.only), overrides=MESH_OVERRIDE)
+        cases = plan.queue(lambda p: RUNTIME_MODEL.predict(estimate_nodes(p)))
+        with open(args.export_plan, 'w') as f:
+            json.dump(cases, f, indent=2)
+        print(f"✅ {len(cases)} unique cases ({plan.n_requested} requested) -> {args.export_plan}")
+        return
+    
     print("\n" + "="*70)
     print("🎯 DESIGN-AROUND DESERT: KILL SHOT CAMPAIGN")
     print("="*70)
@@ -385,6 +941,17 @@ def main():
     ccx = find_ccx()
     print(f"Solver: {ccx}")
     print(f"Output: {RESULTS_DIR}")
+    threads = f" × {SOLVER_THREADS} thread(s)" if SOLVER_THREADS else ""
+    tuned = " (autotune profile)" if profile and args.workers is None else ""
+    print(f"Workers: {SOLVER_WORKERS}{threads}{tuned}, runtime model: {RUNTIME_MODEL.describe()}")
+    if MC_DESIGN != "iid" or MC_STOPPER is not None:
+        stop = (f", stop at mean ±{args.ci_mean}% / CV ±{args.ci_cv} pts" if MC_STOPPER else "")
+        print(f"MC design: {MC_DESIGN}{stop}")
+    if MESH_OVERRIDE:
+        print(f"Mesh: N={MESH_OVERRIDE['n_radial']} {MESH_OVERRIDE['element_type']} (recommended)")
+    if SCRATCH is not None:
+        print(f"Scratch: {SCRATCH.root} ({'tmpfs' if SCRATCH.on_tmpfs else 'temp dir'}), "
+              f"artifacts: {ARTIFACTS_DIR}")
     
     campaigns = {
         1: ("Cliff Mapping", campaign_cliff_mapping),
@@ -394,17 +961,34 @@ def main():
         5: ("Additional Materials", campaign_more_materials),
         6: ("Silicon Cliff MC", campaign_silicon_cliff_mc),
     }
+    if args.continuation:
+        campaigns[1] = ("Cliff Mapping (continuation)",
+                        lambda c: campaign_cliff_mapping(c, continuation=True,
+                                                         check_cold=args.continuation_check))
+    if args.adaptive_cliff:
+        campaigns[1] = ("Adaptive Cliff Mapping", lambda c: campaign_adaptive_cliff(c, tol=args.cliff_tol))
     
-    if args.campaign > 0:
-        name, func = campaigns[args.campaign]
-        print(f"\nRunning Campaign {args.campaign}: {name}")
-        func(ccx)
-    else:
-        for num, (name, func) in campaigns.items():
-            print(f"\n{'='*70}")
-            print(f"Campaign {num}/6: {name}")
-            print(f"{'='*70}")
+    try:
+        if args.spec:
+            specs = load_specs(args.spec, args.only)
+            print(f"\nRunning {len(specs)} campaign(s) from {args.spec} as one case plan")
+            run_case_plan(specs, ccx, results_path=args.plan_results)
+        elif args.active_learning:
+            print(f"\nRunning Active Learning ({args.al_rounds} rounds × {args.al_batch} cases)")
+            campaign_active_learning(ccx, rounds=args.al_rounds, batch=args.al_batch)
+        elif args.campaign > 0:
+            name, func = campaigns[args.campaign]
+            print(f"\nRunning Campaign {args.campaign}: {name}")
             func(ccx)
+        else:
+            for num, (name, func) in campaigns.items():
+                print(f"\n{'='*70}")
+                print(f"Campaign {num}/6: {name}")
+                print(f"{'='*70}")
+                func(ccx)
+    finally:
+        if SCRATCH is not None:
+            SCRATCH.cleanup()
     
     print("\n" + "="*70)
     print("✅ KILL SHOT CAMPAIGN COMPLETE")
@@ -7,9 +7,11 @@ LOCAL FEA RUNNER — Runs CalculiX simulations locally on macOS
 This script uses the existing Genesis generator (from Desktop/euv) to create
 CalculiX input decks and runs them locally. It handles:
 
-1. Mesh convergence study (C3D8, N=25,30,40,50,70)
+1. Mesh convergence study (C3D8, N=25,30,40,... refined until the
+   Richardson error estimate is below tolerance)
 2. Material Monte Carlo (InP, GaN, AlN — 20 cases each)
-3. Result extraction and JSON output
+3. Re-runs of lost cases from the failure ledger's plan (failure_ledger.py)
+4. Result extraction and JSON output
 
 Requirements:
     - CalculiX (ccx) installed: brew install calculix-ccx or conda
@@ -17,7 +19,9 @@ Requirements:
 
 Usage:
     python3 scripts/run_local_fea.py --mesh-convergence
+    python3 scripts/run_local_fea.py --mesh-convergence --mesh-tol 0.02 --elements C3D8 S4R
     python3 scripts/run_local_fea.py --material-mc
+    python3 scripts/run_local_fea.py --rerun                 # 04_DATA/rerun_plan.json
     python3 scripts/run_local_fea.py --all
 
 ================================================================================
@@ -26,8 +30,8 @@ Usage:
 import sys
 import os
 import json
+import shutil
 import subprocess
-import time
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -39,9 +43,55 @@ sys.path.insert(0, str(EUV_SCRIPTS))
 
 from generator import render_case
 
+from failure_ledger import PLAN_FILE, load_plan, not_reproducible
+from include_store import IncludeStore
+from job_control import (GENERATOR_FAILED, NO_INPUT, PARSE_FAILED, SolveJob, SolverPool,
+                         record_failure)
+from mc_design import MCSeeder
+from mesh_convergence import RECOMMENDATION_FILE, MeshConvergenceDriver, recommend, save_recommendation
+from online_stats import RunningStats
+from runtime_model import RuntimeModel, count_deck_nodes
+
 # Output directory for local runs
 LOCAL_WORK_DIR = Path(__file__).parent.parent / "local_runs"
 LOCAL_RESULTS_DIR = Path(__file__).parent.parent / "04_DATA" / "local_verified"
+INCLUDE_STORE_DIR = LOCAL_WORK_DIR / "_include_store"
+RERUN_RESULTS_FILE = LOCAL_RESULTS_DIR / "reruns_local.json"
+
+# Generator inputs a re-run plan entry does not record (the local baseline deck)
+RERUN_DEFAULTS = {
+    "pattern": "parametric",
+    "load": "scan",
+    "stiffness": 1.5e5,
+    "n_radial": 50,
+    "element_type": "C3D8",
+    "n_layers": 3,
+    "k_edge": 2.0,
+    "pitch": 0.005,
+    "rho_0": 1.0,
+    "r_trans": 0.13,
+    "support_profile": "density_scaled",
+}
+
+# Per-case timeouts are predicted from node count and past solver_time_s records;
+# the former fixed 10 minute timeout stays the floor until the history covers the mesh size
+FIXED_TIMEOUT_S = 600.0
+RUNTIME_MODEL = RuntimeModel.from_history(LOCAL_RESULTS_DIR, fixed_timeout_s=FIXED_TIMEOUT_S)
+
+# Material MC perturbations: one stream per (batch, seed), independent of run order
+MC_SEEDER = MCSeeder(42, "material_mc")
+
+
+def _failure(case_id, work_dir, failure, params, case_dir=None, **extra):
+    """Record a classified failure in the ledger so no case is silently dropped."""
+    record_failure({
+        "case_id": case_id,
+        "campaign": Path(work_dir).name,
+        "status": failure,
+        "runner": "run_local_fea",
+        "params": {k: v for k, v in params.items() if isinstance(v, (int, float, str, bool))},
+        **extra,
+    }, case_dir)
 
 def find_ccx():
     """Find CalculiX executable."""
@@ -123,26 +173,48 @@ def extract_warpage(case_dir_path):
     }
 
 
-def run_single_case(case_id, ccx_path, work_dir, templates_dir, **params):
+def run_single_case(case_id, ccx_path, work_dir, templates_dir, store=None, **params):
     """
     Generate input deck, run CalculiX, and extract results for a single case.
     
-    Returns dict with results or None on failure.
+    If an IncludeStore is given, the deck is rendered into RAM staging and the
+    include files (mesh, materials) are hard-linked from the shared store, so
+    only the per-case supports/loads deltas are written to disk.
+    
+    The timeout is predicted from the node count; transient failures are
+    retried with backoff. Returns dict with results or None on failure (the
+    failure is classified and appended to the failure ledger).
     """
     case_dir = work_dir / case_id
+    deck_stats = None
     
     print(f"  [{case_id}] Generating mesh...", end=" ", flush=True)
     
     # Generate the input deck using the real generator
     try:
-        render_case(
-            case_name=case_id,
-            output_dir=str(case_dir),
-            templates_dir=str(templates_dir),
-            **params
-        )
+        if store is not None:
+            staging = store.staging_dir(case_id)
+            try:
+                render_case(
+                    case_name=case_id,
+                    output_dir=str(staging),
+                    templates_dir=str(templates_dir),
+                    **params
+                )
+                deck_stats = store.commit_case(staging, case_dir)
+            finally:
+                # Never leave a half-rendered deck in RAM staging
+                shutil.rmtree(staging, ignore_errors=True)
+        else:
+            render_case(
+                case_name=case_id,
+                output_dir=str(case_dir),
+                templates_dir=str(templates_dir),
+                **params
+            )
     except Exception as e:
         print(f"FAILED (generator: {e})")
+        _failure(case_id, work_dir, GENERATOR_FAILED, params, case_dir, error=str(e))
         return None
     
     # Find the main input file
@@ -156,146 +228,147 @@ def run_single_case(case_id, ccx_path, work_dir, templates_dir, **params):
             inp_file = main_inp[0]
         else:
             print(f"FAILED (no input file)")
+            _failure(case_id, work_dir, NO_INPUT, params, case_dir)
             return None
     
-    # Count nodes for reporting
-    nodes_file = case_dir / "nodes.inp"
-    node_count = 0
-    if nodes_file.exists():
-        with open(nodes_file) as f:
-            node_count = sum(1 for line in f if not line.startswith("*")) 
+    # Count nodes for reporting and for the predicted timeout
+    node_count = count_deck_nodes(case_dir)
+    timeout = RUNTIME_MODEL.timeout(node_count)
     
-    print(f"({node_count} nodes) Running CCX...", end=" ", flush=True)
+    print(f"({node_count} nodes, timeout {timeout:.0f}s) Running CCX...", end=" ", flush=True)
     
-    # Run CalculiX
-    start_time = time.time()
-    try:
-        result = subprocess.run(
-            [ccx_path, "-i", str(inp_file.stem)],
-            capture_output=True,
-            text=True,
-            timeout=600,  # 10 minute timeout
-            cwd=str(case_dir)
-        )
-        elapsed = time.time() - start_time
-    except subprocess.TimeoutExpired:
-        print(f"TIMEOUT (>600s)")
-        return None
-    except Exception as e:
-        print(f"FAILED (run: {e})")
-        return None
+    # Run CalculiX (solver output goes to solver.log in the case directory)
+    pool = SolverPool(ccx_path, workers=1, model=RUNTIME_MODEL)
+    outcome = pool.run([SolveJob(case_id, case_dir, inp_file.stem, node_count)])[case_id]
+    elapsed = outcome["elapsed_s"]
     
-    # Check for solver errors
-    if result.returncode != 0 and "error" in result.stderr.lower():
-        print(f"SOLVER ERROR ({elapsed:.1f}s)")
-        # Save error log
-        with open(case_dir / "error.log", 'w') as f:
-            f.write(result.stdout + "\n" + result.stderr)
+    if not outcome["ok"]:
+        print(f"{outcome['failure'].upper()} ({elapsed:.1f}s, {len(outcome['attempts'])} attempt(s))")
+        _failure(case_id, work_dir, outcome["failure"], params, case_dir,
+                 node_count=node_count, attempts=outcome["attempts"])
         return None
     
     # Extract results from .dat file (more reliable than .frd parsing)
     warpage = extract_warpage(case_dir)
     if warpage is None:
         print(f"PARSE FAILED ({elapsed:.1f}s)")
+        _failure(case_id, work_dir, PARSE_FAILED, params, case_dir,
+                 node_count=node_count, attempts=outcome["attempts"])
         return None
     
     print(f"W_pv={warpage['W_pv_nm']:.1f} nm ({elapsed:.1f}s)")
     
-    return {
+    case_result = {
         "case_id": case_id,
         "W_pv_nm": warpage["W_pv_nm"],
         "W_exposure_max_nm": warpage["W_exposure_max_nm"],
         "node_count": node_count,
         "solver_time_s": round(elapsed, 1),
+        "solver_telemetry": outcome["telemetry"],
+        **outcome["resources"],
         "solver": "CalculiX 2.23 (local)",
         "machine": "Apple Silicon (local)",
         "timestamp": datetime.now().isoformat(),
         **{k: v for k, v in params.items() if k not in ("stiffness",)},
     }
+    if len(outcome["attempts"]) > 1:
+        case_result["attempts"] = len(outcome["attempts"])
+    if deck_stats:
+        case_result["deck_bytes_written"] = deck_stats["bytes_written"]
+        case_result["deck_bytes_shared"] = deck_stats["bytes_shared"]
+    return case_result
 
 
-def run_mesh_convergence(ccx_path):
+def run_mesh_convergence(ccx_path, tol=0.05, element_types=("C3D8",)):
     """
-    Run mesh convergence study with C3D8 elements at k_azi=0.5.
-    Tests N=25, 30, 40, 50, 70 (and 100 if feasible).
+    Run mesh convergence study at k_azi=0.5, refining one level at a time.
+    
+    For each element type, N=25, 30, 40, ... is solved only until the
+    Richardson/GCI error estimate of the finest mesh is below tol; the
+    cheapest converged n_radial/element type is saved as the recommendation
+    for later campaigns.
     """
     print("\n" + "="*80)
-    print("🔬 MESH CONVERGENCE STUDY (C3D8 Solid Elements)")
+    print(f"🔬 MESH CONVERGENCE STUDY ({', '.join(element_types)})")
     print("="*80)
-    print(f"Element: C3D8 (8-node hex, 3 layers through thickness)")
+    print(f"Elements: {', '.join(element_types)} (3 layers through thickness)")
     print(f"Material: Silicon (E=130GPa, CTE=2.6e-6)")
     print(f"k_azi: 0.5 (stable zone)")
     print(f"Load: scan pattern")
+    print(f"Tolerance: {tol*100:.1f}% estimated discretization error (Richardson/GCI)")
     print("="*80)
     
     work_dir = LOCAL_WORK_DIR / "mesh_convergence"
     work_dir.mkdir(parents=True, exist_ok=True)
     
+    studies = []
     results = []
-    
-    # Test mesh densities — start small to verify, then go larger
-    for n_radial in [25, 30, 40, 50, 70]:
-        case_id = f"mesh_c3d8_n{n_radial}_kazi0p5"
-        
-        result = run_single_case(
-            case_id=case_id,
-            ccx_path=ccx_path,
-            work_dir=work_dir,
-            templates_dir=EUV_TEMPLATES,
-            pattern="parametric",
-            load="scan",
-            stiffness=1.5e5,
-            n_radial=n_radial,
-            element_type="C3D8",
-            n_layers=3,
-            k_edge=2.0,
-            k_azi=0.5,
-            pitch=0.005,
-            rho_0=1.0,
-            r_trans=0.13,
-            support_profile="density_scaled",
-        )
+    for element_type in element_types:
+        def solve(n_radial, element_type=element_type):
+            return run_single_case(
+                case_id=f"mesh_{element_type.lower()}_n{n_radial}_kazi0p5",
+                ccx_path=ccx_path,
+                work_dir=work_dir,
+                templates_dir=EUV_TEMPLATES,
+                pattern="parametric",
+                load="scan",
+                stiffness=1.5e5,
+                n_radial=n_radial,
+                element_type=element_type,
+                n_layers=3,
+                k_edge=2.0,
+                k_azi=0.5,
+                pitch=0.005,
+                rho_0=1.0,
+                r_trans=0.13,
+                support_profile="density_scaled",
+            )
         
-        if result:
-            results.append(result)
-    
-    # Compute convergence metrics
-    if len(results) >= 2:
-        print("\n" + "-"*60)
-        print("CONVERGENCE ANALYSIS:")
-        print("-"*60)
-        print(f"{'N':>6} {'Nodes':>10} {'W_pv (nm)':>12} {'Change':>10} {'Time':>8}")
-        print("-"*60)
-        
-        for i, r in enumerate(results):
-            change = ""
-            if i > 0:
-                prev = results[i-1]["W_pv_nm"]
-                curr = r["W_pv_nm"]
-                pct = (curr - prev) / prev * 100
-                change = f"{pct:+.1f}%"
-            print(f"{r.get('n_radial', '?'):>6} {r['node_count']:>10} {r['W_pv_nm']:>12.1f} {change:>10} {r['solver_time_s']:>7.1f}s")
+        print(f"\n  {element_type}:")
+        driver = MeshConvergenceDriver(solve, element_type=element_type, tol=tol)
+        study = driver.run()
+        studies.append(study)
+        results += driver.results
         
-        # Check if last two are within 5%
-        if len(results) >= 2:
-            last_change = abs(results[-1]["W_pv_nm"] - results[-2]["W_pv_nm"]) / results[-2]["W_pv_nm"] * 100
-            if last_change < 5:
-                print(f"\n✅ CONVERGED: Last refinement changed by {last_change:.1f}% (< 5% threshold)")
-            else:
-                print(f"\n⚠️  NOT YET CONVERGED: Last refinement changed by {last_change:.1f}% (> 5% threshold)")
+        if study["levels"]:
+            print("\n" + "-"*60)
+            print(f"CONVERGENCE ANALYSIS ({element_type}):")
+            print("-"*60)
+            print(f"{'N':>6} {'Nodes':>10} {'W_pv (nm)':>12} {'Err vs ext':>11} {'Time':>8}")
+            print("-"*60)
+            for r in study["levels"]:
+                err = r["error_vs_extrapolated"]
+                err = f"{err*100:.2f}%" if err is not None else "-"
+                print(f"{r['n_radial']:>6} {r['node_count']:>10} {r['W_pv_nm']:>12.1f} {err:>11} {r['solver_time_s']:>7.1f}s")
+            est = study["final_estimate"]
+            if study["converged"]:
+                print(f"\n✅ CONVERGED: estimated error {est['error']*100:.2f}% (< {tol*100:.1f}%) "
+                      f"after {study['n_solved']} meshes, W_ext={est['extrapolated']:.1f} nm")
+            elif est is not None:
+                print(f"\n⚠️  NOT YET CONVERGED: estimated error {est['error']*100:.2f}% (> {tol*100:.1f}%)")
+    
+    recommendation = recommend(studies, tol)
+    if recommendation:
+        save_recommendation(recommendation)
+        print(f"\n📐 Recommended mesh: N={recommendation['n_radial']} {recommendation['element_type']} "
+              f"({recommendation['node_count']} nodes, {recommendation['error_vs_extrapolated']*100:.2f}% "
+              f"from extrapolated) -> {RECOMMENDATION_FILE}")
     
     # Save results
     output_file = LOCAL_RESULTS_DIR / "mesh_convergence_c3d8_local.json"
     LOCAL_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
     
     output = {
-        "study": "Mesh Convergence (C3D8 Solid Elements)",
+        "study": f"Mesh Convergence ({', '.join(element_types)})",
         "timestamp": datetime.now().isoformat(),
         "solver": "CalculiX 2.23 (local, Apple Silicon)",
-        "element_type": "C3D8",
+        "element_type": element_types[0] if len(element_types) == 1 else list(element_types),
         "material": "silicon",
         "k_azi": 0.5,
         "load": "scan",
+        "tolerance": tol,
+        "richardson": [{k: v for k, v in st.items() if k != "levels"} for st in studies],
+        "recommendation": recommendation,
         "cases": results,
     }
     
@@ -318,6 +391,9 @@ def run_material_monte_carlo(ccx_path):
     work_dir = LOCAL_WORK_DIR / "material_mc"
     work_dir.mkdir(parents=True, exist_ok=True)
     
+    # Mesh includes are identical across seeds — share them instead of rewriting
+    store = IncludeStore(INCLUDE_STORE_DIR)
+    
     all_results = {}
     
     for material in ["inp", "gan", "aln"]:
@@ -326,21 +402,24 @@ def run_material_monte_carlo(ccx_path):
             print(f"\n--- {material.upper()} @ k_azi={k_azi_base} ({zone}) ---")
             
             results = []
-            rng = np.random.default_rng(42)
+            running = RunningStats()
+            batch = f"mc_{material}_k{str(k_azi_base).replace('.','p')}"
             
             for seed in range(20):
-                # Apply ±5% manufacturing tolerances
+                # Apply ±5% manufacturing tolerances, from this case's own stream
+                rng = MC_SEEDER.rng(batch, seed)
                 k_azi_perturbed = k_azi_base * (1 + 0.05 * (2 * rng.random() - 1))
                 stiffness_scale = 1.0 + 0.05 * (2 * rng.random() - 1)
                 bow = rng.uniform(-5e-6, 5e-6)  # ±5μm bow
                 
-                case_id = f"mc_{material}_k{str(k_azi_base).replace('.','p')}_seed{seed}"
+                case_id = f"{batch}_seed{seed}"
                 
                 result = run_single_case(
                     case_id=case_id,
                     ccx_path=ccx_path,
                     work_dir=work_dir,
                     templates_dir=EUV_TEMPLATES,
+                    store=store,
                     pattern="parametric",
                     load="scan",
                     stiffness=1.5e5 * stiffness_scale,
@@ -363,20 +442,21 @@ def run_material_monte_carlo(ccx_path):
                 
                 if result:
                     results.append(result)
+                    running.push(result["W_pv_nm"])
+                    print(f"    [{seed+1}/20] {running.progress()}", flush=True)
             
-            # Compute statistics
+            # Statistics accumulated while the batch ran
             if results:
-                wpvs = [r["W_pv_nm"] for r in results]
                 stats = {
                     "material": material,
                     "k_azi_base": k_azi_base,
                     "zone": zone,
-                    "n_cases": len(results),
-                    "mean_wpv_nm": float(np.mean(wpvs)),
-                    "std_wpv_nm": float(np.std(wpvs, ddof=1)),
-                    "cv_percent": float(np.std(wpvs, ddof=1) / np.mean(wpvs) * 100),
-                    "min_wpv_nm": float(np.min(wpvs)),
-                    "max_wpv_nm": float(np.max(wpvs)),
+                    "n_cases": running.n,
+                    "mean_wpv_nm": running.mean,
+                    "std_wpv_nm": running.std,
+                    "cv_percent": running.cv_pct,
+                    "min_wpv_nm": running.min,
+                    "max_wpv_nm": running.max,
                 }
                 
                 print(f"\n  STATS: Mean={stats['mean_wpv_nm']:.1f}nm, "
@@ -397,6 +477,60 @@ def run_material_monte_carlo(ccx_path):
     return all_results
 
 
+def run_rerun_plan(ccx_path, plan_file=PLAN_FILE):
+    """
+    Solve the cases of a failure_ledger re-run plan.
+    
+    Results are merged by case_id into RERUN_RESULTS_FILE after every case,
+    so an interrupted re-run resumes where it stopped and the next ledger
+    run drops the recovered cases from the plan. Entries whose physics the
+    local deck cannot reproduce are refused, never recorded as recovered.
+    """
+    print("\n" + "="*80)
+    print("♻️  RE-RUN OF LOST CASES")
+    print("="*80)
+    
+    plan = load_plan(plan_file)
+    done = {}
+    if RERUN_RESULTS_FILE.exists():
+        with open(RERUN_RESULTS_FILE) as f:
+            done = {c["case_id"]: c for c in json.load(f).get("cases", [])}
+    todo = [p for p in plan if p["case_id"] not in done]
+    refused = [p for p in todo if not_reproducible(p["params"])]
+    todo = [p for p in todo if p not in refused]
+    print(f"Plan: {plan_file} ({len(plan)} cases, {len(plan) - len(todo) - len(refused)} already re-run)")
+    for p in refused:
+        print(f"  ⚠️  {p['case_id']}: refused, the local deck cannot reproduce its physics "
+              f"({not_reproducible(p['params'])})")
+    
+    work_dir = LOCAL_WORK_DIR / "reruns"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    store = IncludeStore(INCLUDE_STORE_DIR)
+    LOCAL_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    
+    recovered = 0
+    for i, entry in enumerate(todo):
+        print(f"\n  [{i+1}/{len(todo)}] {entry['case_id']} ({entry['failure']} in {', '.join(entry['sources'])})")
+        result = run_single_case(
+            case_id=entry["case_id"],
+            ccx_path=ccx_path,
+            work_dir=work_dir,
+            templates_dir=EUV_TEMPLATES,
+            store=store,
+            **{**RERUN_DEFAULTS, **entry["params"]},
+        )
+        if result:
+            result["rerun_of"] = {"failure": entry["failure"], "sources": entry["sources"]}
+            done[entry["case_id"]] = result
+            recovered += 1
+            with open(RERUN_RESULTS_FILE, 'w') as f:
+                json.dump({"cases": list(done.values())}, f, indent=2)
+    
+    print(f"\n  Recovered {recovered}/{len(todo)} case(s); still failing cases are in the failure ledger")
+    print(f"📁 Results saved: {RERUN_RESULTS_FILE}")
+    return done
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="Local FEA Runner for Patent 1 Verification")
@@ -404,10 +538,16 @@ def main():
     parser.add_argument("--material-mc", action="store_true", help="Run material Monte Carlo")
     parser.add_argument("--all", action="store_true", help="Run everything")
     parser.add_argument("--test", action="store_true", help="Quick test with tiny mesh (N=15)")
+    parser.add_argument("--mesh-tol", type=float, default=0.05,
+                        help="Relative discretization error at which mesh refinement stops")
+    parser.add_argument("--elements", nargs="+", default=["C3D8"],
+                        help="Element types to study in the mesh convergence run")
+    parser.add_argument("--rerun", nargs="?", type=Path, const=PLAN_FILE, default=None,
+                        help="Solve the cases of a failure_ledger.py re-run plan")
     
     args = parser.parse_args()
     
-    if not any([args.mesh_convergence, args.material_mc, args.all, args.test]):
+    if not any([args.mesh_convergence, args.material_mc, args.all, args.test, args.rerun]):
         parser.print_help()
         return
     
@@ -453,11 +593,14 @@ def main():
         return
     
     if args.mesh_convergence or args.all:
-        run_mesh_convergence(ccx_path)
+        run_mesh_convergence(ccx_path, tol=args.mesh_tol, element_types=tuple(args.elements))
     
     if args.material_mc or args.all:
         run_material_monte_carlo(ccx_path)
     
+    if args.rerun:
+        run_rerun_plan(ccx_path, args.rerun)
+    
     print("\n" + "="*80)
     print("✅ ALL LOCAL FEA RUNS COMPLETE")
     print("="*80)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+RUNTIME MODEL — Predict CalculiX wall time from mesh size and past runs
+================================================================================
+
+Fits log(solver_time_s) = a + b·log(node_count) on every result record that
+carries both fields (04_DATA/local_verified/*.json and any results observed
+during the current run). The residual spread gives an upper quantile, which
+is what per-case timeouts are derived from:
+
+    timeout = clip(safety × exp(a + b·log(N) + z·σ), floor, ceiling)
+
+With fewer than three records, a conservative linear fallback is used.
+
+A runner that used a fixed timeout before passes it as fixed_timeout_s. It
+stays the floor until the history holds MIN_RECORDS_NEAR records within
+NEAR_FACTOR of the target node count: a fit on a handful of small meshes
+extrapolates badly and should not cut a large case off sooner than before.
+
+Usage:
+    python3 scripts/runtime_model.py               # Fit and print the model
+    python3 scripts/runtime_model.py --nodes 50000 # Predict one case
+
+================================================================================
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LOCAL_RESULTS_DIR = Path(__file__).parent.parent / "04_DATA" / "local_verified"
+
+# Fallback when there is no history: ~6 s per 50k nodes locally, ×10 margin
+FALLBACK_SECONDS_PER_NODE = 6.0 / 50_000
+
+# Generator mesh size before rendering: ≈ 5.1·N² nodes per node layer
+# (C3D8 with n_layers=3 has 4 node layers: 50,847 nodes at N=50, 99,965 at N=70)
+NODES_PER_LAYER_PER_N2 = 5.08
+
+# Records needed within NEAR_FACTOR of a node count before the model alone sets its timeout
+MIN_RECORDS_NEAR = 5
+NEAR_FACTOR = 2.0
+
+
+def iter_result_records(obj) -> Iterable[Dict]:
+    """Yield every dict (at any depth) that has node_count and solver_time_s."""
+    if isinstance(obj, dict):
+        if "node_count" in obj and "solver_time_s" in obj:
+            yield obj
+        for v in obj.values():
+            yield from iter_result_records(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from iter_result_records(v)
+
+
+def load_history(results_dir: Path = LOCAL_RESULTS_DIR) -> List[Tuple[int, float]]:
+    """Collect (node_count, solver_time_s) pairs from the local result files."""
+    pairs = []
+    for path in sorted(Path(results_dir).glob("*.json")):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for rec in iter_result_records(data):
+            try:
+                n, t = int(rec["node_count"]), float(rec["solver_time_s"])
+            except (TypeError, ValueError):
+                continue
+            if n > 0 and t > 0:
+                pairs.append((n, t))
+    return pairs
+
+
+def count_deck_nodes(case_dir: Path) -> int:
+    """Count node lines in a rendered case's nodes.inp (0 if absent)."""
+    nodes_file = Path(case_dir) / "nodes.inp"
+    if not nodes_file.exists():
+        return 0
+    with open(nodes_file) as f:
+        return sum(1 for line in f if line.strip() and not line.startswith("*"))
+
+
+def estimate_nodes(params: Dict) -> int:
+    """Node count a case will render to, from its mesh parameters (shells: one node layer)."""
+    n_radial = params.get("n_radial", 50)
+    element_type = str(params.get("element_type", "C3D8"))
+    node_layers = 1 if element_type.startswith("S") else params.get("n_layers", 3) + 1
+    return int(NODES_PER_LAYER_PER_N2 * n_radial ** 2 * node_layers)
+
+
+class RuntimeModel:
+    """Log-log regression of solver wall time on node count."""
+
+    def __init__(self, pairs: Optional[List[Tuple[int, float]]] = None,
+                 safety: float = 3.0, z: float = 2.0,
+                 floor_s: float = 60.0, ceiling_s: float = 6 * 3600.0,
+                 fixed_timeout_s: Optional[float] = None):
+        self.pairs = list(pairs or [])
+        self.safety = safety
+        self.z = z
+        self.floor_s = floor_s
+        self.ceiling_s = ceiling_s
+        self.fixed_timeout_s = fixed_timeout_s
+        self.coef = None
+        self.sigma = None
+        self.fit()
+
+    @classmethod
+    def from_history(cls, results_dir: Path = LOCAL_RESULTS_DIR, **kwargs) -> "RuntimeModel":
+        return cls(load_history(results_dir), **kwargs)
+
+    def fit(self):
+        if len(self.pairs) < 3:
+            self.coef, self.sigma = None, None
+            return
+        n = np.array([p[0] for p in self.pairs], dtype=float)
+        t = np.array([p[1] for p in self.pairs], dtype=float)
+        X = np.column_stack([np.ones_like(n), np.log(n)])
+        coef, *_ = np.linalg.lstsq(X, np.log(t), rcond=None)
+        resid = np.log(t) - X @ coef
+        dof = max(len(t) - 2, 1)
+        self.coef = coef
+        self.sigma = float(np.sqrt(np.sum(resid ** 2) / dof))
+
+    def observe(self, node_count: int, solver_time_s: float):
+        """Add a completed run and refit."""
+        if node_count and solver_time_s and solver_time_s > 0:
+            self.pairs.append((int(node_count), float(solver_time_s)))
+            self.fit()
+
+    def predict(self, node_count: int) -> float:
+        """Median predicted wall time in seconds."""
+        if self.coef is None or not node_count:
+            return max(node_count, 1) * FALLBACK_SECONDS_PER_NODE
+        return float(np.exp(self.coef[0] + self.coef[1] * np.log(node_count)))
+
+    def upper(self, node_count: int) -> float:
+        """Upper-quantile wall time (median × exp(z·σ))."""
+        if self.coef is None:
+            return self.predict(node_count) * 10
+        return self.predict(node_count) * float(np.exp(self.z * self.sigma))
+
+    def records_near(self, node_count: int) -> int:
+        """Number of records within NEAR_FACTOR of node_count."""
+        if not node_count:
+            return 0
+        return sum(1 for n, _ in self.pairs if abs(np.log(n / node_count)) <= np.log(NEAR_FACTOR))
+
+    def timeout(self, node_count: int) -> float:
+        """Per-case timeout in seconds (never below fixed_timeout_s until the history covers node_count)."""
+        floor = self.floor_s
+        if self.fixed_timeout_s and self.records_near(node_count) < MIN_RECORDS_NEAR:
+            floor = max(floor, self.fixed_timeout_s)
+        return float(np.clip(self.safety * self.upper(node_count), floor, max(floor, self.ceiling_s)))
+
+    def describe(self) -> str:
+        if self.coef is None:
+            return f"fallback ({len(self.pairs)} records): t ≈ {FALLBACK_SECONDS_PER_NODE:.2e} s/node"
+        return (f"t ≈ {np.exp(self.coef[0]):.3e} · N^{self.coef[1]:.2f} s "
+                f"(σ_log={self.sigma:.2f}, {len(self.pairs)} records)")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Fit the CalculiX runtime model")
+    parser.add_argument("--nodes", type=int, nargs="*", default=[12_000, 35_752, 49_604, 100_000],
+                        help="Node counts to predict")
+    args = parser.parse_args()
+
+    model = RuntimeModel.from_history()
+    print(f"Model: {model.describe()}")
+    print(f"\n{'Nodes':>10} {'Median (s)':>12} {'Upper (s)':>12} {'Timeout (s)':>12}")
+    print("-" * 50)
+    for n in args.nodes:
+        print(f"{n:>10} {model.predict(n):>12.1f} {model.upper(n):>12.1f} {model.timeout(n):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+SCRATCH MODE — Solve on tmpfs, persist one compact artifact per case
+================================================================================
+
+By default local_runs/ keeps every rendered deck and every solver output
+(.frd, .sta, .cvg, .dat, solver.log) of every case. A 260-case campaign
+leaves gigabytes behind, most of it .frd files nobody reopens, and every
+write goes through the disk.
+
+In scratch mode the runners render and solve each case in a RAM-backed
+directory (/dev/shm when writable, otherwise the system temp dir). Once the
+results are extracted, the case is reduced to a single compressed .npz
+artifact and the scratch directory is deleted:
+
+    metadata       JSON string: the result record (or failure record) and
+                   the convergence telemetry summary
+    node_ids       int32   (n,)
+    displacement   float32 (n, 3)  Ux, Uy, Uz from the .dat file
+    residuals      float32 (m,)    largest residual per Newton iteration
+
+Artifacts live under local_runs/_artifacts/<campaign>/<case_id>.npz. With a
+quota, the oldest artifacts are evicted when the total exceeds it; the scalar
+results stay in 04_DATA/local_verified, so eviction only drops the fields.
+
+Usage (from the runners):
+    scratch = ScratchArea()
+    case_dir = scratch.path_for(work_dir, case_id)      # render + solve here
+    artifacts = ArtifactStore(LOCAL_WORK_DIR / "_artifacts", quota_bytes=5e9)
+    info = artifacts.put(campaign, case_id, case_dir, metadata)
+    scratch.release(case_dir)
+
+    python3 scripts/scratch.py --stats
+    python3 scripts/scratch.py --evict --quota-gb 2
+    python3 scripts/scratch.py --show local_runs/_artifacts/cliff_mapping/<case>.npz
+
+================================================================================
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from continuation import read_displacement_field
+from include_store import IncludeStore
+from solver_telemetry import TELEMETRY_FILE
+
+ARTIFACTS_DIR = Path(__file__).parent.parent / "local_runs" / "_artifacts"
+
+# Preferred RAM-backed scratch root
+RAM_SCRATCH_ROOT = Path("/dev/shm")
+
+
+class ScratchArea:
+    """Per-process scratch tree for rendering and solving cases in RAM."""
+
+    def __init__(self, root: Optional[Path] = None):
+        if root is None:
+            base = RAM_SCRATCH_ROOT if RAM_SCRATCH_ROOT.is_dir() and os.access(RAM_SCRATCH_ROOT, os.W_OK) \
+                else Path(tempfile.gettempdir())
+            root = Path(tempfile.mkdtemp(prefix="lpca_scratch_", dir=str(base)))
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.on_tmpfs = str(self.root).startswith(str(RAM_SCRATCH_ROOT))
+
+    def path_for(self, work_dir: Path, case_id: str) -> Path:
+        """Scratch case directory mirroring work_dir/case_id."""
+        return self.root / Path(work_dir).name / case_id
+
+    def include_store(self) -> IncludeStore:
+        """An include store inside the scratch tree, so includes are hard-linked in RAM."""
+        return IncludeStore(self.root / "_include_store")
+
+    def release(self, case_dir: Path):
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _residual_history(case_dir: Path) -> np.ndarray:
+    try:
+        with open(Path(case_dir) / TELEMETRY_FILE) as f:
+            iterations = json.load(f).get("iterations", [])
+    except (OSError, ValueError):
+        return np.zeros(0, dtype=np.float32)
+    return np.array([it["residual"] for it in iterations if it.get("residual") is not None],
+                    dtype=np.float32)
+
+
+def write_artifact(path: Path, case_dir: Path, metadata: Dict) -> int:
+    """Write the compact artifact of a solved (or failed) case; returns its size in bytes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    field = read_displacement_field(case_dir)
+    if field is not None:
+        node_ids, disp = field
+    else:
+        node_ids, disp = np.zeros(0), np.zeros((0, 3))
+
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(
+            f,
+            metadata=np.array(json.dumps(metadata, default=str)),
+            node_ids=node_ids.astype(np.int32),
+            displacement=disp.astype(np.float32),
+            residuals=_residual_history(case_dir),
+        )
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def load_artifact(path: Path) -> Dict:
+    """Read an artifact back: metadata dict plus the field arrays."""
+    with np.load(path) as data:
+        out = {k: data[k] for k in data.files if k != "metadata"}
+        out["metadata"] = json.loads(str(data["metadata"]))
+    return out
+
+
+class ArtifactStore:
+    """Directory of per-case artifacts with oldest-first eviction under a quota."""
+
+    def __init__(self, root: Path = ARTIFACTS_DIR, quota_bytes: Optional[float] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self._usage = None
+
+    def entries(self) -> List[Path]:
+        """All artifacts, oldest first."""
+        return sorted(self.root.rglob("*.npz"), key=lambda p: p.stat().st_mtime)
+
+    def usage(self) -> int:
+        if self._usage is None:
+            self._usage = sum(p.stat().st_size for p in self.root.rglob("*.npz"))
+        return self._usage
+
+    def put(self, campaign: str, case_id: str, case_dir: Path, metadata: Dict) -> Dict:
+        """Persist a case directory as an artifact; returns path, bytes and evictions."""
+        path = self.root / campaign / f"{case_id}.npz"
+        previous = path.stat().st_size if path.exists() else 0
+        usage = self.usage()
+        size = write_artifact(path, case_dir, metadata)
+        self._usage = usage - previous + size
+        evicted = self.evict(keep=path)
+        return {"path": path, "bytes": size, "evicted": evicted}
+
+    def evict(self, keep: Optional[Path] = None) -> List[Path]:
+        """Delete the oldest artifacts until usage is within the quota."""
+        if self.quota_bytes is None or self.usage() <= self.quota_bytes:
+            return []
+        evicted = []
+        for p in self.entries():
+            if self._usage <= self.quota_bytes:
+                break
+            if keep is not None and p == keep:
+                continue
+            size = p.stat().st_size
+            p.unlink()
+            self._usage -= size
+            evicted.append(p)
+        return evicted
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or evict compact case artifacts")
+    parser.add_argument("--root", type=Path, default=ARTIFACTS_DIR, help="Artifact directory")
+    parser.add_argument("--stats", action="store_true", help="Print artifact usage per campaign")
+    parser.add_argument("--evict", action="store_true", help="Evict oldest artifacts down to --quota-gb")
+    parser.add_argument("--quota-gb", type=float, default=None, help="Artifact quota in GB")
+    parser.add_argument("--show", type=Path, default=None, help="Print one artifact")
+    args = parser.parse_args()
+
+    if args.show:
+        art = load_artifact(args.show)
+        print(json.dumps(art["metadata"], indent=2))
+        for k in ("node_ids", "displacement", "residuals"):
+            print(f"{k}: shape={art[k].shape} dtype={art[k].dtype}")
+        return
+
+    quota = args.quota_gb * 1e9 if args.quota_gb is not None else None
+    store = ArtifactStore(args.root, quota_bytes=quota)
+    if args.evict:
+        if quota is None:
+            parser.error("--evict needs --quota-gb")
+        evicted = store.evict()
+        print(f"Evicted {len(evicted)} artifact(s)")
+
+    by_campaign = {}
+    for p in store.entries():
+        n, size = by_campaign.get(p.parent.name, (0, 0))
+        by_campaign[p.parent.name] = (n + 1, size + p.stat().st_size)
+    print(f"\n{'Campaign':<30} {'Cases':>7} {'MB':>9} {'KB/case':>9}")
+    print("-" * 58)
+    for name, (n, size) in sorted(by_campaign.items()):
+        print(f"{name:<30} {n:>7} {size/1e6:>9.2f} {size/1e3/n:>9.1f}")
+    print("-" * 58)
+    print(f"{'Total':<30} {sum(n for n, _ in by_campaign.values()):>7} {store.usage()/1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
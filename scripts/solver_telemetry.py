@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+SOLVER TELEMETRY — Live convergence parsing and early divergence abort
+================================================================================
+
+A diverging case (residual spikes like those in
+04_DATA/logs/solver_convergence_k0.82.log) used to burn its whole timeout,
+because the runners only looked at the return code at the end. The
+ConvergenceMonitor is fed solver output line by line while ccx runs. It:
+
+1. Parses per-increment / per-iteration records (largest residual, largest
+   correction, RMS correction, wall time). It understands both CalculiX
+   stdout ("largest residual force= ...") and the annotated log format
+   ("Largest residual: ...").
+2. Flags divergence when the residual keeps growing across consecutive
+   iterations well above the increment's starting residual, when an
+   increment is cut back too often, or when a residual is not finite.
+3. Serializes everything to telemetry.json next to the case result.
+
+Usage:
+    python3 scripts/solver_telemetry.py 04_DATA/logs/solver_convergence_k0.82.log
+    python3 scripts/solver_telemetry.py local_runs/cliff_mapping/<case>/solver.log --json
+
+================================================================================
+"""
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TELEMETRY_FILE = "telemetry.json"
+
+NUM = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|nan|NaN|inf|Infinity)"
+
+RE_INCREMENT_CCX = re.compile(r"^\s*increment\s+(\d+)\s+attempt\s+(\d+)", re.IGNORECASE)
+RE_INCREMENT_LOG = re.compile(r"^\s*Increment\s+(\d+)(?:\s*\(FINAL\))?\s*:\s*$")
+RE_ITERATION = re.compile(r"^\s*iteration\s+(\d+)\b", re.IGNORECASE)
+RE_RESIDUAL = re.compile(r"largest residual(?: force)?\s*[=:]\s*" + NUM, re.IGNORECASE)
+RE_CORRECTION = re.compile(r"largest correction(?: to disp)?\s*[=:]\s*" + NUM, re.IGNORECASE)
+RE_RMS = re.compile(r"rms correction\s*[=:]\s*" + NUM, re.IGNORECASE)
+RE_INC_SIZE = re.compile(r"increment size\s*=\s*" + NUM, re.IGNORECASE)
+RE_WALL = re.compile(r"wall time:\s*" + NUM + r"\s*s", re.IGNORECASE)
+RE_NO_CONV = re.compile(r"\bno convergence\b", re.IGNORECASE)
+RE_CONV = re.compile(r"\bconvergence\b|\*\*\* CONVERGED", re.IGNORECASE)
+
+
+class ConvergenceMonitor:
+    """Incremental parser of solver output with a divergence detector."""
+
+    def __init__(self, grow_streak: int = 4, blowup_factor: float = 10.0, max_cutbacks: int = 4):
+        self.grow_streak = grow_streak
+        self.blowup_factor = blowup_factor
+        self.max_cutbacks = max_cutbacks
+        self.iterations: List[Dict] = []
+        self.increments: List[Dict] = []
+        self.abort_reason: Optional[str] = None
+        self._inc = None
+        self._it = None
+        self._residuals: List[float] = []
+        self._buffer = ""
+
+    # -- parsing ------------------------------------------------------------
+
+    def _open_increment(self, number: int, attempt: int, t: float):
+        self._close_increment(t)
+        self._inc = {"increment": number, "attempt": attempt, "iterations": 0, "converged": None,
+                     "t_start": t, "wall_s": None, "increment_size": None,
+                     "first_residual": None, "max_residual": None}
+        self.increments.append(self._inc)
+        self._it = None
+        self._residuals = []
+
+    def _close_increment(self, t: float):
+        if self._inc is not None and self._inc["wall_s"] is None:
+            self._inc["wall_s"] = round(t - self._inc["t_start"], 3)
+
+    def feed_text(self, text: str, t: float) -> Optional[str]:
+        """Feed a chunk of output (may end mid-line); returns an abort reason or None."""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self.feed(line, t)
+        return self.abort_reason
+
+    def flush(self, t: float) -> Optional[str]:
+        """Parse any trailing partial line and close the open increment."""
+        if self._buffer:
+            self.feed(self._buffer, t)
+            self._buffer = ""
+        self._close_increment(t)
+        return self.abort_reason
+
+    def feed(self, line: str, t: float) -> Optional[str]:
+        """Parse one line of output observed at time t (seconds since launch)."""
+        m = RE_INCREMENT_CCX.match(line)
+        if m:
+            self._open_increment(int(m.group(1)), int(m.group(2)), t)
+            return self._check()
+        m = RE_INCREMENT_LOG.match(line)
+        if m:
+            self._open_increment(int(m.group(1)), 1, t)
+            return None
+        if self._inc is None:
+            return None
+
+        m = RE_ITERATION.match(line)
+        if m:
+            self._it = {"increment": self._inc["increment"], "attempt": self._inc["attempt"],
+                        "iteration": int(m.group(1)), "residual": None, "correction": None,
+                        "rms_correction": None, "t": round(t, 3)}
+            self.iterations.append(self._it)
+            self._inc["iterations"] = max(self._inc["iterations"], self._it["iteration"])
+            return None
+
+        m = RE_INC_SIZE.search(line)
+        if m:
+            self._inc["increment_size"] = float(m.group(1))
+            return None
+        m = RE_WALL.search(line)
+        if m:
+            self._inc["wall_s"] = float(m.group(1))
+            return None
+
+        if self._it is not None:
+            m = RE_RESIDUAL.search(line)
+            if m:
+                r = float(m.group(1))
+                self._it["residual"] = r
+                self._residuals.append(r)
+                if self._inc["first_residual"] is None:
+                    self._inc["first_residual"] = r
+                self._inc["max_residual"] = r if self._inc["max_residual"] is None else max(self._inc["max_residual"], r)
+                return self._check()
+            m = RE_CORRECTION.search(line)
+            if m:
+                self._it["correction"] = float(m.group(1))
+                return None
+            m = RE_RMS.search(line)
+            if m:
+                self._it["rms_correction"] = float(m.group(1))
+                return None
+
+        if RE_NO_CONV.search(line):
+            self._inc["converged"] = False
+        elif RE_CONV.search(line):
+            self._inc["converged"] = True
+            self._close_increment(t)
+        return None
+
+    # -- divergence ---------------------------------------------------------
+
+    def _check(self) -> Optional[str]:
+        if self.abort_reason:
+            return self.abort_reason
+        inc = self._inc
+        if inc["attempt"] > self.max_cutbacks:
+            self.abort_reason = f"increment {inc['increment']} cut back {inc['attempt'] - 1} times"
+            return self.abort_reason
+
+        res = self._residuals
+        if res and not math.isfinite(res[-1]):
+            self.abort_reason = f"non-finite residual in increment {inc['increment']}"
+        elif len(res) > self.grow_streak:
+            tail = res[-(self.grow_streak + 1):]
+            growing = all(b > a for a, b in zip(tail, tail[1:]))
+            if growing and res[-1] > self.blowup_factor * res[0]:
+                self.abort_reason = (f"residual grew for {self.grow_streak} iterations in increment "
+                                     f"{inc['increment']} ({res[0]:.3e} -> {res[-1]:.3e})")
+        return self.abort_reason
+
+    # -- output -------------------------------------------------------------
+
+    def summary(self) -> Dict:
+        """Compact per-case figures stored in the result dict."""
+        residuals = [it["residual"] for it in self.iterations if it["residual"] is not None]
+        finite = [r for r in residuals if math.isfinite(r)]
+        return {
+            "increments": len({(i["increment"]) for i in self.increments}),
+            "attempts": len(self.increments),
+            "cutbacks": sum(1 for i in self.increments if i["attempt"] > 1),
+            "iterations": sum(i["iterations"] for i in self.increments),
+            "max_iterations_per_increment": max((i["iterations"] for i in self.increments), default=0),
+            "max_residual": max(finite) if finite else None,
+            "aborted": self.abort_reason,
+        }
+
+    def to_dict(self) -> Dict:
+        return {"summary": self.summary(), "increments": self.increments, "iterations": self.iterations}
+
+    def save(self, case_dir: Path) -> Path:
+        path = Path(case_dir) / TELEMETRY_FILE
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        return path
+
+
+def parse_log(path: Path, **kwargs) -> ConvergenceMonitor:
+    """Parse a complete solver log offline (no wall clock: t is the line number)."""
+    mon = ConvergenceMonitor(**kwargs)
+    with open(path, errors="replace") as f:
+        for i, line in enumerate(f):
+            mon.feed(line.rstrip("\n"), float(i))
+    mon.flush(0.0)
+    return mon
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Parse CalculiX convergence telemetry from a solver log")
+    parser.add_argument("log", type=Path, help="Solver log (ccx stdout or annotated log)")
+    parser.add_argument("--json", action="store_true", help="Print the full telemetry as JSON")
+    args = parser.parse_args()
+
+    mon = parse_log(args.log)
+    if args.json:
+        print(json.dumps(mon.to_dict(), indent=1))
+        return
+
+    print(f"\n{'Inc':>4} {'Att':>4} {'Iters':>6} {'First resid':>12} {'Max resid':>12} {'Wall (s)':>9} {'Conv':>6}")
+    print("-" * 60)
+    for inc in mon.increments:
+        fr = f"{inc['first_residual']:.3e}" if inc["first_residual"] is not None else "-"
+        mr = f"{inc['max_residual']:.3e}" if inc["max_residual"] is not None else "-"
+        wall = f"{inc['wall_s']:.2f}" if inc["wall_s"] is not None else "-"
+        print(f"{inc['increment']:>4} {inc['attempt']:>4} {inc['iterations']:>6} {fr:>12} {mr:>12} "
+              f"{wall:>9} {str(inc['converged']):>6}")
+    s = mon.summary()
+    print("-" * 60)
+    print(f"Total iterations: {s['iterations']}, cutbacks: {s['cutbacks']}, "
+          f"divergence: {s['aborted'] or 'none detected'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+W_PV SURROGATE — Gaussian process on the solved corpus, with active learning
+================================================================================
+
+More than 800 solved cases sit in 04_DATA/raw and 04_DATA/local_verified, yet
+every what-if question used to need a fresh CalculiX run. This module fits a
+Gaussian process to all of them and answers in well under a millisecond.
+
+Inputs (normalized by analyze_raw_data.normalize_case):
+    k_azi, k_edge, n_harmonic, stiffness_scale, bow_um   standardized
+    load, material                                       one-hot
+
+Load names that mean the same generator load (LOAD_ALIASES: the cloud
+corpus's "gradient" is the local "gradient_z") are merged before encoding.
+
+Target: log(W_pv_nm). W_pv spans four orders of magnitude across the cliff,
+so the GP works in log space and reports the median W_pv with a 95% band.
+
+Kernel: squared exponential with one length scale per input (ARD) plus a
+noise term, which absorbs mesh and Monte Carlo scatter between campaigns.
+Hyperparameters maximize the log marginal likelihood (L-BFGS-B, analytic
+gradient) on a subsample; the final factorization uses every case.
+
+Active learning: propose() scores a random candidate pool by posterior
+standard deviation, takes the most uncertain candidate, conditions the GP on
+it (the variance does not depend on the unseen W_pv) and repeats, so one
+batch does not cluster in a single uncertain spot. By default candidates are
+restricted to what the local kill-shot runner can solve (runnable_domain:
+RUNNABLE_K_AZI, RUNNABLE_LOADS, RUNNABLE_MATERIALS); the corpus also holds
+cloud-only loads (hotspot, edge_ring), materials (glass) and k_azi out to
+2.0, which would otherwise attract the most uncertain proposals.
+
+Usage:
+    python3 scripts/surrogate.py --fit                       # Fit and save, print LOO check
+    python3 scripts/surrogate.py --predict k_azi=0.78 load=gradient_z material=sic
+    python3 scripts/surrogate.py --propose 8 --k-azi 0.6 0.95 --material silicon --out proposals.json
+    python3 scripts/surrogate.py --propose 8 --corpus-domain    # Anywhere the corpus reaches
+    python3 scripts/run_killshot_campaign.py --active-learning --al-rounds 3 --al-batch 5
+
+================================================================================
+"""
+
+import json
+import time
+import numpy as np
+from pathlib import Path
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from typing import Dict, List, Optional, Tuple
+
+from analyze_raw_data import iter_corpus_cases
+
+SURROGATE_FILE = Path(__file__).parent.parent / "local_runs" / "_surrogate" / "wpv_gp.npz"
+
+CONTINUOUS = ("k_azi", "k_edge", "n_harmonic", "stiffness_scale", "bow_um")
+CATEGORICAL = ("load", "material")
+
+# Nominal spring stiffness of the generator decks (stiffness_scale = 1)
+NOMINAL_STIFFNESS = 1.5e5
+
+# Corpus load names -> the generator load they denote
+LOAD_ALIASES = {"gradient": "gradient_z"}
+
+# What the local kill-shot runner solves (the cloud corpus has more)
+RUNNABLE_K_AZI = (0.5, 1.3)
+RUNNABLE_LOADS = ["scan", "gradient_z", "uniform"]
+RUNNABLE_MATERIALS = ["silicon", "sic", "gaas", "inp", "gan", "aln"]
+
+# Bounds on log hyperparameters: length scales, signal variance, noise variance
+LOG_LENGTH_BOUNDS = (np.log(0.05), np.log(50.0))
+LOG_SIGNAL_BOUNDS = (np.log(1e-3), np.log(1e2))
+LOG_NOISE_BOUNDS = (np.log(1e-6), np.log(1.0))
+
+
+class Surrogate:
+    """ARD Gaussian process on log(W_pv) over the normalized case inputs."""
+
+    def __init__(self, max_fit_points: int = 600, seed: int = 0):
+        self.max_fit_points = max_fit_points
+        self.seed = seed
+        self.categories: Dict[str, List[str]] = {}
+        self.x_mean = None
+        self.x_std = None
+        self.y_mean = 0.0
+        self.theta = None
+        self.X = None
+        self.y = None
+
+    # -- encoding -----------------------------------------------------------
+
+    @staticmethod
+    def _category(case: Dict, c: str) -> str:
+        value = str(case[c])
+        return LOAD_ALIASES.get(value, value) if c == "load" else value
+
+    def _set_encoding(self, cases: List[Dict]):
+        self.categories = {c: sorted({self._category(case, c) for case in cases}) for c in CATEGORICAL}
+        cont = np.array([[case[k] for k in CONTINUOUS] for case in cases], dtype=float)
+        self.x_mean = cont.mean(axis=0)
+        std = cont.std(axis=0)
+        self.x_std = np.where(std > 1e-12, std, 1.0)
+
+    def encode(self, cases: List[Dict]) -> np.ndarray:
+        cont = np.array([[case[k] for k in CONTINUOUS] for case in cases], dtype=float)
+        cols = [(cont - self.x_mean) / self.x_std]
+        for c in CATEGORICAL:
+            onehot = np.zeros((len(cases), len(self.categories[c])))
+            for i, case in enumerate(cases):
+                value = self._category(case, c)
+                if value in self.categories[c]:
+                    onehot[i, self.categories[c].index(value)] = 1.0
+            cols.append(onehot)
+        return np.hstack(cols)
+
+    @property
+    def feature_names(self) -> List[str]:
+        return list(CONTINUOUS) + [f"{c}={v}" for c in CATEGORICAL for v in self.categories[c]]
+
+    # -- GP algebra ---------------------------------------------------------
+
+    def _kernel(self, A: np.ndarray, B: np.ndarray, theta: np.ndarray) -> np.ndarray:
+        d = A.shape[1]
+        ls = np.exp(theta[:d])
+        sf2 = np.exp(theta[d])
+        a, b = A / ls, B / ls
+        sq = (a ** 2).sum(1)[:, None] + (b ** 2).sum(1)[None, :] - 2 * a @ b.T
+        return sf2 * np.exp(-0.5 * np.maximum(sq, 0.0))
+
+    def _nll(self, theta: np.ndarray, X: np.ndarray, y: np.ndarray) -> Tuple[float, np.ndarray]:
+        """Negative log marginal likelihood and its gradient."""
+        n, d = X.shape
+        Kf = self._kernel(X, X, theta)
+        sn2 = np.exp(theta[d + 1])
+        try:
+            L = cho_factor(Kf + sn2 * np.eye(n), lower=True)
+        except np.linalg.LinAlgError:
+            return 1e25, np.zeros_like(theta)
+        alpha = cho_solve(L, y)
+        nll = 0.5 * y @ alpha + np.log(np.diag(L[0])).sum() + 0.5 * n * np.log(2 * np.pi)
+
+        W = np.outer(alpha, alpha) - cho_solve(L, np.eye(n))
+        grad = np.empty_like(theta)
+        ls = np.exp(theta[:d])
+        for j in range(d):
+            D = (X[:, j][:, None] - X[:, j][None, :]) ** 2 / ls[j] ** 2
+            grad[j] = -0.5 * np.sum(W * Kf * D)
+        grad[d] = -0.5 * np.sum(W * Kf)
+        grad[d + 1] = -0.5 * sn2 * np.trace(W)
+        return float(nll), grad
+
+    def _factor(self, X: np.ndarray, y: np.ndarray):
+        d = X.shape[1]
+        K = self._kernel(X, X, self.theta) + np.exp(self.theta[d + 1]) * np.eye(len(X))
+        L = cho_factor(K, lower=True)
+        return L, cho_solve(L, y), cho_solve(L, np.eye(len(X)))
+
+    # -- public API ---------------------------------------------------------
+
+    def fit(self, cases: List[Dict], optimize: bool = True) -> "Surrogate":
+        """Fit to normalized cases (dicts with the input keys and W_pv_nm)."""
+        self._set_encoding(cases)
+        X = self.encode(cases)
+        y = np.log(np.array([c["W_pv_nm"] for c in cases], dtype=float))
+        self.y_mean = float(y.mean())
+        yc = y - self.y_mean
+        d = X.shape[1]
+
+        if self.theta is None or len(self.theta) != d + 2:
+            self.theta = np.concatenate([np.zeros(d), [np.log(max(yc.var(), 1e-3)), np.log(1e-2)]])
+        if optimize:
+            rng = np.random.default_rng(self.seed)
+            idx = np.arange(len(X))
+            if len(idx) > self.max_fit_points:
+                idx = rng.choice(idx, self.max_fit_points, replace=False)
+            bounds = [LOG_LENGTH_BOUNDS] * d + [LOG_SIGNAL_BOUNDS, LOG_NOISE_BOUNDS]
+            res = minimize(self._nll, self.theta, args=(X[idx], yc[idx]), jac=True,
+                           method="L-BFGS-B", bounds=bounds, options={"maxiter": 200})
+            self.theta = res.x
+
+        self.X, self.y = X, yc
+        self._L, self._alpha, self._Kinv = self._factor(X, yc)
+        return self
+
+    @classmethod
+    def from_corpus(cls, **kwargs) -> "Surrogate":
+        return cls(**kwargs).fit(list(iter_corpus_cases()))
+
+    def predict(self, cases: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Posterior mean and standard deviation of log(W_pv) (latent, without noise)."""
+        Xs = self.encode(cases)
+        Ks = self._kernel(Xs, self.X, self.theta)
+        mu = Ks @ self._alpha + self.y_mean
+        sf2 = np.exp(self.theta[self.X.shape[1]])
+        var = sf2 - np.sum((Ks @ self._Kinv) * Ks, axis=1)
+        return mu, np.sqrt(np.maximum(var, 1e-12))
+
+    def predict_wpv(self, case: Dict, z: float = 1.96) -> Dict:
+        """Median W_pv and a z-sigma predictive band (noise included) for one case."""
+        mu, sd = self.predict([case])
+        sn2 = np.exp(self.theta[self.X.shape[1] + 1])
+        total = float(np.sqrt(sd[0] ** 2 + sn2))
+        return {"W_pv_nm": float(np.exp(mu[0])), "W_pv_lo_nm": float(np.exp(mu[0] - z * total)),
+                "W_pv_hi_nm": float(np.exp(mu[0] + z * total)), "log_std": total}
+
+    def loo(self) -> Dict:
+        """Closed-form leave-one-out residuals: RMSE and 95% coverage in log space."""
+        d = np.diag(self._Kinv)
+        resid = self._alpha / d
+        sd = np.sqrt(1.0 / d)
+        return {"n": len(resid), "rmse_log": float(np.sqrt(np.mean(resid ** 2))),
+                "median_abs_pct": float(np.median(np.abs(np.expm1(resid))) * 100),
+                "coverage_95": float(np.mean(np.abs(resid) <= 1.96 * sd))}
+
+    def length_scales(self) -> Dict[str, float]:
+        return dict(zip(self.feature_names, np.exp(self.theta[:self.X.shape[1]]).round(3).tolist()))
+
+    def save(self, path: Path = SURROGATE_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"categories": self.categories, "y_mean": self.y_mean}
+        with open(path, 'wb') as f:
+            np.savez(f, X=self.X, y=self.y, theta=self.theta, x_mean=self.x_mean, x_std=self.x_std,
+                     meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: Path = SURROGATE_FILE) -> "Surrogate":
+        s = cls()
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            s.X, s.y, s.theta = data["X"], data["y"], data["theta"]
+            s.x_mean, s.x_std = data["x_mean"], data["x_std"]
+        s.categories, s.y_mean = meta["categories"], meta["y_mean"]
+        s._L, s._alpha, s._Kinv = s._factor(s.X, s.y)
+        return s
+
+
+def runnable_domain(surrogate: Surrogate, k_azi: Tuple[float, float] = RUNNABLE_K_AZI) -> Dict:
+    """candidate_pool domain limited to the inputs the local runner solves and the model has seen."""
+    return {"k_azi": tuple(k_azi),
+            "load": [l for l in RUNNABLE_LOADS if l in surrogate.categories["load"]],
+            "material": [m for m in RUNNABLE_MATERIALS if m in surrogate.categories["material"]]}
+
+
+def candidate_pool(surrogate: Surrogate, n: int, rng: np.random.Generator,
+                   domain: Optional[Dict] = None) -> List[Dict]:
+    """
+    Candidates on the manifold of the training data.
+
+    Each candidate takes the manufacturing inputs (k_edge, n_harmonic,
+    stiffness_scale, bow_um) of a random solved case and draws k_azi
+    uniformly over the covered range and load/material uniformly over the
+    seen categories; a uniform box would mostly propose corners no campaign
+    would run. domain overrides ranges (continuous: (lo, hi), drawn
+    uniformly) or choices (n_harmonic, load, material: lists).
+    """
+    X_cont = surrogate.X[:, :len(CONTINUOUS)] * surrogate.x_std + surrogate.x_mean
+    ranges = {"k_azi": (float(X_cont[:, 0].min()), float(X_cont[:, 0].max()))}
+    choices = {"load": surrogate.categories["load"], "material": surrogate.categories["material"]}
+    for k, v in (domain or {}).items():
+        (choices if k in ("n_harmonic",) + CATEGORICAL else ranges)[k] = v
+
+    cases = []
+    for _ in range(n):
+        row = X_cont[rng.integers(len(X_cont))]
+        case = dict(zip(CONTINUOUS, row.tolist()))
+        case.update({k: float(rng.uniform(*r)) for k, r in ranges.items()})
+        case.update({k: v[rng.integers(len(v))] for k, v in choices.items()})
+        case["n_harmonic"] = int(round(case["n_harmonic"]))
+        cases.append(case)
+    return cases
+
+
+def propose(surrogate: Surrogate, n: int, candidates: List[Dict]) -> List[Dict]:
+    """Greedy batch of the n most uncertain candidates, conditioning on each pick."""
+    Xc = surrogate.encode(candidates)
+    X, y = surrogate.X, surrogate.y
+    theta = surrogate.theta
+    d = X.shape[1]
+    sf2, sn2 = np.exp(theta[d]), np.exp(theta[d + 1])
+
+    picked, out = [], []
+    Kinv = surrogate._Kinv
+    for _ in range(min(n, len(candidates))):
+        Ks = surrogate._kernel(Xc, X, theta)
+        var = sf2 - np.sum((Ks @ Kinv) * Ks, axis=1)
+        var[picked] = -np.inf
+        i = int(np.argmax(var))
+        picked.append(i)
+        mu = float(Ks[i] @ (Kinv @ y)) + surrogate.y_mean
+        out.append({**candidates[i], "predicted_W_pv_nm": float(np.exp(mu)),
+                    "log_std": float(np.sqrt(max(var[i], 0.0)))})
+        # Condition on the pick (kriging believer: the mean does not affect variances)
+        X = np.vstack([X, Xc[i]])
+        y = np.append(y, mu - surrogate.y_mean)
+        K = surrogate._kernel(X, X, theta) + sn2 * np.eye(len(X))
+        Kinv = cho_solve(cho_factor(K, lower=True), np.eye(len(X)))
+    return out
+
+
+def to_run_params(case: Dict) -> Dict:
+    """Convert a normalized case into generator parameters for the runners."""
+    return {
+        "k_azi": case["k_azi"],
+        "k_edge": case["k_edge"],
+        "n_harmonic": int(case["n_harmonic"]),
+        "load": case["load"],
+        "material": case["material"],
+        "stiffness": NOMINAL_STIFFNESS * case["stiffness_scale"],
+        "bow": case["bow_um"] * 1e-6,
+    }
+
+
+def _parse_case(pairs: List[str]) -> Dict:
+    case = {"k_azi": 0.5, "k_edge": 2.0, "n_harmonic": 2, "stiffness_scale": 1.0, "bow_um": 0.0,
+            "load": "scan", "material": "silicon"}
+    for p in pairs:
+        k, v = p.split("=", 1)
+        case[k] = v if k in CATEGORICAL else float(v)
+    return case
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="W_pv Gaussian-process surrogate")
+    parser.add_argument("--fit", action="store_true", help="Fit on the corpus and save")
+    parser.add_argument("--predict", nargs="+", metavar="KEY=VALUE", help="Predict one case")
+    parser.add_argument("--propose", type=int, default=0, help="Propose N new FEA cases")
+    parser.add_argument("--k-azi", type=float, nargs=2, default=None,
+                        help=f"k_azi range for proposals (default: {RUNNABLE_K_AZI[0]}–{RUNNABLE_K_AZI[1]})")
+    parser.add_argument("--corpus-domain", action="store_true",
+                        help="Propose anywhere the corpus reaches, not only what the local runner solves")
+    parser.add_argument("--load", nargs="+", default=None, help="Restrict proposals to these loads")
+    parser.add_argument("--material", nargs="+", default=None, help="Restrict proposals to these materials")
+    parser.add_argument("--pool", type=int, default=2000, help="Candidate pool size")
+    parser.add_argument("--out", type=Path, default=None, help="Write proposals to this JSON file")
+    args = parser.parse_args()
+
+    if args.fit or not SURROGATE_FILE.exists():
+        t0 = time.time()
+        model = Surrogate.from_corpus()
+        model.save()
+        loo = model.loo()
+        print(f"Fitted on {loo['n']} cases in {time.time()-t0:.1f}s -> {SURROGATE_FILE}")
+        print(f"LOO: RMSE(log)={loo['rmse_log']:.3f}, median |error|={loo['median_abs_pct']:.1f}%, "
+              f"95% coverage={loo['coverage_95']*100:.0f}%")
+        print("Length scales: " + ", ".join(f"{k}={v}" for k, v in model.length_scales().items()))
+    else:
+        model = Surrogate.load()
+
+    if args.predict:
+        case = _parse_case(args.predict)
+        t0 = time.perf_counter()
+        pred = model.predict_wpv(case)
+        dt = (time.perf_counter() - t0) * 1e6
+        print(f"\nW_pv ≈ {pred['W_pv_nm']:.1f} nm  (95%: {pred['W_pv_lo_nm']:.1f} – {pred['W_pv_hi_nm']:.1f})"
+              f"  [{dt:.0f} µs]")
+
+    if args.propose:
+        domain = {} if args.corpus_domain else runnable_domain(model)
+        if args.k_azi:
+            domain["k_azi"] = tuple(args.k_azi)
+        if args.load:
+            domain["load"] = args.load
+        if args.material:
+            domain["material"] = args.material
+        pool = candidate_pool(model, args.pool, np.random.default_rng(0), domain)
+        proposals = propose(model, args.propose, pool)
+        print(f"\n{'k_azi':>7} {'n':>3} {'load':>11} {'material':>9} {'stiff':>6} {'bow_um':>7} "
+              f"{'pred W_pv':>10} {'σ_log':>6}")
+        for p in proposals:
+            print(f"{p['k_azi']:>7.3f} {p['n_harmonic']:>3} {p['load']:>11} {p['material']:>9} "
+                  f"{p['stiffness_scale']:>6.3f} {p['bow_um']:>7.2f} {p['predicted_W_pv_nm']:>10.1f} "
+                  f"{p['log_std']:>6.3f}")
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump([{**to_run_params(p), "predicted_W_pv_nm": p["predicted_W_pv_nm"],
+                            "log_std": p["log_std"]} for p in proposals], f, indent=2)
+            print(f"\n📁 Proposals saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
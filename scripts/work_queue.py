@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+WORK QUEUE — Pull-based coordinator/worker distribution of campaign cases
+================================================================================
+
+Campaigns used to run on one machine (or through the external cloud API).
+This module spreads a case list over any number of workers that can reach
+the coordinator over TCP — other Linux hosts, or just other processes on
+localhost.
+
+Coordinator
+    Holds the case queue. Workers lease one case at a time; a lease expires
+    unless the worker heartbeats. Expired leases (dead or partitioned
+    workers) are put back at the front of the queue, up to max_attempts.
+    Results are appended to a JSONL file as they arrive, so a restarted
+    coordinator skips cases that are already done.
+
+Worker
+    Loops lease → solve → complete, heartbeating from a background thread
+    while CalculiX runs. The default solver is run_killshot_campaign.run_case,
+    so each case still gets the runtime-model timeout, retries and failure
+    ledger on the worker host. A completion is kept in the worker's outbox
+    (and in the --outbox file, if given) until the coordinator acknowledges
+    it; undelivered completions are retried with backoff before the next
+    lease, so a network blip never throws a finished solve away.
+
+Protocol: one JSON request per TCP connection, one JSON reply
+(ops: lease, heartbeat, complete, status). Malformed requests get an
+{"error": ...} reply. A shared --token guards coordinators bound to a
+public interface.
+
+Usage:
+    python3 scripts/work_queue.py coordinator --cases cases.json --out results.jsonl --port 8765
+    python3 scripts/work_queue.py worker --host 10.0.0.5 --port 8765
+    python3 scripts/work_queue.py worker --host 10.0.0.5 --outbox outbox.jsonl   # Survive worker restarts
+    python3 scripts/work_queue.py status --port 8765
+
+    cases.json: [{"case_id": ..., "campaign": ..., "params": {...}}, ...]
+
+================================================================================
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from online_stats import RunningStats
+
+DEFAULT_PORT = 8765
+LEASE_S = 120.0
+MAX_ATTEMPTS = 3
+
+
+class CaseFailed(Exception):
+    """Raised by a solve function to report a case failure class to the coordinator."""
+
+
+class CaseQueue:
+    """Thread-safe case queue with leases and re-queueing of expired leases."""
+
+    def __init__(self, cases: List[Dict], lease_s: float = LEASE_S, max_attempts: int = MAX_ATTEMPTS,
+                 results_path: Optional[Path] = None):
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.results_path = Path(results_path) if results_path else None
+        self.lock = threading.Lock()
+        self.done: Dict[str, Dict] = {}
+        # W_pv of completed cases, one accumulator per worker (merged in status)
+        self.stats: Dict[str, RunningStats] = {}
+        if self.results_path and self.results_path.exists():
+            with open(self.results_path) as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        self.done[rec["case_id"]] = rec
+                        self._accumulate(rec)
+        self.pending = deque(c for c in cases if c["case_id"] not in self.done)
+        self.attempts: Dict[str, int] = {}
+        self.leases: Dict[str, Dict] = {}
+        self.workers: Dict[str, float] = {}
+        self.n_total = len(cases)
+
+    def _accumulate(self, rec: Dict):
+        wpv = (rec.get("result") or {}).get("W_pv_nm")
+        if rec.get("ok") and wpv is not None:
+            self.stats.setdefault(rec.get("worker", "?"), RunningStats()).push(wpv)
+
+    def _record(self, rec: Dict):
+        self.done[rec["case_id"]] = rec
+        self._accumulate(rec)
+        if self.results_path:
+            self.results_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.results_path, 'a') as f:
+                f.write(json.dumps(rec, default=str) + "\n")
+
+    def reap(self, now: Optional[float] = None) -> List[str]:
+        """Re-queue cases whose lease expired; returns their case ids."""
+        now = time.time() if now is None else now
+        requeued = []
+        with self.lock:
+            for lease_id, lease in list(self.leases.items()):
+                if lease["expires"] > now:
+                    continue
+                del self.leases[lease_id]
+                case = lease["case"]
+                if self.attempts[case["case_id"]] >= self.max_attempts:
+                    self._record({"case_id": case["case_id"], "ok": False, "failure": "lease_expired",
+                                  "worker": lease["worker"], "attempts": self.attempts[case["case_id"]]})
+                else:
+                    self.pending.appendleft(case)
+                requeued.append(case["case_id"])
+        return requeued
+
+    def lease(self, worker: str) -> Dict:
+        self.reap()
+        with self.lock:
+            self.workers[worker] = time.time()
+            if self.pending:
+                case = self.pending.popleft()
+                self.attempts[case["case_id"]] = self.attempts.get(case["case_id"], 0) + 1
+                lease_id = uuid.uuid4().hex
+                self.leases[lease_id] = {"case": case, "worker": worker,
+                                         "expires": time.time() + self.lease_s}
+                return {"lease_id": lease_id, "case": case, "lease_s": self.lease_s,
+                        "attempt": self.attempts[case["case_id"]]}
+            if self.leases:
+                return {"wait": min(5.0, self.lease_s / 4)}
+            return {"finished": True}
+
+    def heartbeat(self, lease_id: str, worker: str) -> Dict:
+        with self.lock:
+            self.workers[worker] = time.time()
+            lease = self.leases.get(lease_id)
+            if lease is None:
+                return {"ok": False}
+            lease["expires"] = time.time() + self.lease_s
+            return {"ok": True}
+
+    def complete(self, lease_id: str, worker: str, case_id: str, ok: bool,
+                 result: Optional[Dict] = None, failure: Optional[str] = None) -> Dict:
+        with self.lock:
+            self.leases.pop(lease_id, None)
+            if case_id in self.done:
+                return {"ok": True, "duplicate": True}
+            # A late result from an expired lease still counts; drop any re-queued copy
+            self.pending = deque(c for c in self.pending if c["case_id"] != case_id)
+            for lid in [l for l, v in self.leases.items() if v["case"]["case_id"] == case_id]:
+                del self.leases[lid]
+            self._record({"case_id": case_id, "ok": ok, "worker": worker, "failure": failure,
+                          "attempts": self.attempts.get(case_id, 1), "result": result})
+            return {"ok": True}
+
+    def running_stats(self) -> RunningStats:
+        """W_pv statistics of every completed case, merged over the workers."""
+        with self.lock:
+            merged = RunningStats()
+            for worker_stats in self.stats.values():
+                merged.merge(worker_stats)
+            return merged
+
+    def status(self) -> Dict:
+        running = self.running_stats()
+        with self.lock:
+            return {"total": self.n_total, "pending": len(self.pending), "leased": len(self.leases),
+                    "done": sum(1 for r in self.done.values() if r["ok"]),
+                    "failed": sum(1 for r in self.done.values() if not r["ok"]),
+                    "workers": {w: round(time.time() - t, 1) for w, t in self.workers.items()},
+                    "w_pv": running.summary(), "w_pv_progress": running.progress()}
+
+    @property
+    def finished(self) -> bool:
+        with self.lock:
+            return not self.pending and not self.leases
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            msg = json.loads(self.rfile.readline())
+        except ValueError:
+            msg = None
+        if not isinstance(msg, dict):
+            reply = {"error": "malformed request: expected one JSON object"}
+        elif self.server.token and msg.get("token") != self.server.token:
+            reply = {"error": "bad token"}
+        else:
+            try:
+                reply = self._dispatch(msg)
+            except KeyError as e:
+                reply = {"error": f"malformed {msg.get('op')} request: missing {e}"}
+        self.wfile.write((json.dumps(reply, default=str) + "\n").encode())
+
+    def _dispatch(self, msg: Dict) -> Dict:
+        queue: CaseQueue = self.server.queue
+        op, worker = msg.get("op"), msg.get("worker", "?")
+        if op == "lease":
+            return queue.lease(worker)
+        if op == "heartbeat":
+            return queue.heartbeat(msg["lease_id"], worker)
+        if op == "complete":
+            return queue.complete(msg["lease_id"], worker, msg["case_id"], msg["ok"],
+                                  msg.get("result"), msg.get("failure"))
+        if op == "status":
+            return queue.status()
+        return {"error": f"unknown op {op!r}"}
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    """TCP front end of a CaseQueue."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, queue: CaseQueue, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 token: Optional[str] = None):
+        super().__init__((host, port), _Handler)
+        self.queue = queue
+        self.token = token
+
+    def serve_until_done(self, poll_s: float = 1.0, progress: bool = True, grace_s: float = 6.0):
+        """
+        Serve until every case is done or failed; reap expired leases meanwhile.
+
+        Keeps answering for grace_s afterwards so idle workers are told the
+        queue is finished instead of finding the port closed.
+        """
+        thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.2}, daemon=True)
+        thread.start()
+        last = None
+        try:
+            while not self.queue.finished:
+                for case_id in self.queue.reap():
+                    print(f"  ⚠️  Lease expired: {case_id} re-queued", flush=True)
+                s = self.queue.status()
+                line = (f"  {s['done']}/{s['total']} done, {s['failed']} failed, "
+                        f"{s['leased']} running, {s['pending']} queued, {len(s['workers'])} worker(s)"
+                        f" | W_pv {s['w_pv_progress']}")
+                if progress and line != last:
+                    print(line, flush=True)
+                    last = line
+                time.sleep(poll_s)
+            time.sleep(grace_s)
+        finally:
+            self.shutdown()
+            self.server_close()
+
+
+def request(host: str, port: int, msg: Dict, token: Optional[str] = None, timeout: float = 30.0) -> Dict:
+    """Send one request to a coordinator and return its reply."""
+    if token:
+        msg = {**msg, "token": token}
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(msg, default=str) + "\n").encode())
+        with sock.makefile("r") as f:
+            return json.loads(f.readline())
+
+
+class Worker:
+    """
+    Pull cases from a coordinator and solve them with solve(case) -> result or None.
+
+    Completions wait in self.outbox (mirrored to outbox_path, if given) until
+    the coordinator acknowledges them.
+    """
+
+    def __init__(self, host: str, port: int, solve: Callable[[Dict], Optional[Dict]],
+                 worker_id: Optional[str] = None, token: Optional[str] = None, max_idle_retries: int = 10,
+                 outbox_path: Optional[Path] = None):
+        self.host = host
+        self.port = port
+        self.solve = solve
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.token = token
+        self.max_idle_retries = max_idle_retries
+        self.outbox_path = Path(outbox_path) if outbox_path else None
+        self.outbox: List[Dict] = []
+        if self.outbox_path and self.outbox_path.exists():
+            with open(self.outbox_path) as f:
+                self.outbox = [json.loads(line) for line in f if line.strip()]
+        self.n_solved = 0
+
+    def _send(self, msg: Dict) -> Dict:
+        return request(self.host, self.port, {**msg, "worker": self.worker_id}, token=self.token)
+
+    def _save_outbox(self):
+        if self.outbox_path is None:
+            return
+        if not self.outbox:
+            self.outbox_path.unlink(missing_ok=True)
+            return
+        tmp = self.outbox_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            for msg in self.outbox:
+                f.write(json.dumps(msg, default=str) + "\n")
+        os.replace(tmp, self.outbox_path)
+
+    def _flush_outbox(self):
+        """Deliver queued completions in order; raises OSError if the coordinator is unreachable."""
+        while self.outbox:
+            reply = self._send(self.outbox[0])
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            self.outbox.pop(0)
+            self._save_outbox()
+
+    def _heartbeat(self, lease_id: str, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            try:
+                self._send({"op": "heartbeat", "lease_id": lease_id})
+            except OSError:
+                pass
+
+    def run(self):
+        failures = 0
+        while True:
+            try:
+                self._flush_outbox()
+                reply = self._send({"op": "lease"})
+                failures = 0
+            except OSError:
+                failures += 1
+                if failures > self.max_idle_retries:
+                    print(f"  Coordinator unreachable, worker {self.worker_id} exiting")
+                    if self.outbox:
+                        kept = f"kept in {self.outbox_path}" if self.outbox_path else "lost (no --outbox)"
+                        print(f"  ⚠️  {len(self.outbox)} unacknowledged result(s) {kept}")
+                    return
+                time.sleep(min(2 ** failures, 30))
+                continue
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            if reply.get("finished"):
+                return
+            if "wait" in reply:
+                time.sleep(reply["wait"])
+                continue
+
+            case = reply["case"]
+            stop = threading.Event()
+            hb = threading.Thread(target=self._heartbeat,
+                                  args=(reply["lease_id"], reply["lease_s"] / 3, stop), daemon=True)
+            hb.start()
+            try:
+                result = self.solve(case)
+                failure = None if result is not None else "failed"
+            except CaseFailed as e:
+                result, failure = None, str(e)
+            except Exception as e:
+                result, failure = None, f"worker_error: {e}"
+            finally:
+                stop.set()
+            # Delivered (with retries) at the top of the loop, before the next lease
+            self.outbox.append({"op": "complete", "lease_id": reply["lease_id"], "case_id": case["case_id"],
+                                "ok": result is not None, "result": result, "failure": failure})
+            self._save_outbox()
+            self.n_solved += 1
+
+
+def killshot_solver():
+    """solve(case) backed by run_killshot_campaign (imported lazily: needs the generator)."""
+    import run_killshot_campaign as K
+    ccx = K.find_ccx()
+
+    def solve(case):
+        work_dir = K.LOCAL_WORK_DIR / case.get("campaign", "distributed")
+        work_dir.mkdir(parents=True, exist_ok=True)
+        result = K.run_case(case["case_id"], ccx, work_dir, **case["params"])
+        if result is None:
+            failure_file = K.case_path(work_dir, case["case_id"]) / "failure.json"
+            if failure_file.exists():
+                raise CaseFailed(json.loads(failure_file.read_text()).get("status", "failed"))
+        return result
+    return solve
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Distributed campaign work queue")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    c = sub.add_parser("coordinator", help="Serve a case list to workers")
+    c.add_argument("--cases", type=Path, required=True, help="JSON list of cases")
+    c.add_argument("--out", type=Path, required=True, help="Results JSONL (resumed if present)")
+    c.add_argument("--bind", default="127.0.0.1", help="Interface to bind (0.0.0.0 for other hosts)")
+    c.add_argument("--lease", type=float, default=LEASE_S, help="Lease length in seconds")
+    c.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Leases per case before giving up")
+
+    w = sub.add_parser("worker", help="Pull and solve cases")
+    w.add_argument("--host", default="127.0.0.1")
+    w.add_argument("--outbox", type=Path, default=None,
+                   help="JSONL file holding results until the coordinator acknowledges them")
+
+    s = sub.add_parser("status", help="Print coordinator status")
+    s.add_argument("--host", default="127.0.0.1")
+
+    for p in (c, w, s):
+        p.add_argument("--port", type=int, default=DEFAULT_PORT)
+        p.add_argument("--token", default=os.environ.get("WORK_QUEUE_TOKEN"), help="Shared secret")
+    args = parser.parse_args()
+
+    if args.role == "coordinator":
+        with open(args.cases) as f:
+            cases = json.load(f)
+        queue = CaseQueue(cases, lease_s=args.lease, max_attempts=args.max_attempts, results_path=args.out)
+        print(f"Coordinator on {args.bind}:{args.port}: {len(queue.pending)} of {queue.n_total} cases to run "
+              f"(lease {args.lease:.0f}s)")
+        Coordinator(queue, args.bind, args.port, token=args.token).serve_until_done()
+        s = queue.status()
+        print(f"\n✅ Queue drained: {s['done']} done, {s['failed']} failed -> {args.out}")
+    elif args.role == "worker":
+        worker = Worker(args.host, args.port, killshot_solver(), token=args.token, outbox_path=args.outbox)
+        print(f"Worker {worker.worker_id} pulling from {args.host}:{args.port}")
+        worker.run()
+        print(f"Worker {worker.worker_id} done ({worker.n_solved} case(s))")
+    else:
+        print(json.dumps(request(args.host, args.port, {"op": "status"}, token=args.token), indent=2))
+
+
+if __name__ == "__main__":
+    main()